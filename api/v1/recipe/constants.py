@@ -6,9 +6,21 @@ from recipe.choices import MealType, Unit
 Константы с CSS селекторами для парсинга рецептов
 """
 
-STRUCTURED_DATA_SELECTORS = [
-    'script[type="application/ld+json"]'
-]
+# <script type="application/ld+json"> в сырых байтах страницы — без построения DOM
+JSON_LD_SCRIPT_RE = re.compile(
+    rb"""<script\b[^>]*?\btype\s*=\s*["']?application/ld\+json["']?[^>]*>(.*?)</script\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+JSON_LD_WRAPPER_RE = re.compile(r"^\s*(?:<!--|<!\[CDATA\[)|(?:-->|\]\]>)\s*$")
+# Кодировка из <meta charset=...> или <meta http-equiv="Content-Type" content="...; charset=...">,
+# если её нет в заголовке Content-Type; ищется в начале страницы
+META_CHARSET_RE = re.compile(rb"""<meta\b[^>]*?\bcharset\s*=\s*["']?([\w-]+)""", re.IGNORECASE)
+META_CHARSET_SNIFF_BYTES = 4096
+
+RECIPE_JSONLD_TYPES = {"Recipe", "HowTo"}
+
+# Поля, которых в JSON-LD достаточно, чтобы не разбирать страницу по селекторам
+JSONLD_REQUIRED_FIELDS = ("title", "ingredients", "steps", "thumbnail")
 
 LISTING_JSONLD_TYPES = {
     "ItemList", "CollectionPage", "SearchResultsPage",
@@ -96,6 +108,13 @@ INSTRUCTIONS_SELECTORS = [
     '.step_n',
 ]
 
+# Меняется при любом изменении промпта или схемы — старые ответы LLM из кеша не используются
+LLM_PROMPT_VERSION = "2"
+
+# Прогресс извлечения рецепта LLM уходит пользователю сразу, когда появилось название,
+# а дальше — не чаще раза в столько секунд
+EXTRACTION_PROGRESS_INTERVAL = 5
+
 LLM_SCHEMA = """
     {
     "title": "string",
@@ -115,13 +134,68 @@ LLM_SCHEMA = """
     }
 """
 
+# Оценка длины промпта без токенизатора: символов на токен
+# (кириллица в токенизаторах Llama/Qwen кодируется плотнее латиницы)
+LLM_CHARS_PER_TOKEN_CYRILLIC = 2.5
+LLM_CHARS_PER_TOKEN_LATIN = 4
+
+# num_ctx подбирается под промпт + ответ, с шагом LLM_CTX_STEP и не меньше LLM_MIN_CTX
+LLM_MIN_CTX = 1024
+LLM_CTX_STEP = 512
+
+# Как часто запрос, которому не хватило слота Ollama, проверяет, не освободился ли он (сек)
+LLM_SLOT_POLL_INTERVAL = 0.2
+
+# Фразы-паразиты в транскриптах: приветствия, реклама, призывы подписаться.
+# Приветствия и заголовки рекламы — только в начале фразы, остальное — целыми оборотами,
+# чтобы не выбрасывать шаги вроде «mix like and fold» или «перец-колокольчик»
+LLM_FILLER_RE = re.compile(
+    r"^\W*(?:всем привет|привет всем|привет,? друзья|добро пожаловать|реклама|субтитры"
+    r"|hi guys|hey guys|welcome back|(?:please )?subscribe|sponsored by)\b"
+    r"|\b(?:подписывайтесь|подпишитесь|(?:по)?ставьте лайк\w*"
+    r"|(?:нажмите|жмите|включите) (?:на )?колокольчик|пишите в комментариях"
+    r"|спонсор\w* (?:этого |нашего |сегодняшнего )?(?:видео|выпуска|ролика)|промокод\w*"
+    r"|ссылка в (?:описании|профиле)|на правах рекламы|рекламная интеграция"
+    r"|продолжение следует"
+    r"|subscribe (?:to (?:my|our|the) channel|for more)|like and subscribe"
+    r"|smash (?:that|the) (?:like|subscribe|bell)|(?:is|was) sponsored by|promo code"
+    r"|link in (?:the )?(?:bio|description)|thanks for watching)\b",
+    re.IGNORECASE,
+)
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+HASHTAG_RE = re.compile(r"#\w+")
+
 # Строки-заголовки, которые не являются ингредиентами — фильтруются при парсинге
 INGREDIENT_NOISE_WORDS = {
     "продукты", "ингредиенты", "ingredients", "состав", "тесто",
 }
 
-# Порог схожести для поиска продуктов по триграммам (pg_trgm)
-PRODUCT_SIMILARITY_THRESHOLD = 0.5
+# Описание видео считается готовым рецептом, если в нём столько строк-ингредиентов;
+# тогда аудио не скачивается и не распознаётся
+DESCRIPTION_RECIPE_MIN_INGREDIENTS = 3
+INGREDIENT_LINE_MAX_LENGTH = 80
+
+# Маркеры списков в описаниях видео: "- ", "• ", "✅ ", "1) ", "2. "
+LIST_MARKER_RE = re.compile(r"^(?:[^\w]+|\d+[.)]\s+)")
+
+# Сколько живёт скачанная при валидации страница, которую затем переиспользует парсер (сек)
+FETCHED_PAGE_TTL = 15 * 60
+
+# HTTP-кеш страниц: статусы, которые кешируются, и эвристический срок свежести
+# для ответов без Cache-Control/Expires — доля возраста Last-Modified, но не больше суток
+HTTP_CACHEABLE_STATUSES = frozenset({200, 203, 301, 308})
+HTTP_HEURISTIC_FRESHNESS_FRACTION = 0.1
+HTTP_HEURISTIC_FRESHNESS_MAX = 24 * 60 * 60
+
+# Исходящие запросы (HttpClient): статусы, при которых запрос повторяется с паузой
+HTTP_RETRY_STATUSES = (429, 503)
+
+# Сколько живёт профиль извлечения домена — какие селекторы дали поля рецепта (сек)
+EXTRACTION_PROFILE_TTL = 30 * 24 * 60 * 60
+# Источник поля в профиле, если оно взято из JSON-LD
+PROFILE_JSON_LD = "json_ld"
+# Источник шагов в профиле, если они найдены по нумерации абзацев
+PROFILE_NUMBERED_STEPS = "numbered"
 
 UNIT_SYNONYMS = {
     # --- без количества ---
@@ -251,34 +325,11 @@ UNIT_SYNONYMS = {
     "столовых ложек": Unit.TBSP,
 }
 
-UNIT_KEYS = sorted(UNIT_SYNONYMS.keys(), key=len, reverse=True)
-
-AMOUNT_UNIT_RE = re.compile(
-    rf"""
-    (?P<amount>\d+(?:[.,]\d+)?|\d+\s+\d+/\d+|\d+/\d+)
-    \s*[-–]?\s*
-    (?P<unit>{'|'.join(map(re.escape, UNIT_KEYS))})
-    \b
-    \.?
-    """,
-    re.IGNORECASE | re.VERBOSE
-)
-
-# "1банан", "2яйца" — число слитно с названием
-AMOUNT_PREFIX_RE = re.compile(
-    r"^(\d+(?:[.,]\d+)?(?:/\d+)?|\d+\s+\d+/\d+)\s*([а-яёa-z][а-яёa-z\s\-]*)",
-    re.IGNORECASE,
-)
-
-# "молоко 200" — число в конце строки без единицы
-AMOUNT_SUFFIX_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*$")
-
-RANGE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*[-–]\s*(\d+(?:[.,]\d+)?)")
-
-# Единица без числа — используется после вырезания диапазона
-UNIT_ONLY_RE = re.compile(
-    rf"(?P<unit>{'|'.join(map(re.escape, UNIT_KEYS))})\b\.?",
-    re.IGNORECASE
+# clean_name: шаги с числами выполняются, только если в названии есть цифры
+NAME_DIGIT_RE = re.compile(r"\d")
+# clean_name: всё кроме букв, пробелов и дефиса; дефис без букв по сторонам
+NAME_SYMBOLS_RE = re.compile(
+    r"[^а-яёА-ЯЁa-zA-Z\s\-]|(?<![а-яёА-ЯЁa-zA-Z])-(?![а-яёА-ЯЁa-zA-Z])"
 )
 
 CONVERSION = {
@@ -352,4 +403,11 @@ MEAL_TYPE_SYNONYMS = {
     "side item": MealType.SIDE_DISH,
     "side order": MealType.SIDE_DISH,
     "accompaniment": MealType.SIDE_DISH,
-}
\ No newline at end of file
+}
+
+# Все синонимы одним выражением (длинные первыми); при нескольких совпадениях
+# побеждает синоним, стоящий раньше в MEAL_TYPE_SYNONYMS
+MEAL_TYPE_PRIORITY = {key: index for index, key in enumerate(MEAL_TYPE_SYNONYMS)}
+MEAL_TYPE_RE = re.compile(
+    rf"\b(?:{'|'.join(map(re.escape, sorted(MEAL_TYPE_SYNONYMS, key=len, reverse=True)))})\b"
+)
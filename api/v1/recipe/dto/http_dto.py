@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class HttpTimingDTO:
+    count: int = 0
+    total: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ExtractionProgressDTO:
+    title: str | None = None
+    ingredients: int = 0
+    steps: int = 0
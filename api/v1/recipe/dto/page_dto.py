@@ -0,0 +1,22 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class FetchedPageDTO:
+    url: str
+    final_url: str
+    content: bytes
+    headers: dict[str, str] = field(default_factory=dict)
+    etag: str | None = None
+
+
+@dataclass
+class CachedResponseDTO:
+    url: str
+    status: int
+    reason: str
+    body: bytes
+    stored_at: float
+    headers: dict[str, str] = field(default_factory=dict)
+    # значения заголовков запроса, перечисленных в Vary ответа
+    vary: dict[str, str | None] = field(default_factory=dict)
@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ExtractionStatsDTO:
+    hits: int = 0
+    misses: int = 0
+    cold: int = 0
+    json_ld: int = 0
+
+    @property
+    def lookups(self) -> int:
+        """
+        Поля, найденные селекторами; поля из JSON-LD сюда не входят
+        """
+        return self.hits + self.misses + self.cold
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
@@ -0,0 +1,9 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class RenormalizeProgressDTO:
+    total: int
+    processed: int = 0
+    updated: int = 0
+    last_id: str | None = None
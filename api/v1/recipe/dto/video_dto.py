@@ -0,0 +1,9 @@
+from dataclasses import dataclass, field
+
+
+@dataclass
+class VideoProbeDTO:
+    description: str
+    thumbnail: str
+    duration: float | None = None
+    audio_format: dict = field(default_factory=dict)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 
 from api.v1.recipe.dto.recipe_dto import RecipeDTO
 from recipe.models import Recipe
@@ -27,4 +28,52 @@ class IRecipeRepository(ABC):
 class IRecipeBuilderService(ABC):
     @abstractmethod
     def build(self, dto: RecipeDTO) -> RecipeDTO:
-        pass
\ No newline at end of file
+        pass
+
+
+class ITranscriptRepository(ABC):
+
+    @abstractmethod
+    def get(self, extractor: str, video_id: str) -> RecipeDTO | None:
+        pass
+
+    @abstractmethod
+    def get_by_url(self, url: str) -> RecipeDTO | None:
+        pass
+
+    @abstractmethod
+    def save(
+        self,
+        extractor: str,
+        video_id: str,
+        transcript: str,
+        description: str,
+        thumbnail: str | None,
+    ):
+        pass
+
+
+class ILLMCacheRepository(ABC):
+
+    @abstractmethod
+    def get(self, key: str) -> RecipeDTO | None:
+        pass
+
+    @abstractmethod
+    def save(self, key: str, model: str, prompt_version: str, dto: RecipeDTO):
+        pass
+
+
+class IRecipeSourceRepository(ABC):
+
+    @abstractmethod
+    def count_parsed(self, after: str | None = None) -> int:
+        pass
+
+    @abstractmethod
+    def iter_parsed(self, after: str | None, chunk_size: int) -> Iterator[tuple[str, dict]]:
+        pass
+
+    @abstractmethod
+    def bulk_update_parsed(self, rows: list[tuple[str, dict]]):
+        pass
@@ -17,6 +17,21 @@ class RecipeMapper:
             return "\n".join(str(t) for t in raw_tips if t)
         return str(raw_tips)
 
+    @staticmethod
+    def video_to_dto(description: str, transcript: str, thumbnail: str | None) -> RecipeDTO:
+        """
+        Сырой текст видео (описание + транскрипт) для последующей обработки LLM
+        """
+        return RecipeDTO(
+            title="Без названия",
+            description=" ".join(filter(None, [description, transcript])),
+            meal_type=None,
+            ingredients=[],
+            steps=[],
+            tips=None,
+            thumbnail=thumbnail,
+        )
+
     @staticmethod
     def dict_to_dto(data: dict) -> RecipeDTO:
         return RecipeDTO(
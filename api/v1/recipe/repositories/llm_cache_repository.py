@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from api.v1.recipe.dto.recipe_dto import RecipeDTO
+from api.v1.recipe.interfaces.recipe_parser import ILLMCacheRepository
+from api.v1.recipe.mappers.recipe_mapper import RecipeMapper
+from recipe.models import LLMResponse
+
+
+class LLMCacheRepository(ILLMCacheRepository):
+    """
+    Постоянный кеш ответов LLM с TTL и ограничением по числу записей.
+    При переполнении удаляются давно не использованные записи.
+    """
+
+    def __init__(self, ttl: int | None = None, max_entries: int | None = None):
+        self.ttl = settings.LLM_CACHE_TTL if ttl is None else ttl
+        self.max_entries = settings.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+
+    def get(self, key: str) -> RecipeDTO | None:
+        entry = LLMResponse.objects.filter(key=key, created__gte=self._expires_before()).first()
+
+        if not entry:
+            return None
+
+        LLMResponse.objects.filter(pk=entry.pk).update(last_used=timezone.now())
+        return RecipeMapper.dict_to_dto(entry.response)
+
+    def save(self, key: str, model: str, prompt_version: str, dto: RecipeDTO):
+        LLMResponse.objects.update_or_create(
+            key=key,
+            defaults={
+                "model": model,
+                "prompt_version": prompt_version,
+                "response": RecipeMapper.dto_to_dict(dto),
+                "created": timezone.now(),
+                "last_used": timezone.now(),
+            },
+        )
+        self.evict()
+
+    def evict(self):
+        """
+        Удаляет просроченные записи и всё, что сверх max_entries
+        """
+        LLMResponse.objects.filter(created__lt=self._expires_before()).delete()
+
+        stale = LLMResponse.objects.order_by("-last_used").values_list("pk", flat=True)[
+            self.max_entries:
+        ]
+        stale_ids = list(stale)
+        if stale_ids:
+            LLMResponse.objects.filter(pk__in=stale_ids).delete()
+
+    def _expires_before(self):
+        return timezone.now() - timedelta(seconds=self.ttl)
@@ -1,18 +1,41 @@
-from django.contrib.postgres.search import TrigramSimilarity
+from functools import partial
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import transaction
 
-from api.v1.recipe.constants import PRODUCT_SIMILARITY_THRESHOLD
 from api.v1.recipe.dto.recipe_dto import RecipeDTO
 from api.v1.recipe.interfaces.recipe_parser import IRecipeRepository
-from api.v1.recipe.services.image_service import ImageService
+from api.v1.recipe.services.product_matcher import ProductMatcher
 from app.models import StatusChoices
 from product.models import Product
 from recipe.choices import MealType
 from recipe.models import Recipe, RecipeIngredient, RecipeSource
 
+# Для каждого названия — самый похожий продукт пользователя (pg_trgm).
+# Оператор % отбирает кандидатов по индексу product_name_trgm; порог —
+# pg_trgm.similarity_threshold сессии (PRODUCT_SIMILARITY_THRESHOLD из настроек,
+# см. product/signals.py)
+PRODUCT_MATCH_SQL = """
+    SELECT product.*, ingredient.name AS ingredient_name
+    FROM unnest(%s::text[]) AS ingredient(name)
+    CROSS JOIN LATERAL (
+        SELECT *
+        FROM {table}
+        WHERE created_by_id = %s AND name %% ingredient.name
+        ORDER BY similarity(name, ingredient.name) DESC
+        LIMIT 1
+    ) AS product
+"""
+
 
 class RecipeRepository(IRecipeRepository):
 
+    def __init__(self, match_in_memory: bool | None = None):
+        self.match_in_memory = (
+            settings.PRODUCT_MATCHER_ENABLED if match_in_memory is None else match_in_memory
+        )
+
     def exists_for_user(self, source_id: str, user_id: str) -> bool:
         return Recipe.objects.filter(
             source_id=source_id,
@@ -52,33 +75,62 @@ class RecipeRepository(IRecipeRepository):
         )
 
         if dto.thumbnail:
-            image_bytes, filename = ImageService.download_image(dto.thumbnail)
-            ImageService.save_image_to_model(recipe_obj, "image", image_bytes, filename)
-        
-        for ing in dto.ingredients:
-            product = self._find_or_create_product(ing.name, user_id)
-            
-            RecipeIngredient.objects.create(
+            # задачи импортируют этот репозиторий
+            from api.v1.recipe.tasks import attach_recipe_thumbnail
+
+            # загрузка картинки не держит транзакцию: задача ставится после commit
+            transaction.on_commit(
+                partial(attach_recipe_thumbnail.delay, str(recipe_obj.id), dto.thumbnail)
+            )
+
+        products = self._resolve_products([ing.name for ing in dto.ingredients], user_id)
+
+        RecipeIngredient.objects.bulk_create([
+            RecipeIngredient(
                 recipe=recipe_obj,
-                product=product,
+                product_id=products[ing.name],
                 quantity=ing.amount,
                 unit=ing.unit
             )
+            for ing in dto.ingredients
+        ])
 
         return recipe_obj
-    
-    def _find_or_create_product(self, name: str, user_id: str) -> Product:
-        """Ищет продукт по триграммному сходству; создаёт новый если не нашёл."""
-        match = (
-            Product.objects.filter(created_by_id=user_id)
-            .annotate(similarity=TrigramSimilarity("name", name))
-            .filter(similarity__gte=PRODUCT_SIMILARITY_THRESHOLD)
-            .order_by("-similarity")
-            .first()
-        )
-        if match:
-            return match
-        return Product.objects.create(name=name, created_by_id=user_id)
+
+    def _resolve_products(self, names: list[str], user_id: str) -> dict[str, str]:
+        """
+        id продуктов для всех ингредиентов рецепта за фиксированное число запросов:
+        ближайший по триграммам продукт ищется одним запросом (или в ProductMatcher
+        без запросов), ненайденные создаются одним bulk_create и перечитываются по имени
+        (ignore_conflicts — на случай гонки с параллельным импортом).
+        """
+        names = list(dict.fromkeys(names))
+        if self.match_in_memory:
+            products = ProductMatcher.match(user_id, names)
+        else:
+            products = {
+                match.ingredient_name: match.id
+                for match in Product.objects.raw(
+                    PRODUCT_MATCH_SQL.format(table=Product._meta.db_table),
+                    [names, user_id],
+                )
+            }
+
+        missing = [name for name in names if name not in products]
+        if missing:
+            Product.objects.bulk_create(
+                [Product(name=name, created_by_id=user_id) for name in missing],
+                ignore_conflicts=True,
+            )
+            created = dict(
+                Product.objects.filter(created_by_id=user_id, name__in=missing)
+                .values_list("name", "id")
+            )
+            products.update(created)
+            if self.match_in_memory:
+                transaction.on_commit(lambda: ProductMatcher.add(user_id, created))
+
+        return products
 
     def update_source_parsed_data(self, source_id: str, parsed_data: dict):
         RecipeSource.objects.filter(id=source_id).update(
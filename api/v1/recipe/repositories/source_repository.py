@@ -0,0 +1,39 @@
+from collections.abc import Iterator
+
+from api.v1.recipe.interfaces.recipe_parser import IRecipeSourceRepository
+from recipe.models import RecipeSource
+
+
+class RecipeSourceRepository(IRecipeSourceRepository):
+    """
+    Массовое чтение и запись RecipeSource.parsed_recipe.
+    Источники отдаются по возрастанию id, чтобы обход можно было продолжить с места остановки.
+    """
+
+    def count_parsed(self, after: str | None = None) -> int:
+        return self._parsed(after).count()
+
+    def iter_parsed(self, after: str | None, chunk_size: int) -> Iterator[tuple[str, dict]]:
+        """
+        Серверный курсор: в памяти не больше chunk_size строк
+        """
+        rows = (
+            self._parsed(after)
+            .order_by("id")
+            .values_list("id", "parsed_recipe")
+            .iterator(chunk_size=chunk_size)
+        )
+        for source_id, parsed in rows:
+            yield str(source_id), parsed
+
+    def bulk_update_parsed(self, rows: list[tuple[str, dict]]):
+        RecipeSource.objects.bulk_update(
+            [RecipeSource(id=source_id, parsed_recipe=parsed) for source_id, parsed in rows],
+            ["parsed_recipe"],
+        )
+
+    def _parsed(self, after: str | None):
+        queryset = RecipeSource.objects.exclude(parsed_recipe={})
+        if after:
+            queryset = queryset.filter(id__gt=after)
+        return queryset
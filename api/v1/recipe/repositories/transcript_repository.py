@@ -0,0 +1,47 @@
+from api.v1.recipe.dto.recipe_dto import RecipeDTO
+from api.v1.recipe.interfaces.recipe_parser import ITranscriptRepository
+from api.v1.recipe.mappers.recipe_mapper import RecipeMapper
+from api.v1.recipe.utils.helpers import video_key
+from recipe.models import VideoTranscript
+
+
+class TranscriptRepository(ITranscriptRepository):
+
+    def get(self, extractor: str, video_id: str) -> RecipeDTO | None:
+        transcript = VideoTranscript.objects.filter(
+            extractor=extractor,
+            video_id=video_id,
+        ).first()
+
+        if not transcript:
+            return None
+
+        return RecipeMapper.video_to_dto(
+            transcript.description,
+            transcript.transcript,
+            transcript.thumbnail,
+        )
+
+    def get_by_url(self, url: str) -> RecipeDTO | None:
+        key = video_key(url)
+        if not key:
+            return None
+        return self.get(*key)
+
+    def save(
+        self,
+        extractor: str,
+        video_id: str,
+        transcript: str,
+        description: str,
+        thumbnail: str | None,
+    ):
+        VideoTranscript.objects.update_or_create(
+            extractor=extractor,
+            video_id=video_id,
+            defaults={
+                "transcript": transcript,
+                "description": description,
+                "thumbnail": thumbnail or None,
+            },
+        )
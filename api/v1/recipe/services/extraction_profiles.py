@@ -0,0 +1,66 @@
+from collections import Counter
+from urllib.parse import urlparse
+
+from django.core.cache import cache
+
+from api.v1.recipe.constants import EXTRACTION_PROFILE_TTL, PROFILE_JSON_LD
+from api.v1.recipe.dto.profile_dto import ExtractionStatsDTO
+
+
+class ExtractionProfileStore:
+    """
+    Профили извлечения по доменам: для каждого поля рецепта — чем оно нашлось
+    при последнем удачном разборе страницы домена (номера селекторов группы или JSON-LD).
+    Профиль лежит в общем кеше: выученный одним воркером, он работает во всех.
+    Счётчики общие для всех доменов и считают найденные поля: hit — поле дал селектор
+    из профиля, miss — не дал и поле нашлось по всему списку, cold — профиля для поля не было,
+    json_ld — поле взято из JSON-LD (он разбирается до селекторов, профиль не нужен).
+    """
+
+    KEY_PREFIX = "extraction_profile"
+    OUTCOMES = ("hit", "miss", "cold", PROFILE_JSON_LD)
+
+    def __init__(self, ttl: int = EXTRACTION_PROFILE_TTL):
+        self.ttl = ttl
+
+    def get(self, domain: str) -> dict:
+        return cache.get(self._key(domain)) or {}
+
+    def put(self, domain: str, profile: dict):
+        cache.set(self._key(domain), profile, timeout=self.ttl)
+
+    def delete(self, domain: str):
+        cache.delete(self._key(domain))
+
+    def record(self, outcomes: Counter):
+        for outcome in self.OUTCOMES:
+            if outcomes[outcome]:
+                key = self._stats_key(outcome)
+                cache.add(key, 0, timeout=None)
+                try:
+                    cache.incr(key, outcomes[outcome])
+                except ValueError:
+                    cache.set(key, outcomes[outcome], timeout=None)
+
+    def stats(self) -> ExtractionStatsDTO:
+        values = cache.get_many([self._stats_key(outcome) for outcome in self.OUTCOMES])
+        return ExtractionStatsDTO(
+            hits=values.get(self._stats_key("hit"), 0),
+            misses=values.get(self._stats_key("miss"), 0),
+            cold=values.get(self._stats_key("cold"), 0),
+            json_ld=values.get(self._stats_key(PROFILE_JSON_LD), 0),
+        )
+
+    def reset_stats(self):
+        cache.delete_many([self._stats_key(outcome) for outcome in self.OUTCOMES])
+
+    @staticmethod
+    def domain(url: str) -> str:
+        domain = (urlparse(url).hostname or "").lower()
+        return domain.removeprefix("www.")
+
+    def _key(self, domain: str) -> str:
+        return f"{self.KEY_PREFIX}:{domain}"
+
+    def _stats_key(self, outcome: str) -> str:
+        return f"{self.KEY_PREFIX}:stats:{outcome}"
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from api.v1.recipe.constants import (
+    HTTP_CACHEABLE_STATUSES,
+    HTTP_HEURISTIC_FRESHNESS_FRACTION,
+    HTTP_HEURISTIC_FRESHNESS_MAX,
+)
+from api.v1.recipe.dto.page_dto import CachedResponseDTO
+
+logger = logging.getLogger(__name__)
+
+# тело хранится распакованным, поэтому заголовки о передаче тела не сохраняются
+SKIPPED_HEADERS = frozenset({
+    "connection", "keep-alive", "transfer-encoding", "content-encoding", "content-length",
+    "set-cookie",
+})
+
+
+class HttpCache:
+    """
+    Дисковый кеш HTTP-ответов: <каталог>/<2 символа ключа>/<ключ>.
+    Файл — строка JSON с метаданными и сжатое zlib тело. Запись атомарная
+    (временный файл + os.replace), поэтому каталог можно делить между процессами
+    и контейнерами — вебом и воркерами Celery.
+    Когда размер каталога превышает max_bytes, удаляются давно не читанные записи;
+    каталог проверяется при первой записи процесса и после каждой десятой части max_bytes.
+    """
+
+    _written: int | None = None
+    _lock = threading.Lock()
+
+    def __init__(self, directory, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(url: str) -> str:
+        return hashlib.sha256(url.encode()).hexdigest()
+
+    def get(self, key: str) -> CachedResponseDTO | None:
+        path = self._path(key)
+        try:
+            head, _, body = path.read_bytes().partition(b"\n")
+            entry = CachedResponseDTO(**json.loads(head), body=zlib.decompress(body))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, TypeError, zlib.error) as e:
+            logger.warning("Broken HTTP cache entry %s: %s", path, e)
+            self.delete(key)
+            return None
+
+        try:
+            # время изменения — время последнего чтения: по нему вытесняются записи
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def put(self, key: str, entry: CachedResponseDTO):
+        meta = {
+            "url": entry.url,
+            "status": entry.status,
+            "reason": entry.reason,
+            "stored_at": entry.stored_at,
+            "headers": entry.headers,
+            "vary": entry.vary,
+        }
+        data = json.dumps(meta, ensure_ascii=False).encode() + b"\n" + zlib.compress(entry.body)
+        path = self._path(key)
+
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+                f.write(data)
+            os.replace(f.name, path)
+        except OSError as e:
+            logger.warning("Cannot write HTTP cache entry %s: %s", path, e)
+            return
+
+        with HttpCache._lock:
+            written = HttpCache._written
+            HttpCache._written = (written or 0) + len(data)
+            sweep = written is None or HttpCache._written > self.max_bytes // 10
+            if sweep:
+                HttpCache._written = 0
+        if sweep:
+            self.evict()
+
+    def delete(self, key: str):
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def evict(self):
+        """
+        Удаляет давно не читанные записи, пока каталог не станет меньше 90% max_bytes
+        """
+        files = []
+        try:
+            for folder in os.scandir(self.directory):
+                if folder.is_dir():
+                    for file in os.scandir(folder.path):
+                        stat = file.stat()
+                        files.append((stat.st_mtime, stat.st_size, file.path))
+        except OSError as e:
+            logger.warning("Cannot scan HTTP cache %s: %s", self.directory, e)
+            return
+
+        total = sum(size for _, size, _ in files)
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(files):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            total -= size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+
+class CachingAdapter(HTTPAdapter):
+    """
+    Транспорт requests с HTTP-кешем одного клиента (RFC 9111) для GET-запросов
+    без stream=True: потоковое тело читает вызывающий, и кеш его не трогает.
+    Свежий ответ (Cache-Control: max-age, Expires или эвристика по Last-Modified)
+    отдаётся без запроса. Устаревший перепроверяется по ETag / Last-Modified:
+    на 304 тело берётся из кеша, а метаданные записи обновляются.
+    Ответ из кеша помечен атрибутом from_cache.
+    """
+
+    def __init__(self, cache: HttpCache, **kwargs):
+        super().__init__(**kwargs)
+        self.cache = cache
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        directives = cache_directives(request.headers.get("Cache-Control"))
+        if request.method != "GET" or kwargs.get("stream") or "no-store" in directives:
+            return super().send(request, **kwargs)
+
+        key = HttpCache.key(request.url)
+        entry = self.cache.get(key)
+        if entry and any(
+            request.headers.get(name) != value for name, value in entry.vary.items()
+        ):
+            entry = None
+
+        if entry and "no-cache" not in directives and is_fresh(entry):
+            return self._cached_response(request, entry)
+
+        if entry:
+            headers = CaseInsensitiveDict(entry.headers)
+            if headers.get("ETag"):
+                request.headers["If-None-Match"] = headers["ETag"]
+            if headers.get("Last-Modified"):
+                request.headers["If-Modified-Since"] = headers["Last-Modified"]
+
+        response = super().send(request, **kwargs)
+
+        if entry and response.status_code == 304:
+            headers = CaseInsensitiveDict(entry.headers)
+            headers.update(_stored_headers(response.headers))
+            entry.headers = dict(headers)
+            entry.stored_at = time.time()
+            self.cache.put(key, entry)
+            response.close()
+            return self._cached_response(request, entry)
+
+        if is_storable(response):
+            self.cache.put(key, CachedResponseDTO(
+                url=request.url,
+                status=response.status_code,
+                reason=response.reason or "",
+                body=response.content,
+                stored_at=time.time(),
+                headers=_stored_headers(response.headers),
+                vary={
+                    name: request.headers.get(name)
+                    for name in _vary(response.headers)
+                },
+            ))
+        response.from_cache = False
+        return response
+
+    def _cached_response(self, request: PreparedRequest, entry: CachedResponseDTO) -> Response:
+        response = Response()
+        response.status_code = entry.status
+        response.reason = entry.reason
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.headers["Content-Length"] = str(len(entry.body))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response._content = entry.body
+        response._content_consumed = True
+        response.from_cache = True
+        return response
+
+
+def cache_directives(value: str | None) -> dict[str, str | None]:
+    """
+    Директивы Cache-Control: {имя: значение или None}
+    """
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def freshness_lifetime(entry: CachedResponseDTO) -> float:
+    """
+    Срок свежести ответа, сек: max-age, иначе Expires - Date,
+    иначе доля возраста Last-Modified
+    """
+    headers = CaseInsensitiveDict(entry.headers)
+    directives = cache_directives(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return 0
+
+    if "max-age" in directives:
+        try:
+            return max(int(directives["max-age"] or ""), 0)
+        except ValueError:
+            return 0
+
+    date = _http_date(headers.get("Date")) or entry.stored_at
+    if "Expires" in headers:
+        expires = _http_date(headers["Expires"])
+        return max(expires - date, 0) if expires else 0
+
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified:
+        heuristic = (date - last_modified) * HTTP_HEURISTIC_FRESHNESS_FRACTION
+        return min(max(heuristic, 0), HTTP_HEURISTIC_FRESHNESS_MAX)
+    return 0
+
+
+def is_fresh(entry: CachedResponseDTO) -> bool:
+    headers = CaseInsensitiveDict(entry.headers)
+    try:
+        age = max(int(headers.get("Age", 0)), 0)
+    except ValueError:
+        age = 0
+    return age + time.time() - entry.stored_at < freshness_lifetime(entry)
+
+
+def is_storable(response: Response) -> bool:
+    """
+    Ответ можно сохранить: кешируемый статус, нет no-store и Vary: *,
+    есть срок свежести или валидатор для перепроверки
+    """
+    if response.status_code not in HTTP_CACHEABLE_STATUSES:
+        return False
+    if "no-store" in cache_directives(response.headers.get("Cache-Control")):
+        return False
+    if "*" in _vary(response.headers):
+        return False
+    return bool(
+        response.headers.get("ETag")
+        or response.headers.get("Last-Modified")
+        or freshness_lifetime(CachedResponseDTO(
+            url="",
+            status=response.status_code,
+            reason="",
+            body=b"",
+            stored_at=time.time(),
+            headers=dict(response.headers),
+        ))
+    )
+
+
+def _stored_headers(headers) -> dict[str, str]:
+    return {name: value for name, value in headers.items() if name.lower() not in SKIPPED_HEADERS}
+
+
+def _vary(headers) -> list[str]:
+    return [name.strip() for name in headers.get("Vary", "").split(",") if name.strip()]
+
+
+def _http_date(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
@@ -0,0 +1,371 @@
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import MaxRetryError
+from urllib3.util.retry import Retry
+
+from api.v1.recipe.constants import HTTP_RETRY_STATUSES
+from api.v1.recipe.dto.http_dto import HttpTimingDTO
+from api.v1.recipe.services.http_cache import CachingAdapter, HttpCache
+
+logger = logging.getLogger(__name__)
+
+
+class HttpMetrics:
+    """
+    Время исходящих запросов по хостам: connect — TCP-соединение, tls — TLS-рукопожатие,
+    ttfb — от отправки запроса до первого байта ответа.
+    Переиспользованное keep-alive соединение даёт только ttfb.
+    Замеры копятся в памяти процесса и не реже раза в settings.HTTP_METRICS_FLUSH_INTERVAL сек
+    прибавляются к счётчикам в общем кеше, так что stats() — сумма по вебу и всем воркерам
+    """
+
+    KEY_PREFIX = "http-metrics"
+    NAMES = ("connect", "tls", "ttfb")
+
+    _pending: dict[tuple[str, str], HttpTimingDTO] = {}
+    _flushed_at = time.monotonic()
+    _lock = threading.Lock()
+
+    @classmethod
+    def observe(cls, host: str, name: str, seconds: float):
+        with cls._lock:
+            timing = cls._pending.setdefault((host, name), HttpTimingDTO())
+            timing.count += 1
+            timing.total += seconds
+            due = time.monotonic() - cls._flushed_at >= settings.HTTP_METRICS_FLUSH_INTERVAL
+        logger.debug("%s %s %.1f ms", host, name, seconds * 1000)
+        if due:
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        with cls._lock:
+            pending, cls._pending = cls._pending, {}
+            cls._flushed_at = time.monotonic()
+        if not pending:
+            return
+
+        for (host, name), timing in pending.items():
+            # incr работает только с целыми, поэтому время хранится в микросекундах
+            cls._add(cls._key(host, name, "count"), timing.count)
+            cls._add(cls._key(host, name, "us"), round(timing.total * 1_000_000))
+
+        hosts = cache.get(cls._hosts_key(), set())
+        new_hosts = {host for host, _ in pending} - hosts
+        if new_hosts:
+            cache.set(cls._hosts_key(), hosts | new_hosts, timeout=None)
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, HttpTimingDTO]]:
+        hosts = sorted(cache.get(cls._hosts_key(), set()))
+        keys = [
+            cls._key(host, name, field)
+            for host in hosts for name in cls.NAMES for field in ("count", "us")
+        ]
+        values = cache.get_many(keys)
+
+        result = {}
+        for host in hosts:
+            for name in cls.NAMES:
+                count = values.get(cls._key(host, name, "count"), 0)
+                if count:
+                    result.setdefault(host, {})[name] = HttpTimingDTO(
+                        count=count,
+                        total=values.get(cls._key(host, name, "us"), 0) / 1_000_000,
+                    )
+        return result
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._pending = {}
+            cls._flushed_at = time.monotonic()
+        hosts = cache.get(cls._hosts_key(), set())
+        cache.delete_many([
+            cls._key(host, name, field)
+            for host in hosts for name in cls.NAMES for field in ("count", "us")
+        ] + [cls._hosts_key()])
+
+    @classmethod
+    def _after_fork(cls):
+        """
+        Дочерний процесс (prefork Celery) не должен второй раз сбросить замеры родителя
+        """
+        cls._pending = {}
+        cls._flushed_at = time.monotonic()
+        cls._lock = threading.Lock()
+
+    @staticmethod
+    def _add(key: str, value: int):
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, value)
+        except ValueError:
+            cache.set(key, value, timeout=None)
+
+    @classmethod
+    def _key(cls, host: str, name: str, field: str) -> str:
+        return f"{cls.KEY_PREFIX}:{host}:{name}:{field}"
+
+    @classmethod
+    def _hosts_key(cls) -> str:
+        return f"{cls.KEY_PREFIX}:hosts"
+
+
+os.register_at_fork(after_in_child=HttpMetrics._after_fork)
+
+
+class TimedConnectionMixin:
+    """
+    Замеры HttpMetrics для соединения urllib3
+    """
+
+    _connect_time = 0.0
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        self._connect_time = time.perf_counter() - started
+        HttpMetrics.observe(self.host, "connect", self._connect_time)
+        return sock
+
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        if isinstance(self, HTTPSConnection):
+            elapsed = time.perf_counter() - started
+            HttpMetrics.observe(self.host, "tls", max(elapsed - self._connect_time, 0))
+
+    def getresponse(self, *args, **kwargs):
+        started = time.perf_counter()
+        response = super().getresponse(*args, **kwargs)
+        HttpMetrics.observe(self.host, "ttfb", time.perf_counter() - started)
+        return response
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PoliteRetry(Retry):
+    """
+    Повтор с паузой уже перед первой попыткой (у Retry она нулевая);
+    Retry-After сервера ограничен settings.HTTP_RETRY_AFTER_MAX
+    """
+
+    def get_backoff_time(self) -> float:
+        if not self.history:
+            return 0
+        return min(self.backoff_factor * 2 ** (len(self.history) - 1), self.backoff_max)
+
+    def get_retry_after(self, response) -> float | None:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, settings.HTTP_RETRY_AFTER_MAX)
+
+
+class PoliteAdapter(HTTPAdapter):
+    """
+    Транспорт с ограничениями HttpClient по хосту: запрос уходит в сеть, только когда
+    у хоста есть место в окне и свободный слот. Ответы из HTTP-кеша
+    (CachingAdapter перед этим транспортом) ограничения не расходуют,
+    а каждый шаг редиректа ограничивается по своему хосту.
+    Повторы на 429/503 (retry) делаются здесь, а не в urllib3: каждая попытка
+    заново ждёт окна и слота, а пауза перед повтором идёт без занятого слота
+    """
+
+    def __init__(self, *args, retry: Retry | None = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry = retry or Retry(0, read=False)
+
+    def send(self, request: PreparedRequest, **kwargs) -> Response:
+        retry = self.retry
+        while True:
+            with HttpClient._limit(request.url):
+                response = super().send(request, **kwargs)
+
+            has_retry_after = "Retry-After" in response.headers
+            if not retry.is_retry(request.method, response.status_code, has_retry_after):
+                return response
+            try:
+                retry = retry.increment(request.method, request.url, response=response.raw)
+            except MaxRetryError:
+                return response
+
+            delay = retry.get_retry_after(response) if retry.respect_retry_after_header else None
+            if delay is None:
+                delay = retry.get_backoff_time()
+            logger.info(
+                "%s %s, retry %d in %.1f s",
+                request.url, response.status_code, len(retry.history), delay,
+            )
+            response.close()
+            time.sleep(delay)
+
+
+class PoliteCachingAdapter(CachingAdapter, PoliteAdapter):
+    pass
+
+
+class HttpClient:
+    """
+    Общий клиент исходящих HTTP-запросов процесса: страницы рецептов, картинки, редиректы.
+    Одна сессия с пулами keep-alive соединений по хостам, дисковым HTTP-кешем
+    (settings.HTTP_CACHE_ENABLED) и повторами на 429/503.
+    Запросы, которые уходят в сеть, ограничены по хосту: не больше
+    settings.HTTP_HOST_MAX_CONCURRENCY одновременных в процессе и settings.HTTP_HOST_RATE_LIMIT
+    за HTTP_HOST_RATE_PERIOD во всех процессах — счётчик окна лежит в общем кеше.
+    """
+
+    _session: requests.Session | None = None
+    _pid: int | None = None
+    _semaphores: dict[str, threading.BoundedSemaphore] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def session(cls) -> requests.Session:
+        cls._check_fork()
+        if cls._session is None:
+            with cls._lock:
+                if cls._session is None:
+                    cls._session = cls._build_session()
+        return cls._session
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> requests.Response:
+        return cls.session().get(url, **kwargs)
+
+    @classmethod
+    def head(cls, url: str, **kwargs) -> requests.Response:
+        return cls.session().head(url, **kwargs)
+
+    @classmethod
+    @contextmanager
+    def stream(cls, url: str, **kwargs) -> Iterator[requests.Response]:
+        """
+        GET с потоковым телом; соединение возвращается в пул при выходе из блока
+        """
+        with cls.session().get(url, stream=True, **kwargs) as response:
+            yield response
+
+    @classmethod
+    def reset(cls):
+        """
+        Сбрасывает сессию (после fork или смены настроек)
+        """
+        with cls._lock:
+            if cls._session is not None and cls._pid == os.getpid():
+                cls._session.close()
+            cls._session = None
+            cls._semaphores = {}
+            cls._pid = os.getpid()
+
+    @classmethod
+    @contextmanager
+    def _limit(cls, url: str):
+        host = (urlparse(url).hostname or "").lower()
+        cls._check_fork()
+        cls._wait_turn(host)
+
+        with cls._lock:
+            semaphore = cls._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(settings.HTTP_HOST_MAX_CONCURRENCY)
+                cls._semaphores[host] = semaphore
+
+        with semaphore:
+            yield
+
+    @staticmethod
+    def _wait_turn(host: str):
+        """
+        Ждёт окна, в котором у хоста остались запросы
+        """
+        limit = settings.HTTP_HOST_RATE_LIMIT
+        if limit <= 0:
+            return
+
+        period = settings.HTTP_HOST_RATE_PERIOD
+        while True:
+            now = time.time()
+            window = int(now // period)
+            key = f"http-client:rate:{host}:{window}"
+            cache.add(key, 0, timeout=int(period) + 1)
+            try:
+                count = cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=int(period) + 1)
+                count = 1
+            if count <= limit:
+                return
+            time.sleep((window + 1) * period - now)
+
+    @classmethod
+    def _check_fork(cls):
+        """
+        Соединения родительского процесса нельзя использовать в дочернем (prefork Celery)
+        """
+        if cls._pid != os.getpid():
+            cls.reset()
+
+    @staticmethod
+    def _build_session() -> requests.Session:
+        adapter_kwargs = {
+            "pool_connections": settings.HTTP_POOL_HOSTS,
+            "pool_maxsize": settings.HTTP_HOST_MAX_CONCURRENCY,
+            "retry": PoliteRetry(
+                total=None,
+                connect=0,
+                read=0,
+                other=0,
+                status=settings.HTTP_RETRIES,
+                status_forcelist=HTTP_RETRY_STATUSES,
+                allowed_methods=frozenset({"GET", "HEAD"}),
+                backoff_factor=settings.HTTP_RETRY_BACKOFF,
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            ),
+        }
+        if settings.HTTP_CACHE_ENABLED:
+            adapter = PoliteCachingAdapter(
+                HttpCache(settings.HTTP_CACHE_DIR, settings.HTTP_CACHE_MAX_BYTES),
+                **adapter_kwargs,
+            )
+        else:
+            adapter = PoliteAdapter(**adapter_kwargs)
+        adapter.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update({"User-Agent": settings.HTTP_USER_AGENT})
+        return session
@@ -1,9 +1,24 @@
+import hashlib
+import logging
+import mimetypes
 import os
-import uuid
+import posixpath
+import re
+from io import BytesIO
 from urllib.parse import urlparse
 
 import requests
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.base import ContentFile
+from django.db.models import FileField
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from api.v1.recipe.services.http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+CONTENT_HASH_RE = re.compile(r"[0-9a-f]{64}")
 
 
 class ImageService:
@@ -11,29 +26,150 @@ class ImageService:
     Сервис для скачивания и подготовки изображений
     """
 
+    CHUNK_SIZE = 64 * 1024
+
     @staticmethod
-    def download_image(url: str):
+    def download_image(url: str, raise_errors: bool = False):
         """
-        Скачивает изображение по URL, возвращает bytes и имя файла
+        Скачивает изображение по URL потоком, возвращает bytes и имя файла.
+        Тип и размер проверяются по заголовкам до чтения тела; тело читается,
+        пока не превышен settings.IMAGE_MAX_BYTES.
+        Имя файла — sha256 содержимого: одинаковые картинки получают одно имя.
+        С raise_errors=True ошибки запроса (requests.RequestException) пробрасываются,
+        чтобы вызывающий мог повторить попытку.
         """
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}
-            resp = requests.get(url, headers=headers, timeout=10)
-            resp.raise_for_status()
+            with HttpClient.stream(url, timeout=10) as resp:
+                resp.raise_for_status()
+
+                content_type = resp.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if not content_type.startswith("image/"):
+                    logger.warning("Not an image (%s): %s", content_type or "no type", url)
+                    return None, None
+
+                length = resp.headers.get("Content-Length")
+                if length and length.isdigit() and int(length) > settings.IMAGE_MAX_BYTES:
+                    logger.warning("Image too large (%s bytes): %s", length, url)
+                    return None, None
+
+                chunks = []
+                size = 0
+                for chunk in resp.iter_content(ImageService.CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > settings.IMAGE_MAX_BYTES:
+                        logger.warning("Image too large (> %s bytes): %s", size, url)
+                        return None, None
+                    chunks.append(chunk)
+
+            content = b"".join(chunks)
+            if not content:
+                return None, None
 
-            ext = os.path.splitext(urlparse(url).path)[1] or ".jpg"
-            filename = f"{uuid.uuid4().hex}{ext}"
+            ext = (
+                mimetypes.guess_extension(content_type)
+                or os.path.splitext(urlparse(url).path)[1]
+                or ".jpg"
+            )
+            filename = f"{hashlib.sha256(content).hexdigest()}{ext}"
+
+            return content, filename
 
-            return resp.content, filename
-        
         except requests.RequestException as e:
-            print(f"Error downloading image: {e}")
-        
+            if raise_errors:
+                raise
+            logger.warning("Error downloading image %s: %s", url, e)
+
         except Exception as e:
-            print(f"Unknown error downloading image: {e}")
-    
+            logger.exception("Unknown error downloading image %s: %s", url, e)
+
         return None, None
-    
+
+    @staticmethod
+    def store_image(url: str, field: FileField, raise_errors: bool = False) -> str | None:
+        """
+        Скачивает изображение и кладёт его в хранилище поля по хешу содержимого:
+        <upload_to><2 символа хеша>/<хеш>.<ext>. Файл, который уже есть в хранилище,
+        повторно не загружается; недавно обработанный URL не скачивается снова.
+        Возвращает имя файла в хранилище. raise_errors передаётся в download_image.
+        """
+        url_key = f"image:url:{hashlib.sha256(url.encode()).hexdigest()}"
+        name = cache.get(url_key)
+        if name:
+            return name
+
+        image_bytes, filename = ImageService.download_image(url, raise_errors)
+        if not image_bytes:
+            return None
+
+        name = f"{field.upload_to}{filename[:2]}/{filename}"
+        if not field.storage.exists(name):
+            name = field.storage.save(name, ContentFile(image_bytes))
+
+        cache.set(url_key, name, settings.IMAGE_URL_CACHE_TTL)
+        return name
+
+    @staticmethod
+    def make_variants(image_bytes: bytes, widths) -> dict[int, bytes]:
+        """
+        Уменьшенные копии изображения в WebP: {ширина: bytes}.
+        Изображение не увеличивается — копия уже оригинала остаётся его размера.
+        """
+        try:
+            with Image.open(BytesIO(image_bytes)) as original:
+                image = ImageOps.exif_transpose(original)
+                has_alpha = "A" in image.getbands() or "transparency" in image.info
+                image = image.convert("RGBA" if has_alpha else "RGB")
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+            logger.warning("Cannot read image: %s", e)
+            return {}
+
+        variants = {}
+        for width in sorted(widths, reverse=True):
+            if image.width > width:
+                size = (width, max(round(image.height * width / image.width), 1))
+                # копии строятся от большей к меньшей, каждая — из предыдущей
+                image = image.resize(size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buffer = BytesIO()
+            image.save(buffer, "WEBP", quality=settings.IMAGE_WEBP_QUALITY, method=4)
+            variants[width] = buffer.getvalue()
+        return variants
+
+    @staticmethod
+    def store_variants(name: str, field: FileField) -> dict[str, str]:
+        """
+        Кладёт уменьшенные копии рядом с оригиналом: <хеш содержимого>_<ширина>.webp.
+        Скачанные оригиналы уже названы по хешу, и для них готовые копии находятся
+        без чтения оригинала. Загрузки из формы сохраняют имя файла пользователя,
+        а хранилище перезаписывает файл с тем же именем — поэтому хеш считается
+        по содержимому, и новая картинка под старым именем получает новые копии.
+        Возвращает {ширина: имя файла в хранилище}.
+        """
+        directory, filename = posixpath.split(name)
+        digest = posixpath.splitext(filename)[0]
+        original = None
+        if not CONTENT_HASH_RE.fullmatch(digest):
+            with field.storage.open(name, "rb") as f:
+                original = f.read()
+            digest = hashlib.sha256(original).hexdigest()
+
+        names = {
+            width: posixpath.join(directory, f"{digest}_{width}.webp")
+            for width in settings.IMAGE_VARIANT_WIDTHS
+        }
+        missing = [width for width, variant in names.items() if not field.storage.exists(variant)]
+
+        if missing:
+            if original is None:
+                with field.storage.open(name, "rb") as f:
+                    original = f.read()
+            variants = ImageService.make_variants(original, missing)
+            if not variants:
+                return {}
+            for width, content in variants.items():
+                names[width] = field.storage.save(names[width], ContentFile(content))
+
+        return {str(width): variant for width, variant in names.items()}
+
     @staticmethod
     def save_image_to_model(model_instance, field_name, image_bytes, filename):
         """
@@ -42,7 +178,7 @@ class ImageService:
 
         if image_bytes:
             getattr(model_instance, field_name).save(
-                filename, 
-                ContentFile(image_bytes), 
+                filename,
+                ContentFile(image_bytes),
                 save=True
         )
@@ -1,64 +1,279 @@
+import asyncio
+import hashlib
 import json
 import os
+from collections.abc import Awaitable, Callable
+from contextlib import closing
 
-import ollama
+from asgiref.sync import sync_to_async
 from json_repair import repair_json
 
-from api.v1.recipe.constants import LLM_SCHEMA
+from api.v1.recipe.constants import LLM_PROMPT_VERSION
+from api.v1.recipe.dto.llm_dto import ExtractionProgressDTO
 from api.v1.recipe.dto.recipe_dto import IngredientDTO, RecipeDTO, StepDTO
+from api.v1.recipe.interfaces.recipe_parser import ILLMCacheRepository
+from api.v1.recipe.services.llm_client import LLMClientPool
+from api.v1.recipe.services.prompt_builder import PromptBuilder
+from api.v1.recipe.utils.json_stream import JsonObjectScanner
 
 
 class LLMService:
     """
-    сервис для работы с LLM
+    сервис для работы с LLM.
+    Запросы идут через общий LLMClientPool с ограничением параллельности.
+    В режиме stream ответ разбирается по мере генерации: генерация обрывается,
+    как только закрылся JSON-объект, а прогресс передаётся в on_progress.
+    Текст сжимается PromptBuilder; если он не влезает в LLM_MAX_CTX, рецепт
+    извлекается из каждой части отдельно и результаты сводятся (map-reduce).
+    Части извлекаются одновременно через асинхронный клиент, в пределах слотов
+    LLM_MAX_PARALLEL сервера Ollama; прогресс в режиме stream — сумма по частям.
     """
 
-    def __init__(self):
-        self.client = ollama.Client(host=os.getenv("HOST"))
+    OPTIONS = {
+        "temperature": 0.1,
+        "num_predict": 700,
+        "repeat_penalty": 1.1,
+    }
+
+    def __init__(self, cache: ILLMCacheRepository | None = None, stream: bool = False):
         self.model = os.getenv("MODEL")
+        self.cache = cache
+        self.stream = stream
+        self.prompts = PromptBuilder(num_predict=self.OPTIONS["num_predict"])
     
-    def extract_recipe(self, raw_text: str) -> RecipeDTO:
-        prompt = f"""
-                    You are given a raw transcript of a cooking video.
-                    The text may contain speech recognition errors.
-
-                    Your tasks:
-                    1. Fix obvious transcription errors.
-                    2. Extract structured recipe data.
-                    3. Detect meal_type from context (breakfast, lunch, dinner, soup, 
-                    dessert, drink, snack, baby_food, side_dish).
-
-                    Rules:
-                    - Do NOT invent ingredients.
-                    - If meal type is unclear — choose the most appropriate based on context.
-                    - If still unclear — use null.
-                    - Return ONLY valid JSON.
-                    - No explanations.
-                    - No markdown.
-                    - No text outside JSON.
-
-                    Schema:
-                    {LLM_SCHEMA}
-
-                    Text:
-                    {raw_text}
-        """
-
-        response = self.client.chat(
-            model=self.model,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }],
-            options={
-                "temperature": 0.1,
-                "num_ctx": 2048,
-                "num_predict": 700,    
-                "repeat_penalty": 1.1,
-            }
+    def extract_recipe(
+            self,
+            raw_text: str,
+            on_progress: Callable[[ExtractionProgressDTO], None] | None = None,
+    ) -> RecipeDTO:
+        """
+        Извлекает рецепт из текста. Одинаковый текст (с точностью до регистра
+        и пробелов) для той же модели и версии промпта берётся из кеша.
+        """
+        if not self.cache:
+            return self._extract_recipe(raw_text, on_progress)
+
+        key = self.cache_key(raw_text)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        dto = self._extract_recipe(raw_text, on_progress)
+        self.cache.save(key, self.model or "", LLM_PROMPT_VERSION, dto)
+        return dto
+
+    async def extract_recipe_async(self, raw_text: str) -> RecipeDTO:
+        """
+        Асинхронный вариант extract_recipe: несколько извлечений могут
+        выполняться одновременно в пределах LLM_MAX_PARALLEL
+        """
+        key = self.cache_key(raw_text) if self.cache else None
+        if key:
+            cached = await sync_to_async(self.cache.get)(key)
+            if cached is not None:
+                return cached
+
+        chunks = self.prompts.split(self.prompts.compress(raw_text))
+        dto = await self._extract_chunks_async(chunks)
+
+        if key:
+            await sync_to_async(self.cache.save)(key, self.model or "", LLM_PROMPT_VERSION, dto)
+        return dto
+
+    def extract_recipes(self, raw_texts: list[str]) -> list[RecipeDTO]:
+        """
+        Извлекает рецепты из нескольких текстов одновременно, порядок сохраняется
+        """
+
+        async def run():
+            return await asyncio.gather(*(self.extract_recipe_async(t) for t in raw_texts))
+
+        return asyncio.run(run())
+
+    def cache_key(self, raw_text: str) -> str:
+        normalized = " ".join(raw_text.lower().split())
+        payload = "\n".join([self.model or "", LLM_PROMPT_VERSION, normalized])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _extract_recipe(
+            self,
+            raw_text: str,
+            on_progress: Callable[[ExtractionProgressDTO], None] | None = None,
+    ) -> RecipeDTO:
+        chunks = self.prompts.split(self.prompts.compress(raw_text))
+        if len(chunks) == 1:
+            return self._extract_chunk(chunks[0], on_progress)
+
+        return asyncio.run(self._extract_chunks_async(chunks, on_progress))
+
+    def _extract_chunk(
+            self,
+            text: str,
+            on_progress: Callable[[ExtractionProgressDTO], None] | None = None,
+    ) -> RecipeDTO:
+        if self.stream:
+            return self._parse_content(self._stream_content(text, on_progress))
+
+        return self._parse_response(LLMClientPool.chat(**self._request(text)))
+
+    async def _extract_chunks_async(
+            self,
+            chunks: list[str],
+            on_progress: Callable[[ExtractionProgressDTO], None] | None = None,
+    ) -> RecipeDTO:
+        """
+        Извлекает рецепт из частей текста одновременно и сводит результаты
+        """
+        report = sync_to_async(on_progress) if on_progress else None
+        progress = [ExtractionProgressDTO()] * len(chunks)
+
+        async def extract(index: int, chunk: str) -> RecipeDTO:
+            if not self.stream:
+                return self._parse_response(await LLMClientPool.achat(**self._request(chunk)))
+
+            async def forward(current: ExtractionProgressDTO):
+                progress[index] = current
+                if report:
+                    await report(self._total_progress(progress))
+
+            return self._parse_content(await self._astream_content(chunk, forward))
+
+        dtos = await asyncio.gather(*(extract(i, chunk) for i, chunk in enumerate(chunks)))
+        return self._merge(list(dtos))
+
+    @staticmethod
+    def _total_progress(progress: list[ExtractionProgressDTO]) -> ExtractionProgressDTO:
+        """
+        Прогресс по всем частям текста: название — из первой части, где оно нашлось
+        """
+        return ExtractionProgressDTO(
+            title=next((p.title for p in progress if p.title), None),
+            ingredients=sum(p.ingredients for p in progress),
+            steps=sum(p.steps for p in progress),
         )
 
-        content = self._extract_json(response["message"]["content"])
+    def _stream_content(
+            self,
+            text: str,
+            on_progress: Callable[[ExtractionProgressDTO], None] | None = None,
+    ) -> str:
+        """
+        Читает ответ по кусочкам до закрытия JSON-объекта верхнего уровня
+        """
+        scanner = JsonObjectScanner()
+        parts = []
+        progress = ExtractionProgressDTO()
+
+        stream = LLMClientPool.chat_stream(**self._request(text))
+        with closing(stream):
+            for chunk in stream:
+                piece = chunk["message"]["content"]
+                parts.append(piece)
+                done = scanner.feed(piece)
+
+                current = self._scanned_progress(scanner)
+                if on_progress and current != progress:
+                    on_progress(current)
+                progress = current
+
+                if done:
+                    return scanner.text
+
+        # генерация упёрлась в num_predict — чиним то, что успело прийти
+        return "".join(parts)
+
+    async def _astream_content(
+            self,
+            text: str,
+            on_progress: Callable[[ExtractionProgressDTO], Awaitable[None]],
+    ) -> str:
+        """
+        Асинхронный вариант _stream_content
+        """
+        scanner = JsonObjectScanner()
+        parts = []
+        progress = ExtractionProgressDTO()
+
+        stream = LLMClientPool.achat_stream(**self._request(text))
+        try:
+            async for chunk in stream:
+                piece = chunk["message"]["content"]
+                parts.append(piece)
+                done = scanner.feed(piece)
+
+                current = self._scanned_progress(scanner)
+                if current != progress:
+                    await on_progress(current)
+                progress = current
+
+                if done:
+                    return scanner.text
+        finally:
+            await stream.aclose()
+
+        return "".join(parts)
+
+    @staticmethod
+    def _scanned_progress(scanner: JsonObjectScanner) -> ExtractionProgressDTO:
+        return ExtractionProgressDTO(
+            title=scanner.title,
+            ingredients=scanner.counts.get("ingredients", 0),
+            steps=scanner.counts.get("steps", 0),
+        )
+
+    def _messages(self, text: str) -> list[dict]:
+        return [{
+            "role": "user",
+            "content": self.prompts.prompt(text),
+        }]
+
+    def _request(self, text: str) -> dict:
+        """
+        Параметры запроса: num_ctx подбирается под длину конкретного промпта
+        """
+        messages = self._messages(text)
+        return {
+            "model": self.model,
+            "messages": messages,
+            "options": {
+                **self.OPTIONS,
+                "num_ctx": self.prompts.num_ctx(messages[0]["content"]),
+            },
+        }
+
+    @staticmethod
+    def _merge(dtos: list[RecipeDTO]) -> RecipeDTO:
+        """
+        Сводит рецепты, извлечённые из частей длинного текста, в один
+        """
+        if len(dtos) == 1:
+            return dtos[0]
+
+        def unique(values):
+            seen = set()
+            for value, key in values:
+                key = (key or "").strip().lower()
+                if key and key not in seen:
+                    seen.add(key)
+                    yield value
+
+        tips = list(unique((t, t) for dto in dtos for t in (dto.tips or "").splitlines()))
+
+        return RecipeDTO(
+            title=next((dto.title for dto in dtos if dto.title), None),
+            description=next((dto.description for dto in dtos if dto.description), None),
+            meal_type=next((dto.meal_type for dto in dtos if dto.meal_type), None),
+            ingredients=list(unique((i, i.raw) for dto in dtos for i in dto.ingredients)),
+            steps=list(unique((s, s.step) for dto in dtos for s in dto.steps)),
+            tips="\n".join(tips) or None,
+            thumbnail=next((dto.thumbnail for dto in dtos if dto.thumbnail), None),
+        )
+
+    def _parse_response(self, response: dict) -> RecipeDTO:
+        return self._parse_content(response["message"]["content"])
+
+    def _parse_content(self, content: str) -> RecipeDTO:
+        content = self._extract_json(content)
         data = json.loads(repair_json(content))
 
         ingredients = [IngredientDTO(raw=i.get("raw")) for i in data.get("ingredients", [])]
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+import ollama
+from django.conf import settings
+from django.core.cache import cache
+
+from api.v1.recipe.constants import LLM_SLOT_POLL_INTERVAL
+
+
+class LLMClientPool:
+    """
+    Общие клиенты Ollama на уровне процесса.
+    HTTP-соединения переиспользуются между задачами, а число одновременных
+    запросов ограничено settings.LLM_MAX_PARALLEL (= OLLAMA_NUM_PARALLEL):
+    лишние запросы ждут здесь, а не в очереди Ollama.
+    OLLAMA_NUM_PARALLEL — предел сервера, поэтому запрос занимает слот в общем кеше
+    (llm-client:slot:<n>), один на все процессы; семафор процесса лишь не даёт
+    его потокам и корутинам опрашивать кеш все разом.
+    """
+
+    SLOT_KEY_PREFIX = "llm-client:slot"
+
+    _client: ollama.Client | None = None
+    _pid: int | None = None
+    _semaphore: threading.BoundedSemaphore | None = None
+    _async: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+    _lock = threading.Lock()
+
+    @classmethod
+    def client(cls) -> ollama.Client:
+        cls._check_fork()
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    cls._client = ollama.Client(**cls._client_kwargs())
+        return cls._client
+
+    @classmethod
+    def async_client(cls) -> ollama.AsyncClient:
+        return cls._async_state()[0]
+
+    @classmethod
+    def chat(cls, **kwargs) -> dict:
+        with cls._limit():
+            return cls.client().chat(**kwargs)
+
+    @classmethod
+    def chat_stream(cls, **kwargs) -> Iterator[dict]:
+        """
+        Потоковый ответ по кусочкам. Слот занят, пока генератор не исчерпан или не закрыт;
+        закрытие рвёт соединение, и Ollama прекращает генерацию.
+        """
+        with cls._limit():
+            stream = cls.client().chat(stream=True, **kwargs)
+            try:
+                yield from stream
+            finally:
+                stream.close()
+
+    @classmethod
+    async def achat(cls, **kwargs) -> dict:
+        async with cls._async_limit():
+            return await cls.async_client().chat(**kwargs)
+
+    @classmethod
+    async def achat_stream(cls, **kwargs) -> AsyncIterator[dict]:
+        """
+        Асинхронный вариант chat_stream
+        """
+        async with cls._async_limit():
+            stream = await cls.async_client().chat(stream=True, **kwargs)
+            try:
+                async for part in stream:
+                    yield part
+            finally:
+                await stream.aclose()
+
+    @classmethod
+    def reset(cls):
+        """
+        Сбрасывает клиентов (после fork или смены настроек)
+        """
+        with cls._lock:
+            cls._client = None
+            cls._semaphore = None
+            cls._async = weakref.WeakKeyDictionary()
+            cls._pid = os.getpid()
+
+    @classmethod
+    @contextmanager
+    def _limit(cls):
+        cls._check_fork()
+        if cls._semaphore is None:
+            with cls._lock:
+                if cls._semaphore is None:
+                    cls._semaphore = threading.BoundedSemaphore(settings.LLM_MAX_PARALLEL)
+
+        with cls._semaphore:
+            key = cls._acquire_slot()
+            try:
+                yield
+            finally:
+                cache.delete(key)
+
+    @classmethod
+    @asynccontextmanager
+    async def _async_limit(cls):
+        async with cls._async_state()[1]:
+            key = await cls._aacquire_slot()
+            try:
+                yield
+            finally:
+                await cache.adelete(key)
+
+    @classmethod
+    def _acquire_slot(cls) -> str:
+        """
+        Ждёт свободного слота сервера Ollama и занимает его
+        """
+        while True:
+            for key in cls._slot_keys():
+                if cache.add(key, os.getpid(), timeout=settings.LLM_SLOT_TTL):
+                    return key
+            time.sleep(LLM_SLOT_POLL_INTERVAL)
+
+    @classmethod
+    async def _aacquire_slot(cls) -> str:
+        while True:
+            for key in cls._slot_keys():
+                if await cache.aadd(key, os.getpid(), timeout=settings.LLM_SLOT_TTL):
+                    return key
+            await asyncio.sleep(LLM_SLOT_POLL_INTERVAL)
+
+    @classmethod
+    def _slot_keys(cls) -> list[str]:
+        return [f"{cls.SLOT_KEY_PREFIX}:{n}" for n in range(settings.LLM_MAX_PARALLEL)]
+
+    @classmethod
+    def _async_state(cls) -> tuple[ollama.AsyncClient, asyncio.Semaphore]:
+        """
+        Асинхронный клиент и семафор привязаны к event loop, поэтому свои для каждого
+        """
+        cls._check_fork()
+        loop = asyncio.get_running_loop()
+        state = cls._async.get(loop)
+        if state is None:
+            state = (
+                ollama.AsyncClient(**cls._client_kwargs()),
+                asyncio.Semaphore(settings.LLM_MAX_PARALLEL),
+            )
+            cls._async[loop] = state
+        return state
+
+    @classmethod
+    def _check_fork(cls):
+        """
+        Соединения родительского процесса нельзя использовать в дочернем (prefork Celery)
+        """
+        if cls._pid != os.getpid():
+            cls.reset()
+
+    @staticmethod
+    def _client_kwargs() -> dict:
+        parallel = settings.LLM_MAX_PARALLEL
+        return {
+            "host": settings.LLM_HOST,
+            "timeout": settings.LLM_TIMEOUT,
+            "limits": httpx.Limits(
+                max_connections=parallel,
+                max_keepalive_connections=parallel,
+            ),
+        }
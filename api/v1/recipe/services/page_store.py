@@ -0,0 +1,35 @@
+import hashlib
+
+from django.core.cache import cache
+
+from api.v1.recipe.constants import FETCHED_PAGE_TTL
+from api.v1.recipe.dto.page_dto import FetchedPageDTO
+
+
+class FetchedPageStore:
+    """
+    Хранилище скачанных страниц.
+    Валидация кладёт страницу, задача парсинга забирает её без повторного запроса.
+    """
+
+    KEY_PREFIX = "fetched_page"
+
+    def __init__(self, ttl: int = FETCHED_PAGE_TTL):
+        self.ttl = ttl
+
+    def get(self, url: str) -> FetchedPageDTO | None:
+        return cache.get(self._key(url))
+
+    def put(self, page: FetchedPageDTO):
+        """
+        Сохраняет страницу и под запрошенным, и под финальным URL (после редиректов)
+        """
+        keys = {self._key(page.url), self._key(page.final_url)}
+        cache.set_many({key: page for key in keys}, timeout=self.ttl)
+
+    def delete(self, url: str):
+        cache.delete(self._key(url))
+
+    def _key(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode()).hexdigest()
+        return f"{self.KEY_PREFIX}:{digest}"
@@ -0,0 +1,139 @@
+import threading
+from collections import Counter, OrderedDict
+from collections.abc import Iterable
+
+from django.conf import settings
+from django.core.cache import cache
+
+from api.v1.recipe.utils.trigram import similarity, trigrams
+from product.models import Product
+
+
+class ProductNameIndex:
+    """
+    Инвертированный индекс триграмм по названиям продуктов одного пользователя
+    """
+
+    def __init__(self, products: Iterable[tuple[str, str]], version: int):
+        self.version = version
+        self._grams: dict[str, frozenset[str]] = {}
+        self._postings: dict[str, set[str]] = {}
+        for product_id, name in products:
+            self.add(product_id, name)
+
+    def add(self, product_id, name: str):
+        grams = trigrams(name)
+        self._grams[product_id] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(product_id)
+
+    def best(self, name: str, threshold: float):
+        """
+        id самого похожего продукта со сходством не ниже threshold
+        """
+        grams = trigrams(name)
+        common = Counter()
+        for gram in grams:
+            common.update(self._postings.get(gram, ()))
+
+        best_id, best_score = None, 0.0
+        for product_id in common:
+            score = similarity(grams, self._grams[product_id])
+            if score >= threshold and score > best_score:
+                best_id, best_score = product_id, score
+        return best_id
+
+
+class ProductMatcher:
+    """
+    Сопоставление ингредиентов с продуктами в памяти процесса — без запросов к БД.
+    Индексы держатся для settings.PRODUCT_MATCHER_MAX_USERS последних пользователей (LRU).
+    Изменение продуктов (сигналы post_save / post_delete) увеличивает версию
+    пользователя в общем кеше, и индекс во всех процессах перестраивается
+    при следующем обращении. QuerySet.update() сигналов не шлёт — после него
+    нужен явный invalidate().
+    """
+
+    _indexes: OrderedDict[str, ProductNameIndex] = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def match(cls, user_id, names: list[str]) -> dict[str, str]:
+        """
+        {название: id продукта} для названий, у которых нашёлся похожий продукт
+        """
+        index = cls._index(user_id)
+        matches = {}
+        with cls._lock:
+            for name in names:
+                product_id = index.best(name, settings.PRODUCT_SIMILARITY_THRESHOLD)
+                if product_id is not None:
+                    matches[name] = product_id
+        return matches
+
+    @classmethod
+    def add(cls, user_id, products: dict[str, str]):
+        """
+        Продукты, только что созданные через bulk_create (он не шлёт сигналы).
+        Если других изменений не было, индекс дополняется на месте.
+        """
+        key = str(user_id)
+        version = cls._bump(key)
+        with cls._lock:
+            index = cls._indexes.get(key)
+            if index is None:
+                return
+            if index.version != version - 1:
+                del cls._indexes[key]
+                return
+            for name, product_id in products.items():
+                index.add(product_id, name)
+            index.version = version
+
+    @classmethod
+    def invalidate(cls, user_id):
+        key = str(user_id)
+        cls._bump(key)
+        with cls._lock:
+            cls._indexes.pop(key, None)
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._indexes.clear()
+
+    @classmethod
+    def _index(cls, user_id) -> ProductNameIndex:
+        key = str(user_id)
+        # версия читается до загрузки: изменение во время загрузки вызовет повторную
+        version = cache.get(cls._version_key(key), 0)
+
+        with cls._lock:
+            index = cls._indexes.get(key)
+            if index is not None and index.version == version:
+                cls._indexes.move_to_end(key)
+                return index
+
+        products = Product.objects.filter(created_by_id=user_id).values_list("id", "name")
+        index = ProductNameIndex(((str(pk), name) for pk, name in products), version)
+
+        with cls._lock:
+            cls._indexes[key] = index
+            cls._indexes.move_to_end(key)
+            while len(cls._indexes) > settings.PRODUCT_MATCHER_MAX_USERS:
+                cls._indexes.popitem(last=False)
+        return index
+
+    @classmethod
+    def _bump(cls, key: str) -> int:
+        version_key = cls._version_key(key)
+        cache.add(version_key, 0, timeout=None)
+        try:
+            return cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, 1, timeout=None)
+            return 1
+
+    @staticmethod
+    def _version_key(key: str) -> str:
+        return f"product-matcher:version:{key}"
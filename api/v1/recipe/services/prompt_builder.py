@@ -0,0 +1,167 @@
+import math
+import re
+
+from django.conf import settings
+
+from api.v1.recipe.constants import (
+    HASHTAG_RE,
+    LLM_CHARS_PER_TOKEN_CYRILLIC,
+    LLM_CHARS_PER_TOKEN_LATIN,
+    LLM_CTX_STEP,
+    LLM_FILLER_RE,
+    LLM_MIN_CTX,
+    LLM_SCHEMA,
+    SENTENCE_SPLIT_RE,
+)
+
+
+class PromptBuilder:
+    """
+    Промпт для извлечения рецепта под бюджет токенов.
+    Из транскрипта убирается мусор, num_ctx подбирается под длину промпта,
+    а слишком длинный текст делится на части, каждая из которых влезает в max_ctx.
+    """
+
+    TEMPLATE = """
+                    You are given a raw transcript of a cooking video.
+                    The text may contain speech recognition errors.
+
+                    Your tasks:
+                    1. Fix obvious transcription errors.
+                    2. Extract structured recipe data.
+                    3. Detect meal_type from context (breakfast, lunch, dinner, soup,
+                    dessert, drink, snack, baby_food, side_dish).
+
+                    Rules:
+                    - Do NOT invent ingredients.
+                    - If meal type is unclear — choose the most appropriate based on context.
+                    - If still unclear — use null.
+                    - Return ONLY valid JSON.
+                    - No explanations.
+                    - No markdown.
+                    - No text outside JSON.
+
+                    Schema:
+                    {schema}
+
+                    Text:
+                    {text}
+        """
+
+    def __init__(self, num_predict: int, max_ctx: int | None = None):
+        self.num_predict = num_predict
+        self.max_ctx = settings.LLM_MAX_CTX if max_ctx is None else max_ctx
+
+    def prompt(self, text: str) -> str:
+        return self.TEMPLATE.format(schema=LLM_SCHEMA, text=text)
+
+    def num_ctx(self, prompt: str) -> int:
+        """
+        Контекст под промпт и ответ: короткие тексты не занимают лишний KV-кеш
+        """
+        needed = self.estimate_tokens(prompt) + self.num_predict
+        ctx = math.ceil(needed / LLM_CTX_STEP) * LLM_CTX_STEP
+        return max(LLM_MIN_CTX, min(ctx, self.max_ctx))
+
+    def text_budget(self) -> int:
+        """
+        Сколько токенов текста влезает в max_ctx вместе с инструкцией и ответом
+        """
+        overhead = self.estimate_tokens(self.prompt("")) + self.num_predict
+        return max(self.max_ctx - overhead, LLM_CTX_STEP)
+
+    def compress(self, text: str) -> str:
+        """
+        Убирает хештеги, приветствия и рекламу, повторяющиеся фразы.
+        Фраза с числами не выбрасывается: в ней может быть количество продукта.
+        """
+        kept = []
+        seen = set()
+
+        for sentence in SENTENCE_SPLIT_RE.split(text):
+            sentence = " ".join(HASHTAG_RE.sub("", sentence).split())
+            if not sentence:
+                continue
+
+            if LLM_FILLER_RE.search(sentence) and not re.search(r"\d", sentence):
+                continue
+
+            key = " ".join(re.findall(r"\w+", sentence.lower()))
+            if key in seen:
+                continue
+            if key:
+                seen.add(key)
+
+            kept.append(sentence)
+
+        return "\n".join(kept)
+
+    def split(self, text: str) -> list[str]:
+        """
+        Делит текст по фразам на части не длиннее text_budget()
+        """
+        budget = self.text_budget()
+        if self.estimate_tokens(text) <= budget:
+            return [text]
+
+        chunks = []
+        current = []
+        current_tokens = 0
+
+        for sentence in self._pieces(text, budget):
+            tokens = self.estimate_tokens(sentence) + 1
+            if current and current_tokens + tokens > budget:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(sentence)
+            current_tokens += tokens
+
+        if current:
+            chunks.append("\n".join(current))
+
+        return chunks
+
+    def _pieces(self, text: str, budget: int):
+        """
+        Фразы текста; слишком длинная фраза режется по словам
+        """
+        for sentence in SENTENCE_SPLIT_RE.split(text):
+            if self.estimate_tokens(sentence) <= budget:
+                yield sentence
+                continue
+
+            words = []
+            cyrillic = latin = 0
+            for word in sentence.split():
+                word_cyrillic, word_latin = self._count_chars(word)
+                # Слово добавляется вместе с пробелом перед ним
+                tokens = self._tokens(cyrillic + word_cyrillic, latin + word_latin + 1)
+                if words and tokens > budget:
+                    yield " ".join(words)
+                    words = []
+                    cyrillic = latin = 0
+                if words:
+                    latin += 1
+                words.append(word)
+                cyrillic += word_cyrillic
+                latin += word_latin
+            if words:
+                yield " ".join(words)
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        return PromptBuilder._tokens(*PromptBuilder._count_chars(text))
+
+    @staticmethod
+    def _count_chars(text: str) -> tuple[int, int]:
+        """
+        Число кириллических и остальных символов текста
+        """
+        cyrillic = sum(1 for char in text if "Ѐ" <= char <= "ӿ")
+        return cyrillic, len(text) - cyrillic
+
+    @staticmethod
+    def _tokens(cyrillic: int, latin: int) -> int:
+        return math.ceil(
+            cyrillic / LLM_CHARS_PER_TOKEN_CYRILLIC + latin / LLM_CHARS_PER_TOKEN_LATIN
+        )
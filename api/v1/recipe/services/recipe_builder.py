@@ -1,19 +1,18 @@
 import re
 
 from api.v1.recipe.constants import (
-    AMOUNT_PREFIX_RE,
-    AMOUNT_SUFFIX_RE,
-    AMOUNT_UNIT_RE,
+    DESCRIPTION_RECIPE_MIN_INGREDIENTS,
+    INGREDIENT_LINE_MAX_LENGTH,
     INGREDIENT_NOISE_WORDS,
+    LIST_MARKER_RE,
+    MEAL_TYPE_PRIORITY,
+    MEAL_TYPE_RE,
     MEAL_TYPE_SYNONYMS,
-    RANGE_RE,
-    UNIT_ONLY_RE,
-    UNIT_SYNONYMS,
 )
 from api.v1.recipe.dto.recipe_dto import IngredientDTO, RecipeDTO
 from api.v1.recipe.interfaces.recipe_parser import IRecipeBuilderService
-from api.v1.recipe.utils.helpers import UnitConverter, clean_name
-from recipe.choices import Unit
+from api.v1.recipe.utils.ingredient_parser import parse_ingredient_line
+from recipe.choices import MealType, Unit
 
 
 class RecipeBuilderService(IRecipeBuilderService):
@@ -42,6 +41,35 @@ class RecipeBuilderService(IRecipeBuilderService):
             thumbnail=dto.thumbnail,
         )
 
+    # ------------------------------------------------------------------
+    # Распознавание рецепта в свободном тексте
+    # ------------------------------------------------------------------
+
+    def is_recipe_text(self, text: str | None) -> bool:
+        """
+        Похож ли текст (например, описание видео) на готовый список ингредиентов
+        """
+        if not text:
+            return False
+        return self.count_ingredient_lines(text) >= DESCRIPTION_RECIPE_MIN_INGREDIENTS
+
+    def count_ingredient_lines(self, text: str) -> int:
+        """
+        Считает строки вида "200 г муки", "2 яйца", "соль по вкусу"
+        """
+        count = 0
+        for line in text.splitlines():
+            line = LIST_MARKER_RE.sub("", line.strip()).strip()
+            if not line or len(line) > INGREDIENT_LINE_MAX_LENGTH or self._is_noise(line):
+                continue
+
+            ingredient = self._parse_ingredient(IngredientDTO(raw=line))
+            if ingredient.name and (
+                ingredient.amount is not None or ingredient.unit == Unit.TO_TASTE.value
+            ):
+                count += 1
+        return count
+
     # ------------------------------------------------------------------
     # Фильтрация мусорных строк
     # ------------------------------------------------------------------
@@ -61,21 +89,38 @@ class RecipeBuilderService(IRecipeBuilderService):
     # ------------------------------------------------------------------
 
     def _parse_meal_type(self, dto: RecipeDTO):
-        context = dto.meal_type
+        """
+        Уже нормализованное значение MealType сохраняется как есть — повторная
+        нормализация его не меняет. Иначе тип ищется в meal_type, а если там
+        его нет — в названии, описании и шагах.
+        """
+        if dto.meal_type in MealType.values:
+            return dto.meal_type
+
+        for context in (dto.meal_type, " ".join(filter(None, [
+            dto.title,
+            dto.description,
+            " ".join(step.step for step in dto.steps),
+        ]))):
+            meal_type = self._match_meal_type(context)
+            if meal_type:
+                return meal_type
+        return None
 
+    @staticmethod
+    def _match_meal_type(context: str | None):
         if not context:
-            context = " ".join(filter(None, [
-                dto.title,
-                dto.description,
-                " ".join(step.step for step in dto.steps),
-            ]))
+            return None
 
-        for key, meal_type in MEAL_TYPE_SYNONYMS.items():
-            pattern = rf"\b{re.escape(key.lower())}\b"
-            if re.search(pattern, context.lower()):
-                return meal_type.value
+        best = None
+        for match in MEAL_TYPE_RE.finditer(context.lower()):
+            key = match.group()
+            if best is None or MEAL_TYPE_PRIORITY[key] < MEAL_TYPE_PRIORITY[best]:
+                best = key
+                if MEAL_TYPE_PRIORITY[best] == 0:
+                    break
 
-        return None
+        return MEAL_TYPE_SYNONYMS[best].value if best else None
 
     # ------------------------------------------------------------------
     # Amount parsing
@@ -122,86 +167,11 @@ class RecipeBuilderService(IRecipeBuilderService):
         if not text:
             return ingredient
 
-        lower = text.lower()
-
-        # --- "по вкусу" / "щепотка" и аналоги ---
-        for key, unit in UNIT_SYNONYMS.items():
-            if unit == Unit.TO_TASTE and key in lower:
-                pattern = re.compile(re.escape(key), re.IGNORECASE)
-                name = pattern.sub("", text)
-                return IngredientDTO(
-                    raw=ingredient.raw,
-                    name=clean_name(name),
-                    amount=None,
-                    unit=Unit.TO_TASTE.value,
-                )
-
-        amount: float | None = None
-        unit: str | None = None
-        working = lower
-
-        # --- диапазон: "40–50 г" или "1–2 ст. л." ---
-        # После вырезания числового диапазона единица остаётся в строке —
-        # ищем её отдельным паттерном UNIT_ONLY_RE
-        range_match = RANGE_RE.search(working)
-        if range_match:
-            a, b = range_match.groups()
-            amount = round(
-                (float(a.replace(",", ".")) + float(b.replace(",", "."))) / 2, 2
-            )
-            working = working[: range_match.start()] + " " + working[range_match.end():]
-
-            # ищем единицу в оставшемся тексте
-            unit_only_match = UNIT_ONLY_RE.search(working)
-            if unit_only_match:
-                raw_unit = unit_only_match.group("unit").lower()
-                unit_enum = UNIT_SYNONYMS.get(raw_unit)
-                unit = unit_enum.value if unit_enum else None
-                amount, unit = UnitConverter.convert(amount, unit)
-                # вырезаем найденную единицу из строки
-                working = working[: unit_only_match.start()] + " " + working[unit_only_match.end():]
-
-        # --- число + единица (в любом месте строки) ---
-        if unit is None:
-            unit_match = AMOUNT_UNIT_RE.search(working)
-            if unit_match:
-                if amount is None:
-                    amount = self._parse_amount(unit_match.group("amount"))
-
-                raw_unit = unit_match.group("unit").lower()
-                unit_enum = UNIT_SYNONYMS.get(raw_unit)
-                unit = unit_enum.value if unit_enum else None
-
-                amount, unit = UnitConverter.convert(amount, unit)
-                working = working[: unit_match.start()] + " " + working[unit_match.end():]
-
-            else:
-                # --- "1банан" — число слитно с названием ---
-                prefix_match = AMOUNT_PREFIX_RE.match(working.strip())
-                if prefix_match:
-                    if amount is None:
-                        amount = self._parse_amount(prefix_match.group(1))
-                    working = prefix_match.group(2)
-                    unit = Unit.PC.value
-
-                else:
-                    # --- "молоко 200" — число в конце без единицы ---
-                    suffix_match = AMOUNT_SUFFIX_RE.search(working)
-                    if suffix_match:
-                        if amount is None:
-                            amount = self._parse_amount(suffix_match.group(1))
-                        working = working[: suffix_match.start()]
-                        unit = Unit.PC.value
-
-        # если amount нашли, но unit так и не определился → штуки
-        if amount is not None and unit is None:
-            unit = Unit.PC.value
-
-        name = clean_name(working)
+        name, amount, unit = parse_ingredient_line(text)
 
         return IngredientDTO(
             raw=ingredient.raw,
             name=name,
             amount=amount,
             unit=unit,
-        )
\ No newline at end of file
+        )
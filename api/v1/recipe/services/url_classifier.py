@@ -3,6 +3,7 @@ from urllib.parse import urlparse
 
 import requests
 
+from api.v1.recipe.services.http_client import HttpClient
 from recipe.choices import ContentType, Domain, Source
 
 
@@ -64,7 +65,7 @@ class UrlClassifier:
             return url
         
         try:
-            response = requests.head(
+            response = HttpClient.head(
                 url,
                 allow_redirects=True,
                 timeout=self.REQUEST_TIMEOUT,
@@ -1,11 +1,30 @@
-import os
-import tempfile
+import subprocess  # nosec B404
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import yt_dlp
-from faster_whisper import WhisperModel
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from faster_whisper.vad import VadOptions, get_speech_timestamps
 
 from api.v1.recipe.dto.recipe_dto import RecipeDTO
-from api.v1.recipe.interfaces.recipe_parser import IRecipeParserService
+from api.v1.recipe.dto.video_dto import VideoProbeDTO
+from api.v1.recipe.interfaces.recipe_parser import IRecipeParserService, ITranscriptRepository
+from api.v1.recipe.mappers.recipe_mapper import RecipeMapper
+from api.v1.recipe.services.recipe_builder import RecipeBuilderService
+from api.v1.recipe.services.whisper_models import WhisperModelManager
+from api.v1.recipe.utils.audio import split_on_silence
+from api.v1.recipe.utils.helpers import video_key
+
+
+class VideoDeferredError(Exception):
+    """
+    Видео слишком длинное для текущей очереди — задачу нужно перенести в queue
+    """
+
+    def __init__(self, queue: str):
+        super().__init__(f"Video deferred to queue {queue}")
+        self.queue = queue
 
 
 class VideoParserService(IRecipeParserService):
@@ -13,83 +32,198 @@ class VideoParserService(IRecipeParserService):
     Сервис для парсинга видео
     """
 
-    _model = None
+    SAMPLE_RATE = 16000
+    AUDIO_DECODE_TIMEOUT = 10 * 60
+    # длинное аудио распознаётся кусками параллельно (если у модели num_workers > 1)
+    CHUNKED_MIN_SECONDS = 10 * 60
+    CHUNK_SECONDS = 5 * 60
+    # самая лёгкая аудиодорожка, достаточная для распознавания речи (16 кГц моно)
+    AUDIO_FORMAT = "worstaudio[abr>=?32][asr>=?16000]/bestaudio/best"
 
-    def __init__(self):
-        self.tmp_dir = tempfile.gettempdir()
+    def __init__(
+            self,
+            transcripts: ITranscriptRepository | None = None,
+            queue: str | None = None,
+            builder: RecipeBuilderService | None = None,
+    ):
+        self.transcripts = transcripts
+        self.queue = queue
+        self.builder = builder or RecipeBuilderService()
         self.ydl_opts = {
-            "format": "bestaudio/best",
-            "outtmpl": os.path.join(self.tmp_dir, "%(id)s.%(ext)s"),
-            "postprocessors": [{
-                "key": "FFmpegExtractAudio",
-                "preferredcodec": "mp3",
-                "preferredquality": "192",
-            }],
+            "format": self.AUDIO_FORMAT,
             "quiet": True,
         }
     
-    @classmethod
-    def get_model(cls):
-        if cls._model is None:
-            cls._model = WhisperModel(
-                "small", 
-                device="cpu",   #TODO for production need to change?
-                compute_type="int8",
-            )
-        return cls._model
+    def get_model(self):
+        return WhisperModelManager.get(self.queue)
 
     def parse(self, url:str) -> RecipeDTO:
         """
-        Основной метод - парсит видео по URL
+        Основной метод - парсит видео по URL.
+        Если видео уже распознавали — берёт транскрипт из хранилища.
         """
 
-        audio_path, description, thumbnail = self._extract_audio_and_description(url)
-        if not os.path.exists(audio_path):
-            raise FileNotFoundError(f"Audio file not found: {audio_path}")
-        
-        try:
-            transcript =  self._transcribe_audio(audio_path)
-        finally:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-
-        return RecipeDTO(
-            title="Без названия",
-            description=f"{description} {transcript}",
-            meal_type=None,
-            ingredients=[],
-            steps=[],
-            tips=None,
-            thumbnail=thumbnail
-        )
+        key = video_key(url) if self.transcripts else None
+        if key:
+            cached = self.transcripts.get(*key)
+            if cached:
+                return cached
+
+        audio, description, thumbnail = self._extract_audio_and_description(url)
+        transcript = self._transcribe_audio(audio) if audio is not None else ""
+
+        if key:
+            self.transcripts.save(*key, transcript, description, thumbnail)
+
+        return RecipeMapper.video_to_dto(description, transcript, thumbnail)
     
-    def _extract_audio_and_description(self, url:str) -> str:
+    def _extract_audio_and_description(self, url:str) -> tuple[np.ndarray | None, str, str]:
         """
-        Извлекает аудио и описание из видео
+        Извлекает аудио и описание из видео.
+        Сначала только метаданные; аудио читается, лишь если без него не обойтись.
+        Если рецепт уже есть в описании — аудио не нужно, возвращается None.
+        """
+
+        probe = self.probe(url)
+
+        if self.builder.is_recipe_text(probe.description):
+            return None, probe.description, probe.thumbnail
+
+        self._check_duration(probe.duration)
+
+        if not probe.audio_format:
+            raise ValidationError(
+                "Не удалось получить аудиодорожку видео: "
+                "платформа отдаёт её только фрагментами без прямой ссылки."
+            )
+
+        audio = self._decode_audio(probe.audio_format)
+
+        return audio, probe.description, probe.thumbnail
+
+    def probe(self, url: str) -> VideoProbeDTO:
+        """
+        Метаданные видео без скачивания: описание, превью, длительность
+        и выбранная аудиодорожка (AUDIO_FORMAT)
         """
 
         with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-
-            description = info.get("description", "") or ""
-            thumbnail = info.get("thumbnail", "")
-
-            if "requested_downloads" in info:
-                audio_path = info["requested_downloads"][0]["filepath"]
-            else:
-                downloaded_file = ydl.prepare_filename(info)
-                audio_path = os.path.splitext(downloaded_file)[0] + ".mp3" 
-           
-        return audio_path, description, thumbnail
+            info = ydl.extract_info(url, download=False)
+
+        return VideoProbeDTO(
+            description=info.get("description", "") or "",
+            thumbnail=info.get("thumbnail", ""),
+            duration=info.get("duration"),
+            audio_format=self._pick_audio_format(info),
+        )
+
+    @staticmethod
+    def _pick_audio_format(info: dict) -> dict:
+        """
+        Формат, который ffmpeg прочитает по ссылке: сначала выбранный по AUDIO_FORMAT,
+        затем любой другой с аудио (список yt-dlp идёт от худшего к лучшему).
+        У фрагментированных форматов без общей ссылки url нет — они пропускаются.
+        Пустой словарь — читаемого формата нет
+        """
+        requested = info.get("requested_formats") or [info]
+        with_audio = [f for f in requested if f.get("acodec") != "none"]
+        fallback = [
+            f for f in info.get("formats") or []
+            if f.get("acodec") not in (None, "none")
+        ]
+
+        for audio_format in (*with_audio, *requested, *fallback):
+            if audio_format.get("url"):
+                return audio_format
+        return {}
+
+    def _check_duration(self, duration: float | None):
+        """
+        Слишком длинные видео отклоняются или переносятся в отдельную очередь
+        """
+        if not duration:
+            return
+
+        if duration > settings.VIDEO_MAX_DURATION:
+            raise ValidationError(
+                f"Видео слишком длинное ({int(duration // 60)} мин). "
+                f"Максимум — {settings.VIDEO_MAX_DURATION // 60} мин."
+            )
+
+        long_queue = settings.VIDEO_LONG_QUEUE
+        if duration > settings.VIDEO_LONG_DURATION and long_queue and self.queue != long_queue:
+            raise VideoDeferredError(long_queue)
+
+    def _decode_audio(self, audio_format: dict) -> np.ndarray:
+        """
+        Декодирует аудио один раз, сразу в 16 кГц моно PCM для Whisper.
+        Данные идут через пайп в память, без промежуточного файла.
+        """
+
+        command = ["ffmpeg", "-nostdin", "-loglevel", "error"]
+        headers = audio_format.get("http_headers") or {}
+        if headers:
+            command += ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())]
+        command += [
+            "-i", audio_format["url"],
+            "-vn",
+            "-f", "s16le",
+            "-acodec", "pcm_s16le",
+            "-ac", "1",
+            "-ar", str(self.SAMPLE_RATE),
+            "pipe:1",
+        ]
+
+        # subprocess.run сам завершает ffmpeg при ошибке или таймауте
+        try:
+            result = subprocess.run(  # nosec B603 B607
+                command,
+                capture_output=True,
+                check=True,
+                timeout=self.AUDIO_DECODE_TIMEOUT,
+            )
+        except subprocess.CalledProcessError as e:
+            error = e.stderr.decode(errors="ignore").strip()
+            raise RuntimeError(f"Audio decoding failed: {error}") from e
+
+        if not result.stdout:
+            raise RuntimeError("Audio decoding failed: empty audio stream")
+
+        return np.frombuffer(result.stdout, np.int16).astype(np.float32) / 32768.0
     
-    def _transcribe_audio(self, audio_path:str) -> str:
+    def _transcribe_audio(self, audio: np.ndarray) -> str:
         """
         Транскрибирует аудио
         """
 
+        workers = WhisperModelManager.config_for(self.queue).num_workers
+        if workers > 1 and len(audio) >= self.CHUNKED_MIN_SECONDS * self.SAMPLE_RATE:
+            return self._transcribe_chunked(audio, workers)
+
+        return self._transcribe_chunk(audio)
+
+    def _transcribe_chunked(self, audio: np.ndarray, workers: int) -> str:
+        """
+        Режет аудио по паузам (VAD) и распознаёт куски параллельно.
+        CTranslate2 отпускает GIL, поэтому потоки с num_workers модели занимают все ядра,
+        а веса загружаются один раз (пул процессов грузил бы модель в каждый процесс).
+        Тексты склеиваются в исходном порядке кусков. Разрез приходится на середину
+        паузы, но кусок распознаётся без контекста предыдущего, поэтому слова на
+        границе могут отличаться от последовательной транскрипции.
+        """
+
+        speech = get_speech_timestamps(audio, VadOptions(), sampling_rate=self.SAMPLE_RATE)
+        bounds = split_on_silence(len(audio), speech, self.CHUNK_SECONDS * self.SAMPLE_RATE)
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            texts = pool.map(self._transcribe_chunk, [audio[s:e] for s, e in bounds])
+
+        return " ".join(text for text in texts if text)
+
+    def _transcribe_chunk(self, audio: np.ndarray) -> str:
         model = self.get_model()
         result, _ = model.transcribe(
-            audio_path,
+            audio,
             beam_size=1,
             vad_filter=True,
         )
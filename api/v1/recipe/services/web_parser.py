@@ -1,14 +1,44 @@
-import json
 import re
+from collections import Counter
 from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
 from django.core.exceptions import ValidationError
 
 import api.v1.recipe.constants as selectors
+from api.v1.recipe.constants import PROFILE_JSON_LD, PROFILE_NUMBERED_STEPS
+from api.v1.recipe.dto.page_dto import FetchedPageDTO
 from api.v1.recipe.dto.recipe_dto import IngredientDTO, RecipeDTO, StepDTO
 from api.v1.recipe.interfaces.recipe_parser import IRecipeParserService
+from api.v1.recipe.services.extraction_profiles import ExtractionProfileStore
+from api.v1.recipe.services.http_client import HttpClient
+from api.v1.recipe.services.page_store import FetchedPageStore
+from api.v1.recipe.utils.html import SelectorIndex, parse_html, precompile
+from api.v1.recipe.utils.jsonld import json_ld_blocks, json_ld_items, schema_types
+
+
+def field_selectors() -> dict[str, list[str]]:
+    """
+    Группы селекторов полей рецепта — по ним ведётся профиль домена
+    """
+    return {
+        "title": selectors.TITLE_SELECTORS,
+        "ingredients": selectors.INGREDIENTS_SELECTORS,
+        "steps": selectors.INSTRUCTIONS_SELECTORS,
+        "cook_time": selectors.COOK_TIME_SELECTORS,
+        "servings": selectors.SERVINGS_SELECTORS,
+        "thumbnail": selectors.IMAGE_SELECTORS,
+    }
+
+
+def selector_groups() -> list[list[str]]:
+    """
+    Все группы селекторов страницы рецепта — совпадения собираются за один обход дерева
+    """
+    return [*field_selectors().values(), selectors.RECIPE_CARD_SELECTORS]
+
+
+precompile(selector_groups())
 
 
 class WebParserService(IRecipeParserService):
@@ -16,26 +46,33 @@ class WebParserService(IRecipeParserService):
     Сервис для парсинга рецептов с сайтов
     """
 
-    def __init__(self, timeout=10):
+    def __init__(
+        self,
+        timeout=10,
+        page_store: FetchedPageStore | None = None,
+        profile_store: ExtractionProfileStore | None = None,
+    ):
         self.timeout = timeout
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; '
-                          'Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)'
-                          'Chrome/91.0.4472.124 Safari/537.36'
-        })
+        self.page_store = page_store or FetchedPageStore()
+        self.profile_store = profile_store or ExtractionProfileStore()
+        self._profile_key = None
+        self._domain = None
+        self._profile = {}
+        self._learned = {}
+        self._outcomes = {}
+        self._soup_key = None
+        self._soup = None
+        self._json_ld_key = None
+        self._json_ld = None
+        self._selector_index = None
     
     def parse(self, url: str) -> RecipeDTO:
         """
         Основной метод - парсит рецепт по URL и возвращает RecipeDTO
         """
         try:
-            resp = self.session.get(url, timeout=self.timeout)
-            resp.raise_for_status()
-
-            soup = BeautifulSoup(resp.content, "html.parser")
-
-            recipe_data = self._parse_recipe_data(soup, url)
+            page = self.fetch(url)
+            recipe_data = self._parse_page(page, url)
 
             if recipe_data.get("thumbnail"):
                 recipe_data["thumbnail"] = urljoin(url, recipe_data["thumbnail"])
@@ -74,96 +111,240 @@ class WebParserService(IRecipeParserService):
         Лёгкая проверка: страница — это один рецепт?
         """
         try:
-            resp = self.session.get(url, timeout=self.timeout)
-            resp.raise_for_status()
+            page = self.fetch(url)
         except requests.RequestException as e:
             raise ValidationError(f"Не удалось загрузить страницу: {e}") from e
         
-        soup = BeautifulSoup(resp.content, "html.parser")
-        self._validate_recipe_page(soup)
+        self._validate_page(page)
+        return page
+
+    def fetch(self, url: str) -> FetchedPageDTO:
+        """
+        Скачивает страницу или берёт уже скачанную (например, при валидации).
+        Запрос идёт через общий HttpClient с дисковым HTTP-кешем: повторный запрос
+        страницы обходится ответом 304 или не уходит вовсе
+        """
+        page = self.page_store.get(url)
+        if page:
+            return page
+
+        resp = HttpClient.get(url, timeout=self.timeout)
+        resp.raise_for_status()
+
+        page = FetchedPageDTO(
+            url=url,
+            final_url=resp.url or url,
+            content=resp.content,
+            headers=dict(resp.headers),
+            etag=resp.headers.get("ETag"),
+        )
+        self.page_store.put(page)
+        return page
+
+    def _get_soup(self, page: FetchedPageDTO):
+        """
+        Разбирает HTML один раз: валидация и парсинг одной страницы делят одно дерево
+        """
+        key = self._page_key(page)
+        if self._soup_key != key:
+            self._soup = parse_html(page.content)
+            self._soup_key = key
+        return self._soup
+
+    def _get_json_ld(self, page: FetchedPageDTO):
+        """
+        JSON-LD блоки из сырых байтов страницы; как и дерево, разбираются один раз
+        """
+        key = self._page_key(page)
+        if self._json_ld_key != key:
+            self._json_ld = json_ld_blocks(page.content, self._charset(page))
+            self._json_ld_key = key
+        return self._json_ld
+
+    @staticmethod
+    def _page_key(page: FetchedPageDTO):
+        return page.final_url, page.etag, len(page.content)
+
+    @staticmethod
+    def _charset(page: FetchedPageDTO) -> str | None:
+        content_type = next(
+            (value for name, value in page.headers.items() if name.lower() == "content-type"),
+            "",
+        )
+        found = re.search(r"charset=[\"']?([\w-]+)", content_type, re.IGNORECASE)
+        return found.group(1) if found else None
+
+    def _load_profile(self, page: FetchedPageDTO):
+        """
+        Профиль извлечения домена страницы; читается из кеша один раз на страницу
+        """
+        key = self._page_key(page)
+        if self._profile_key != key:
+            self._domain = self.profile_store.domain(page.final_url)
+            self._profile = self.profile_store.get(self._domain)
+            self._profile_key = key
+
+    def _preferred(self, field, group):
+        """
+        Селекторы группы, которые дали поле при прошлом разборе домена, или None
+        """
+        source = self._profile.get(field) if field else None
+        if isinstance(source, list) and source and all(i < len(group) for i in source):
+            return tuple(group[i] for i in source)
+        return None
+
+    def _learn(self, field, source, hit=False):
+        """
+        Запоминает, чем нашлось поле (source), и исход поиска для статистики.
+        JSON-LD читается раньше селекторов на любой странице, поэтому поля из него
+        считаются отдельно и не влияют на долю попаданий профиля
+        """
+        if field is None:
+            return
+        self._learned[field] = source
+        if source == PROFILE_JSON_LD:
+            self._outcomes[field] = PROFILE_JSON_LD
+        elif hit:
+            self._outcomes[field] = "hit"
+        else:
+            self._outcomes[field] = "miss" if field in self._profile else "cold"
+
+    def _save_profile(self, result):
+        """
+        Записывает статистику и, если страница разобрана (есть название
+        и ингредиенты или шаги), обновлённый профиль домена
+        """
+        self.profile_store.record(Counter(self._outcomes.values()))
+        if not (result["title"] and (result["ingredients"] or result["steps"])):
+            return
+
+        profile = {**self._profile, **self._learned}
+        if profile != self._profile:
+            self.profile_store.put(self._domain, profile)
+            self._profile = profile
+
+    def _matches(self, soup, group):
+        """
+        Совпадения каждого селектора группы; индекс строится один раз на дерево.
+        Если у домена есть профиль, для полей из профиля первый обход проверяет
+        только их селекторы — полные группы собираются отдельным обходом при промахе
+        """
+        if self._selector_index is None or self._selector_index.root is not soup:
+            if self._profile:
+                groups = [
+                    self._preferred(field, group) or group
+                    for field, group in field_selectors().items()
+                ]
+            else:
+                groups = selector_groups()
+            self._selector_index = SelectorIndex(soup, groups)
+        return self._selector_index.matches(group)
+
+    def _any_match(self, soup, field, group) -> bool:
+        preferred = self._preferred(field, group)
+        if preferred and any(self._matches(soup, preferred)):
+            return True
+        return any(self._matches(soup, group))
+
+    def _validate_page(self, page: FetchedPageDTO):
+        """
+        Проверяет, что страница содержит один рецепт.
+        Хватает JSON-LD — дерево страницы не строится.
+        """
+        self._load_profile(page)
+        if not self._validate_structured_data(self._get_json_ld(page)):
+            self._validate_recipe_page(self._get_soup(page))
+
+    def _validate_structured_data(self, blocks) -> bool:
+        """
+        Проверка по JSON-LD: True — это рецепт, False — разметка ничего не решает.
+        Список рецептов и несколько рецептов на странице — ValidationError.
+        """
+        for block in blocks:
+            items = json_ld_items(block)
+            recipes = [
+                item for item in items if schema_types(item) & selectors.RECIPE_JSONLD_TYPES
+            ]
+
+            if len(recipes) > 1:
+                raise ValidationError("Ссылка ведёт на страницу с несколькими рецептами.")
+
+            if not recipes and any(
+                schema_types(item) & selectors.LISTING_JSONLD_TYPES for item in items
+            ):
+                raise ValidationError(
+                    "Ссылка ведёт на страницу со списком рецептов, "
+                    "а не на конкретный рецепт."
+                )
+
+            if recipes:
+                recipe = recipes[0]
+                has_name = bool(recipe.get("name") or recipe.get("headline"))
+                has_ingredients = bool(recipe.get("recipeIngredient"))
+                has_instructions = bool(recipe.get("recipeInstructions"))
+                if has_name and (has_ingredients or has_instructions):
+                    return True
+
+        return False
 
     def _validate_recipe_page(self, soup):
         """
-        Проверяет, что страница содержит один рецепт,
+        Проверяет по селекторам, что страница содержит один рецепт,
         а не список рецептов или нерелевантный контент.
         """
 
-        # 1. Проверка JSON-LD разметки
-        for selector in selectors.STRUCTURED_DATA_SELECTORS:
-            scripts = soup.select(selector)
-            for script in scripts:
-                try:
-                    data = json.loads(script.string)
-                    if isinstance(data, list):
-                        data = data[0]
-                    
-                    schema_type = data.get("@type", "")
-                    if schema_type in selectors.LISTING_JSONLD_TYPES:
-                        raise ValidationError(
-                            "Ссылка ведёт на страницу со списком рецептов, "
-                            "а не на конкретный рецепт."
-                        )
-
-                    if schema_type in ("Recipe", "HowTo"):
-                        has_name = bool(data.get("name") or data.get("headline"))
-                        has_ingredients = bool(data.get("recipeIngredient"))
-                        has_instructions = bool(data.get("recipeInstructions"))
-                        if has_name and (has_ingredients or has_instructions):
-                            return
-                    
-                    if "@graph" in data:
-                        recipes_in_graph = [
-                            item for item in data["@graph"]
-                            if isinstance(item, dict)
-                            and item.get("@type") in ("Recipe", "HowTo")
-                        ]
-                        if len(recipes_in_graph) > 1:
-                            raise ValidationError(
-                                "Ссылка ведёт на страницу с несколькими рецептами."
-                            )
-                        if len(recipes_in_graph) == 1:
-                            item = recipes_in_graph[0]
-                            has_name = bool(item.get("name") or item.get("headline"))
-                            has_ing = bool(item.get("recipeIngredient"))
-                            has_ins = bool(item.get("recipeInstructions"))
-                            if has_name and (has_ing or has_ins):
-                                return
-                except (json.JSONDecodeError, AttributeError, IndexError):
-                    continue
-        
-        # 2. Собираем сигналы
-        has_ingredients = any(
-            soup.select(s) for s in selectors.INGREDIENTS_SELECTORS
-        )
-        has_steps = any(
-            soup.select(s) for s in selectors.INSTRUCTIONS_SELECTORS
+        # 1. Собираем сигналы; карточки считаются, только если признаков рецепта нет
+        is_recipe = (
+            self._any_match(soup, "ingredients", selectors.INGREDIENTS_SELECTORS)
+            or self._any_match(soup, "steps", selectors.INSTRUCTIONS_SELECTORS)
         )
+        if is_recipe:
+            return
 
-        total_cards = 0
-        for card_selector in selectors.RECIPE_CARD_SELECTORS:
-            total_cards += len(soup.select(card_selector))
-
-        is_recipe = has_ingredients or has_steps
+        total_cards = sum(
+            len(cards) for cards in self._matches(soup, selectors.RECIPE_CARD_SELECTORS)
+        )
         is_listing = total_cards >= selectors.RECIPE_CARD_THRESHOLD
 
-        # 3. Принимаем решение
-        if is_listing and not is_recipe:
+        # 2. Принимаем решение
+        if is_listing:
             raise ValidationError(
                 "Ссылка ведёт на страницу со списком рецептов, "
                 "а не на конкретный рецепт."
             )
 
-        if not is_recipe:
-            raise ValidationError(
-                "Страница не содержит рецепта. "
-                "Убедитесь, что ссылка ведёт на страницу с конкретным рецептом."
-            )
+        raise ValidationError(
+            "Страница не содержит рецепта. "
+            "Убедитесь, что ссылка ведёт на страницу с конкретным рецептом."
+        )
 
-    def _parse_recipe_data(self, soup, url):
+    def _parse_page(self, page: FetchedPageDTO, url):
         """
-        Парсит данные рецепта из HTML
+        Данные рецепта. Если в JSON-LD есть все нужные поля, дерево страницы не строится;
+        иначе недостающие поля ищутся по селекторам — сначала теми, что сработали
+        на прошлых страницах того же домена
         """
-        result = {
+        self._load_profile(page)
+        self._learned, self._outcomes = {}, {}
+
+        structured_data = self._extract_structured_data(self._get_json_ld(page))
+        for field in field_selectors():
+            if structured_data.get(field):
+                self._learn(field, PROFILE_JSON_LD)
+
+        if structured_data and all(
+            structured_data.get(field) for field in selectors.JSONLD_REQUIRED_FIELDS
+        ):
+            result = {**self._empty_result(url), **structured_data}
+        else:
+            result = self._parse_recipe_data(self._get_soup(page), url, structured_data)
+
+        self._save_profile(result)
+        return result
+
+    @staticmethod
+    def _empty_result(url):
+        return {
             "source_url": url,
             "title": None,
             "ingredients": [],
@@ -171,55 +352,58 @@ class WebParserService(IRecipeParserService):
             "cook_time": None,
             "servings": None,
             "thumbnail": None,
-        } 
+        }
 
-        # 1. Пробуем структурированные данные (JSON-LD)
-        structured_data = self._extract_structured_data(soup)
+    def _parse_recipe_data(self, soup, url, structured_data=None):
+        """
+        Парсит данные рецепта из HTML
+        """
+        result = self._empty_result(url)
+
+        # 1. Структурированные данные (JSON-LD) извлекаются из байтов страницы заранее
         if structured_data:
             result.update(structured_data)
         
          # 2. Если структурированных данных нет, парсим по селекторам
         if not result["title"]:
-            result["title"] = self._find_by_selectors(soup, selectors.TITLE_SELECTORS)
+            result["title"] = self._find_by_selectors(
+                soup, selectors.TITLE_SELECTORS, field="title"
+            )
         
         if not result['ingredients']:
-            ingredients = self._find_list_by_selectors(soup, selectors.INGREDIENTS_SELECTORS)
+            ingredients = self._find_list_by_selectors(
+                soup, selectors.INGREDIENTS_SELECTORS, field="ingredients"
+            )
             result['ingredients'] = [{"raw": self._clean_text(ing)} for ing in ingredients]
         
         if not result['steps']:
-            instructions = self._find_steps(soup, selectors.INSTRUCTIONS_SELECTORS)
-            if not instructions:
-                instructions = self._find_numbered_steps(soup)
+            instructions = self._find_instructions(soup)
             result['steps'] = [{"step": self._clean_text(step)} for step in instructions]
         
         if not result['cook_time']:
-            result['cook_time'] = self._find_by_selectors(soup, selectors.COOK_TIME_SELECTORS)
+            result['cook_time'] = self._find_by_selectors(
+                soup, selectors.COOK_TIME_SELECTORS, field="cook_time"
+            )
         
         if not result['servings']:
-            result['servings'] = self._find_by_selectors(soup, selectors.SERVINGS_SELECTORS)
+            result['servings'] = self._find_by_selectors(
+                soup, selectors.SERVINGS_SELECTORS, field="servings"
+            )
         
         if not result['thumbnail']:
-            result['thumbnail'] = self._find_image(soup)
+            result['thumbnail'] = self._find_image(soup, field="thumbnail")
         
         return result
 
 
-    def _extract_structured_data(self, soup):
+    def _extract_structured_data(self, blocks):
         """
-        Извлекает данные из структурированной разметки (JSON-LD)
+        Извлекает данные первого рецепта из JSON-LD блоков
         """
-        for selector in selectors.STRUCTURED_DATA_SELECTORS:
-            scripts = soup.select(selector)
-            for script in scripts:
-                try:
-                    data = json.loads(script.string)
-                    if isinstance(data, list):
-                        data = data[0]
-                    
-                    if data.get("@type") in ["Recipe", "HowTo"]:
-                        return self._parse_structured_recipe(data)
-                except (json.JSONDecodeError, AttributeError, IndexError):
-                    continue
+        for block in blocks:
+            for item in json_ld_items(block):
+                if schema_types(item) & selectors.RECIPE_JSONLD_TYPES:
+                    return self._parse_structured_recipe(item)
         
         return {}
     
@@ -243,8 +427,13 @@ class WebParserService(IRecipeParserService):
         instructions = data.get("recipeInstructions", [])
         if isinstance(instructions, list):
             instructions_text = []
-            for step in instructions:
-                if isinstance(step, dict):
+            steps = instructions[::-1]
+            while steps:
+                step = steps.pop()
+                if isinstance(step, dict) and isinstance(step.get("itemListElement"), list):
+                    # HowToSection: шаги сгруппированы по разделам
+                    steps.extend(step["itemListElement"][::-1])
+                elif isinstance(step, dict):
                     instructions_text.append(step.get("text"))
                 elif isinstance(step, str):
                     instructions_text.append(step)
@@ -267,38 +456,103 @@ class WebParserService(IRecipeParserService):
 
         return result
     
-    def _find_by_selectors(self, soup, selectors):
-        for selector in selectors:
-            element = soup.select_one(selector)
-            if element and element.get_text().strip():
-                return self._clean_text(element.get_text())
+    def _find_first(self, soup, selectors, extract, field=None):
+        """
+        extract(элементы) для первого селектора группы, давшего не None.
+        С полем field сначала пробуются селекторы из профиля домена,
+        а сработавший селектор запоминается для профиля
+        """
+        preferred = self._preferred(field, selectors)
+        if preferred:
+            for elements in self._matches(soup, preferred):
+                value = extract(elements)
+                if value is not None:
+                    self._learn(field, self._profile[field], hit=True)
+                    return value
+
+        for index, elements in enumerate(self._matches(soup, selectors)):
+            value = extract(elements)
+            if value is not None:
+                self._learn(field, [index])
+                return value
         return None
 
+    def _find_by_selectors(self, soup, selectors, field=None):
+        def extract(elements):
+            if elements and elements[0].get_text().strip():
+                return self._clean_text(elements[0].get_text())
+            return None
+
+        return self._find_first(soup, selectors, extract, field)
+
     
-    def _find_list_by_selectors(self, soup, selectors):
-        for selector in selectors:
-            elements = soup.select(selector)
-            if elements:
-                texts = []
-                for element in elements:
-                    spans = element.select("span")
-                    for span in spans:
-                        text = self._clean_text(span.get_text())
-                        if text:
-                            texts.append(text)
-                return texts
-        return []
-    
-    def _find_steps(self, soup, selectors):
-        steps = []
-        for selector in selectors:
-            elements = soup.select(selector)
+    def _find_list_by_selectors(self, soup, selectors, field=None):
+        def extract(elements):
+            if not elements:
+                return None
+            texts = []
             for element in elements:
-                p_tags = element.select("p")
-                for p in p_tags:
-                    text = self._clean_text(p.get_text())
+                spans = element.find_all("span")
+                for span in spans:
+                    text = self._clean_text(span.get_text())
                     if text:
-                        steps.append(text)
+                        texts.append(text)
+            return texts
+
+        return self._find_first(soup, selectors, extract, field) or []
+    
+    def _find_steps(self, soup, selectors, field=None):
+        """
+        Шаги из всех селекторов группы. С полем field сначала пробуются только
+        селекторы из профиля домена
+        """
+        preferred = self._preferred(field, selectors)
+        if preferred:
+            steps = [text for elements in self._matches(soup, preferred)
+                     for text in self._step_texts(elements)]
+            if steps:
+                self._learn(field, self._profile[field], hit=True)
+                return steps
+
+        steps = []
+        used = []
+        for index, elements in enumerate(self._matches(soup, selectors)):
+            texts = self._step_texts(elements)
+            if texts:
+                steps.extend(texts)
+                used.append(index)
+
+        if used:
+            self._learn(field, used)
+        return steps
+
+    def _step_texts(self, elements):
+        texts = []
+        for element in elements:
+            p_tags = element.find_all("p")
+            for p in p_tags:
+                text = self._clean_text(p.get_text())
+                if text:
+                    texts.append(text)
+        return texts
+
+    def _find_instructions(self, soup):
+        """
+        Шаги по селекторам, иначе — по нумерованным абзацам.
+        Если на домене шаги находились по нумерации, она пробуется первой
+        """
+        numbered_first = self._profile.get("steps") == PROFILE_NUMBERED_STEPS
+        if numbered_first:
+            steps = self._find_numbered_steps(soup)
+            if steps:
+                self._learn("steps", PROFILE_NUMBERED_STEPS, hit=True)
+                return steps
+
+        steps = self._find_steps(soup, selectors.INSTRUCTIONS_SELECTORS, field="steps")
+        if not steps and not numbered_first:
+            steps = self._find_numbered_steps(soup)
+            if steps:
+                self._learn("steps", PROFILE_NUMBERED_STEPS)
         return steps
 
     def _find_numbered_steps(self, soup):
@@ -312,12 +566,13 @@ class WebParserService(IRecipeParserService):
                 steps.append(re.sub(r"^\d+\.\s*", "", text))
         return steps
     
-    def _find_image(self, soup):
-        for selector in selectors.IMAGE_SELECTORS:
-            img = soup.select_one(selector)
-            if img and img.get("src"):
-                return img["src"]
-        return None
+    def _find_image(self, soup, field=None):
+        def extract(images):
+            if images and images[0].get("src"):
+                return images[0]["src"]
+            return None
+
+        return self._find_first(soup, selectors.IMAGE_SELECTORS, extract, field)
     
     def _clean_text(self, text):
         if not text:
@@ -0,0 +1,111 @@
+import logging
+import os
+import resource
+import threading
+import time
+from dataclasses import asdict, dataclass
+
+from django.conf import settings
+from faster_whisper import WhisperModel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WhisperConfig:
+    model_size: str = "small"
+    device: str = "cpu"
+    compute_type: str = "int8"
+    cpu_threads: int = 0
+    num_workers: int = 1
+
+
+@dataclass
+class WhisperModelStats:
+    config: WhisperConfig
+    load_seconds: float
+    rss_before_mb: float
+    rss_after_mb: float
+
+
+class WhisperModelManager:
+    """
+    Пул загруженных моделей Whisper на уровне процесса воркера.
+    Модели грузятся один раз (заранее — по сигналу worker_process_init),
+    параметры задаются для каждой очереди в settings.WHISPER_MODELS.
+    """
+
+    DEFAULT_QUEUE = "default"
+
+    _models: dict[WhisperConfig, WhisperModel] = {}
+    _stats: dict[WhisperConfig, WhisperModelStats] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def config_for(cls, queue: str | None = None) -> WhisperConfig:
+        configs = getattr(settings, "WHISPER_MODELS", {})
+        params = configs.get(queue) or configs.get(cls.DEFAULT_QUEUE) or {}
+        return WhisperConfig(**params)
+
+    @classmethod
+    def get(cls, queue: str | None = None) -> WhisperModel:
+        config = cls.config_for(queue)
+        model = cls._models.get(config)
+        if model is not None:
+            return model
+
+        with cls._lock:
+            if config not in cls._models:
+                cls._models[config] = cls._load(config)
+            return cls._models[config]
+
+    @classmethod
+    def preload(cls, queues: list[str] | None = None):
+        """
+        Загружает модели для очередей воркера, чтобы первая задача не ждала загрузку
+        """
+        for queue in queues or [cls.DEFAULT_QUEUE]:
+            cls.get(queue)
+
+    @classmethod
+    def stats(cls) -> list[dict]:
+        return [asdict(stat) for stat in cls._stats.values()]
+
+    @classmethod
+    def _load(cls, config: WhisperConfig) -> WhisperModel:
+        rss_before = cls._rss_mb()
+        started = time.monotonic()
+
+        model = WhisperModel(
+            config.model_size,
+            device=config.device,
+            compute_type=config.compute_type,
+            cpu_threads=config.cpu_threads,
+            num_workers=config.num_workers,
+        )
+
+        stat = WhisperModelStats(
+            config=config,
+            load_seconds=round(time.monotonic() - started, 2),
+            rss_before_mb=rss_before,
+            rss_after_mb=cls._rss_mb(),
+        )
+        cls._stats[config] = stat
+        logger.info(
+            "Whisper model %s (%s, %s) loaded in %.2fs, RSS %.0f -> %.0f MB",
+            config.model_size, config.device, config.compute_type,
+            stat.load_seconds, stat.rss_before_mb, stat.rss_after_mb,
+        )
+        return model
+
+    @staticmethod
+    def _rss_mb() -> float:
+        """
+        Текущая резидентная память процесса; вне Linux — пиковая
+        """
+        try:
+            with open("/proc/self/statm") as f:
+                pages = int(f.read().split()[1])
+            return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+        except (OSError, ValueError, IndexError):
+            return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
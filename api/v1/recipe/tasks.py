@@ -1,23 +1,37 @@
+import logging
+from dataclasses import asdict
+
+import requests
 from celery import shared_task
+from django.conf import settings
+from django.core.exceptions import ValidationError
 
 from api.v1.common.uow.django_uow import DjangoUnitOfWork
+from api.v1.recipe.repositories.llm_cache_repository import LLMCacheRepository
 from api.v1.recipe.repositories.recipe_repository import RecipeRepository
+from api.v1.recipe.repositories.source_repository import RecipeSourceRepository
+from api.v1.recipe.repositories.transcript_repository import TranscriptRepository
+from api.v1.recipe.services.image_service import ImageService
 from api.v1.recipe.services.llm import LLMService
 from api.v1.recipe.services.recipe_builder import RecipeBuilderService
-from api.v1.recipe.services.video_parser import VideoParserService
+from api.v1.recipe.services.video_parser import VideoDeferredError, VideoParserService
 from api.v1.recipe.services.web_parser import WebParserService
 from api.v1.recipe.usecases.create_recipe_usecase import CreateRecipeUseCase
+from api.v1.recipe.usecases.renormalize_sources_usecase import RenormalizeSourcesUseCase
 from app.models import StatusChoices
 from notifications.choices import Notification_Type
 from notifications.services import NotificationService
-from recipe.models import RecipeSource
+from recipe.models import Recipe, RecipeSource
 from users.models import User
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task(bind=True, max_retries=3)
 def parse_web_recipe(self, source_id: str, user_id: str, url: str):
     """
-    Задача для парсинга web рецепта
+    Задача для парсинга web рецепта.
+    Первый шаг — проверка, что страница содержит один рецепт.
     """
 
     user = User.objects.get(id=user_id)
@@ -29,8 +43,32 @@ def parse_web_recipe(self, source_id: str, user_id: str, url: str):
         save=False,
     )
 
+    parser = WebParserService()
+
+    try:
+        parser.validate_url(url)
+    except ValidationError as e:
+        RecipeSource.objects.filter(id=source_id).update(
+            status=StatusChoices.ERROR,
+            error_message=e.message,
+        )
+
+        NotificationService.send(
+            user=user,
+            title="Ссылка не подходит",
+            message=e.message,
+            type=Notification_Type.ERROR,
+        )
+
+        return
+    except Exception:
+        # проверка идёт до обработки ошибок use case, а view уже ответил 202 —
+        # без этого источник навсегда остался бы в PROCESSING
+        _mark_source_failed(source_id, user)
+        raise
+
     use_case = CreateRecipeUseCase(
-        parser=WebParserService(),
+        parser=parser,
         builder=RecipeBuilderService(),
         repository=RecipeRepository(),
         uow=DjangoUnitOfWork()
@@ -39,17 +77,27 @@ def parse_web_recipe(self, source_id: str, user_id: str, url: str):
     try:
         use_case.execute(source_id, user, url)
     except Exception:
-        RecipeSource.objects.filter(id=source_id).update(status=StatusChoices.ERROR)
-
-        NotificationService.send(
-            user=user,
-            title="Ошибка загрузки",
-            message="Не удалось загрузить рецепт. Попробуйте ещё раз.",
-            type=Notification_Type.ERROR,
-        )
-        
+        _mark_source_failed(source_id, user)
         raise
 
+
+def _mark_source_failed(source_id: str, user: User):
+    """
+    Непредвиденная ошибка загрузки: источник в ERROR, пользователю — уведомление
+    """
+    message = "Не удалось загрузить рецепт. Попробуйте ещё раз."
+    RecipeSource.objects.filter(id=source_id).update(
+        status=StatusChoices.ERROR,
+        error_message=message,
+    )
+
+    NotificationService.send(
+        user=user,
+        title="Ошибка загрузки",
+        message=message,
+        type=Notification_Type.ERROR,
+    )
+
  
     
 
@@ -57,7 +105,8 @@ def parse_web_recipe(self, source_id: str, user_id: str, url: str):
 @shared_task(bind=True, max_retries=3)
 def parse_video_recipe(self, source_id: str, user_id: str, url: str):
     """
-    Задача для парсинга video рецепта
+    Задача для парсинга video рецепта.
+    Слишком длинные видео отклоняются, длинные — переносятся в отдельную очередь.
     """
     
     user = User.objects.get(id=user_id)
@@ -69,16 +118,36 @@ def parse_video_recipe(self, source_id: str, user_id: str, url: str):
         save=False,
     )
 
+    transcripts = TranscriptRepository()
+
     use_case = CreateRecipeUseCase(
-        parser=VideoParserService(),
+        parser=VideoParserService(
+            transcripts=transcripts,
+            queue=(self.request.delivery_info or {}).get("routing_key"),
+        ),
         builder=RecipeBuilderService(),
         repository=RecipeRepository(),
         uow=DjangoUnitOfWork(),
-        llm=LLMService()
+        llm=LLMService(cache=LLMCacheRepository(), stream=True),
+        transcripts=transcripts,
     )
 
     try:
         use_case.execute(source_id, user, url)
+    except VideoDeferredError as e:
+        parse_video_recipe.apply_async((source_id, user_id, url), queue=e.queue)
+    except ValidationError as e:
+        RecipeSource.objects.filter(id=source_id).update(
+            status=StatusChoices.ERROR,
+            error_message=e.message,
+        )
+
+        NotificationService.send(
+            user=user,
+            title="Видео не подходит",
+            message=e.message,
+            type=Notification_Type.ERROR,
+        )
     except Exception:
         RecipeSource.objects.filter(id=source_id).update(status=StatusChoices.ERROR)
 
@@ -90,4 +159,70 @@ def parse_video_recipe(self, source_id: str, user_id: str, url: str):
         ) 
 
         raise
-    
\ No newline at end of file
+
+
+@shared_task(bind=True)
+def renormalize_sources(self, chunk_size: int | None = None, restart: bool = False):
+    """
+    Повторная нормализация сохранённых рецептов.
+    Прогресс публикуется в состоянии задачи (PROGRESS); после прерывания
+    или time limit повторный запуск продолжает с последнего записанного чанка.
+    """
+
+    use_case = RenormalizeSourcesUseCase(
+        repository=RecipeSourceRepository(),
+        uow=DjangoUnitOfWork(),
+        chunk_size=chunk_size,
+    )
+
+    progress = use_case.execute(
+        restart=restart,
+        on_progress=lambda p: self.update_state(state="PROGRESS", meta=asdict(p)),
+    )
+
+    return asdict(progress)
+
+
+@shared_task(bind=True, max_retries=3)
+def attach_recipe_thumbnail(self, recipe_id: str, url: str):
+    """
+    Скачивание обложки рецепта и загрузка в хранилище вне транзакции сохранения.
+    Одинаковые картинки хранятся одним файлом (имя — хеш содержимого).
+    Сетевые ошибки и ответы 5xx повторяются с растущей паузой; на остальные
+    ошибки рецепт остаётся без обложки.
+    """
+
+    try:
+        name = ImageService.store_image(url, Recipe._meta.get_field("image"), raise_errors=True)
+    except requests.RequestException as e:
+        response = getattr(e, "response", None)
+        if response is not None and response.status_code < 500:
+            logger.warning("Image not available (%s): %s", response.status_code, url)
+            return
+        if self.request.retries >= self.max_retries:
+            logger.warning("Giving up downloading image %s: %s", url, e)
+            return
+        raise self.retry(
+            exc=e, countdown=settings.IMAGE_RETRY_BACKOFF * 2 ** self.request.retries
+        ) from e
+
+    if name:
+        Recipe.objects.filter(id=recipe_id).update(image=name, image_variants={})
+        generate_recipe_image_variants.delay(recipe_id)
+
+
+@shared_task(bind=True)
+def generate_recipe_image_variants(self, recipe_id: str):
+    """
+    Уменьшенные копии обложки (WebP) для карточек и списков.
+    Запускается один раз после сохранения изображения.
+    """
+
+    recipe = Recipe.objects.filter(id=recipe_id).only("image").first()
+    if not recipe or not recipe.image:
+        return
+
+    variants = ImageService.store_variants(recipe.image.name, Recipe._meta.get_field("image"))
+    # обложку могли заменить, пока строились копии — тогда они уже не нужны
+    Recipe.objects.filter(id=recipe_id, image=recipe.image.name).update(image_variants=variants)
+
@@ -2,10 +2,22 @@ from unittest.mock import patch
 
 import pytest
 from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
+from api.v1.recipe.dto.recipe_dto import IngredientDTO, RecipeDTO, StepDTO
+from api.v1.recipe.repositories.llm_cache_repository import LLMCacheRepository
+from api.v1.recipe.repositories.transcript_repository import TranscriptRepository
 from app.models import StatusChoices
-from recipe.choices import MealType
-from recipe.models import Recipe, RecipeIngredient
+from product.models import Product
+from recipe.choices import MealType, Unit
+from recipe.models import (
+    LLMResponse,
+    Recipe,
+    RecipeIngredient,
+    RecipeSource,
+    VideoTranscript,
+)
 
 
 @pytest.mark.django_db
@@ -42,6 +54,52 @@ class TestRecipeRepository:
         for ing in dto.ingredients:
             assert RecipeIngredient.objects.filter(recipe=recipe, product__name=ing.name).exists()
     
+    @patch("api.v1.recipe.tasks.attach_recipe_thumbnail.delay")
+    def test_thumbnail_is_attached_after_commit(
+            self, mock_delay, repo, owner, recipe_source_api, dto,
+            django_capture_on_commit_callbacks,
+            ):
+        dto.thumbnail = "http://example.com/1.jpg"
+
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            recipe = repo.create_from_dto(dto, user_id=owner.id, source_id=recipe_source_api.id)
+
+        mock_delay.assert_not_called()
+        for callback in callbacks:
+            callback()
+        mock_delay.assert_called_once_with(str(recipe.id), "http://example.com/1.jpg")
+
+    def test_create_from_dto_reuses_similar_products(
+            self, repo, owner, other_user, recipe_source_api, dto
+            ):
+        milk = Product.objects.create(name="молоко", created_by=owner)
+        Product.objects.create(name="яйца", created_by=other_user)
+        dto.ingredients = [
+            IngredientDTO(name="молоко", amount=100, unit=Unit.ML.value),
+            IngredientDTO(name="яйца", amount=2, unit=Unit.PC.value),
+            IngredientDTO(name="яйца", amount=1, unit=Unit.PC.value),
+        ]
+
+        recipe = repo.create_from_dto(dto, user_id=owner.id, source_id=recipe_source_api.id)
+
+        ingredients = list(RecipeIngredient.objects.filter(recipe=recipe).order_by("quantity"))
+        assert len(ingredients) == 3
+        assert ingredients[-1].product_id == milk.id
+        assert ingredients[0].product_id == ingredients[1].product_id
+        assert set(Product.objects.filter(created_by=owner).values_list("name", flat=True)) == {
+            "молоко", "яйца",
+        }
+
+    def test_create_from_dto_query_count_does_not_grow(self, repo, owner, other_user, dto):
+        def queries(user, count):
+            source = RecipeSource.objects.create(url=f"https://example.com/{count}")
+            dto.ingredients = [IngredientDTO(name=f"продукт {i}") for i in range(count)]
+            with CaptureQueriesContext(connection) as context:
+                repo.create_from_dto(dto, user_id=user.id, source_id=source.id)
+            return len(context.captured_queries)
+
+        assert queries(owner, 2) == queries(other_user, 15)
+
     def test_save_raises_if_exists(self, repo, owner, recipe_source, dto):
         Recipe.objects.create(
             source=recipe_source,
@@ -87,4 +145,71 @@ class TestRecipeRepository:
         parsed = repo.get_parsed_data_from_source(recipe_source.id)
         assert parsed == data
         recipe_source.refresh_from_db()
-        assert recipe_source.status == StatusChoices.DONE
\ No newline at end of file
+        assert recipe_source.status == StatusChoices.DONE
+
+
+@pytest.mark.django_db
+class TestTranscriptRepository:
+
+    def test_save_and_get(self):
+        repo = TranscriptRepository()
+        repo.save("Youtube", "abc123", "transcript", "desc", "http://img.jpg")
+
+        dto = repo.get("Youtube", "abc123")
+
+        assert dto.description == "desc transcript"
+        assert dto.thumbnail == "http://img.jpg"
+        assert repo.get("Youtube", "other") is None
+
+    def test_save_overwrites_same_video(self):
+        repo = TranscriptRepository()
+        repo.save("Youtube", "abc123", "old", "desc", None)
+        repo.save("Youtube", "abc123", "new", "desc", None)
+
+        assert VideoTranscript.objects.count() == 1
+        assert repo.get("Youtube", "abc123").description == "desc new"
+
+    def test_get_by_url_resolves_video_id(self):
+        repo = TranscriptRepository()
+        repo.save("Youtube", "dQw4w9WgXcQ", "transcript", "desc", None)
+
+        assert repo.get_by_url("https://youtu.be/dQw4w9WgXcQ") is not None
+        assert repo.get_by_url("https://example.com/recipe") is None
+
+
+@pytest.mark.django_db
+class TestLLMCacheRepository:
+
+    def _dto(self, title="Сырники"):
+        return RecipeDTO(
+            title=title,
+            description=None,
+            meal_type=MealType.BREAKFAST,
+            ingredients=[IngredientDTO(raw="творог 500 г")],
+            steps=[StepDTO(step="Смешать")],
+            tips=None,
+        )
+
+    def test_save_and_get(self):
+        repo = LLMCacheRepository(ttl=60, max_entries=10)
+        repo.save("k1", "llama", "1", self._dto())
+
+        dto = repo.get("k1")
+
+        assert dto == self._dto()
+        assert repo.get("k2") is None
+
+    def test_expired_entry_ignored(self):
+        repo = LLMCacheRepository(ttl=0, max_entries=10)
+        repo.save("k1", "llama", "1", self._dto())
+
+        assert repo.get("k1") is None
+
+    def test_evicts_least_recently_used(self):
+        repo = LLMCacheRepository(ttl=60, max_entries=2)
+        repo.save("k1", "llama", "1", self._dto("1"))
+        repo.save("k2", "llama", "1", self._dto("2"))
+        repo.get("k1")
+        repo.save("k3", "llama", "1", self._dto("3"))
+
+        assert set(LLMResponse.objects.values_list("key", flat=True)) == {"k1", "k3"}
@@ -1,38 +1,180 @@
+import asyncio
+import hashlib
 import json
+import os
+import subprocess
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
 from unittest.mock import MagicMock, Mock, patch
 
+import numpy as np
 import pytest
+import requests
 from bs4 import BeautifulSoup
+from django.core.cache import cache
 from django.core.files.base import ContentFile
+from django.core.files.storage import InMemoryStorage
+from django.db import connection
 from django.forms import ValidationError
-from requests import RequestException
-
+from PIL import Image
+from requests import RequestException, Response, Session
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import RequestHistory
+
+from api.v1.recipe.constants import LLM_PROMPT_VERSION
+from api.v1.recipe.dto.page_dto import CachedResponseDTO
 from api.v1.recipe.dto.recipe_dto import IngredientDTO, RecipeDTO, StepDTO
+from api.v1.recipe.repositories.recipe_repository import RecipeRepository
+from api.v1.recipe.services.extraction_profiles import ExtractionProfileStore
+from api.v1.recipe.services.http_cache import CachingAdapter, HttpCache
+from api.v1.recipe.services.http_client import HttpClient, HttpMetrics, PoliteRetry
 from api.v1.recipe.services.image_service import ImageService
 from api.v1.recipe.services.llm import LLMService
+from api.v1.recipe.services.llm_client import LLMClientPool
+from api.v1.recipe.services.product_matcher import ProductMatcher
+from api.v1.recipe.services.prompt_builder import PromptBuilder
 from api.v1.recipe.services.url_classifier import UrlInfo
-from api.v1.recipe.services.video_parser import VideoParserService
+from api.v1.recipe.services.video_parser import VideoDeferredError, VideoParserService
+from api.v1.recipe.services.web_parser import WebParserService
+from api.v1.recipe.services.whisper_models import WhisperModelManager
+from api.v1.recipe.utils.jsonld import json_ld_blocks
+from api.v1.recipe.utils.trigram import similarity, trigrams
+from product.models import Product
+from product.signals import connect_product_matcher, disconnect_product_matcher
 from recipe.choices import ContentType, MealType, Source, Unit
 
 
 @pytest.mark.django_db
 class TestImageService:
 
-    @patch("api.v1.recipe.services.image_service.requests.get")
+    @staticmethod
+    def image_response(body=b"fake image bytes", content_type="image/jpeg", length=True):
+        response = MagicMock()
+        response.__enter__.return_value = response
+        response.headers = {"Content-Type": content_type}
+        if length:
+            response.headers["Content-Length"] = str(len(body))
+        response.iter_content.return_value = [body[i:i + 4] for i in range(0, len(body), 4)]
+        return response
+
+    @patch("api.v1.recipe.services.image_service.HttpClient.stream")
     def test_download_image_success(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.content = b"fake image bytes"
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
+        mock_get.return_value = self.image_response()
 
-        url = "http://example.com/image.jpg"
+        url = "http://example.com/image"
         content, filename = ImageService.download_image(url)
 
         assert content == b"fake image bytes"
-        assert filename.endswith(".jpg")
-        mock_get.assert_called_once_with(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=10)
+        assert filename == hashlib.sha256(b"fake image bytes").hexdigest() + ".jpg"
+        mock_get.assert_called_once_with(url, timeout=10)
+
+    @patch("api.v1.recipe.services.image_service.HttpClient.stream")
+    def test_download_image_rejects_non_image_before_body(self, mock_get):
+        response = self.image_response(content_type="text/html; charset=utf-8")
+        mock_get.return_value = response
 
-    @patch("api.v1.recipe.services.image_service.requests.get")
+        assert ImageService.download_image("http://example.com/page") == (None, None)
+        response.iter_content.assert_not_called()
+
+    @pytest.mark.parametrize("length", [True, False])
+    @patch("api.v1.recipe.services.image_service.HttpClient.stream")
+    def test_download_image_rejects_too_large(self, mock_get, length, settings):
+        settings.IMAGE_MAX_BYTES = 10
+        mock_get.return_value = self.image_response(length=length)
+
+        assert ImageService.download_image("http://example.com/big.jpg") == (None, None)
+
+    @patch(
+        "api.v1.recipe.services.image_service.HttpClient.stream",
+        side_effect=requests.ConnectionError("reset"),
+    )
+    def test_download_image_raises_network_error_on_request(self, mock_get):
+        url = "http://example.com/1.jpg"
+        assert ImageService.download_image(url) == (None, None)
+
+        with pytest.raises(requests.ConnectionError):
+            ImageService.download_image(url, raise_errors=True)
+
+    @patch("api.v1.recipe.services.image_service.ImageService.download_image")
+    def test_store_image_uploads_same_content_once(self, mock_download):
+        filename = hashlib.sha256(b"bytes").hexdigest() + ".jpg"
+        mock_download.return_value = (b"bytes", filename)
+        field = MagicMock(upload_to="recipes/", storage=InMemoryStorage())
+
+        first = ImageService.store_image("http://a.example.com/1.jpg", field)
+        second = ImageService.store_image("http://b.example.com/2.jpg", field)
+        again = ImageService.store_image("http://a.example.com/1.jpg", field)
+
+        assert first == second == again == f"recipes/{filename[:2]}/{filename}"
+        assert field.storage.listdir(f"recipes/{filename[:2]}")[1] == [filename]
+        assert mock_download.call_count == 2
+
+    @staticmethod
+    def jpeg(width, height):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), "orange").save(buffer, "JPEG")
+        return buffer.getvalue()
+
+    def test_make_variants_downscales_to_webp(self):
+        variants = ImageService.make_variants(self.jpeg(2000, 1000), [160, 480, 1024])
+
+        sizes = {}
+        for width, content in variants.items():
+            with Image.open(BytesIO(content)) as image:
+                assert image.format == "WEBP"
+                sizes[width] = image.size
+        assert sizes == {160: (160, 80), 480: (480, 240), 1024: (1024, 512)}
+
+    def test_make_variants_never_upscales(self):
+        variants = ImageService.make_variants(self.jpeg(300, 200), [160, 480])
+
+        with Image.open(BytesIO(variants[480])) as image:
+            assert image.size == (300, 200)
+
+    def test_make_variants_ignores_broken_image(self):
+        assert ImageService.make_variants(b"not an image", [160]) == {}
+
+    def test_store_variants_next_to_original_once(self, settings):
+        settings.IMAGE_VARIANT_WIDTHS = (160, 480)
+        field = MagicMock(storage=InMemoryStorage())
+        content = self.jpeg(800, 600)
+        digest = hashlib.sha256(content).hexdigest()
+        name = field.storage.save(f"recipes/{digest[:2]}/{digest}.jpg", ContentFile(content))
+
+        with patch.object(
+            ImageService, "make_variants", wraps=ImageService.make_variants
+        ) as mock_make, patch.object(field.storage, "open", wraps=field.storage.open) as mock_open:
+            first = ImageService.store_variants(name, field)
+            second = ImageService.store_variants(name, field)
+
+        assert first == second == {
+            "160": f"recipes/{digest[:2]}/{digest}_160.webp",
+            "480": f"recipes/{digest[:2]}/{digest}_480.webp",
+        }
+        assert mock_make.call_count == 1
+        assert mock_open.call_count == 1
+
+    def test_store_variants_regenerated_for_reupload_under_same_name(self, settings):
+        settings.IMAGE_VARIANT_WIDTHS = (160,)
+        field = MagicMock(storage=InMemoryStorage())
+        name = field.storage.save("recipes/photo.jpg", ContentFile(self.jpeg(800, 600)))
+        first = ImageService.store_variants(name, field)
+
+        # форма загружает новую картинку под тем же именем, хранилище перезаписывает файл
+        field.storage.delete(name)
+        assert field.storage.save(name, ContentFile(self.jpeg(400, 400))) == name
+        second = ImageService.store_variants(name, field)
+
+        assert first["160"] != second["160"]
+        assert first["160"].startswith("recipes/") and second["160"].startswith("recipes/")
+        with field.storage.open(second["160"]) as f, Image.open(f) as image:
+            assert image.size == (160, 160)
+
+    @patch("api.v1.recipe.services.image_service.HttpClient.stream")
     def test_download_image_failure(self, mock_get):
         mock_get.side_effect = Exception("Connection error")
 
@@ -70,9 +212,9 @@ class TestImageService:
 
 class TestLLMService:
 
-    @patch("api.v1.recipe.services.llm.ollama.Client")
+    @patch("api.v1.recipe.services.llm.LLMClientPool.chat")
     @patch("api.v1.recipe.services.llm.repair_json")
-    def test_extract_recipe_success(self, mock_repair_json, mock_client_cls):
+    def test_extract_recipe_success(self, mock_repair_json, mock_chat):
 
         fake_content = json.dumps({
             "title": "Тестовый рецепт",
@@ -84,9 +226,7 @@ class TestLLMService:
             "thumbnail": "http://example.com/image.jpg"
         })
 
-        mock_client = MagicMock()
-        mock_client.chat.return_value = {"message": {"content": fake_content}}
-        mock_client_cls.return_value = mock_client
+        mock_chat.return_value = {"message": {"content": fake_content}}
 
         mock_repair_json.return_value = fake_content
 
@@ -108,9 +248,123 @@ class TestLLMService:
         assert all(isinstance(s, StepDTO) for s in recipe_dto.steps)
         assert recipe_dto.steps[0].step == "Порезать яблоко"
 
-        mock_client.chat.assert_called_once()
+        mock_chat.assert_called_once()
         mock_repair_json.assert_called_once_with(fake_content)
     
+    @patch("api.v1.recipe.services.llm.LLMClientPool.chat")
+    def test_extract_recipe_uses_cache(self, mock_chat):
+        cache = MagicMock()
+        cache.get.return_value = None
+        mock_chat.return_value = {
+            "message": {"content": json.dumps({"title": "Суп"})}
+        }
+
+        service = LLMService(cache=cache)
+        dto = service.extract_recipe("Варим  СУП")
+
+        key = service.cache_key("варим суп")
+        cache.get.assert_called_once_with(key)
+        cache.save.assert_called_once_with(key, service.model or "", LLM_PROMPT_VERSION, dto)
+
+        cache.get.return_value = dto
+        assert service.extract_recipe("варим суп\n") is dto
+        mock_chat.assert_called_once()
+
+    @patch("api.v1.recipe.services.llm.LLMClientPool.chat_stream")
+    def test_stream_stops_when_object_closes(self, mock_stream):
+        pieces = [
+            '```json\n{"title": "Сы', 'рники", "ingredients": [{"raw": "творог"}',
+            ', {"raw": "яйца"}], "steps": []}', "\n```\nНадеюсь, рецепт понравится!",
+        ]
+        consumed = []
+
+        def stream(**kwargs):
+            for piece in pieces:
+                consumed.append(piece)
+                yield {"message": {"content": piece}}
+
+        mock_stream.side_effect = stream
+        progress = []
+
+        dto = LLMService(stream=True).extract_recipe("текст", on_progress=progress.append)
+
+        assert dto.title == "Сырники"
+        assert [i.raw for i in dto.ingredients] == ["творог", "яйца"]
+        assert len(consumed) == 3
+        assert progress[0].title == "Сырники"
+        assert progress[-1].ingredients == 2
+
+    @patch("api.v1.recipe.services.llm.LLMClientPool.achat")
+    def test_long_text_map_reduced(self, mock_achat, settings):
+        settings.LLM_MAX_CTX = 2048
+        parts = [
+            {"title": "Борщ", "ingredients": [{"raw": "свёкла"}, {"raw": "капуста"}]},
+            {"title": None, "ingredients": [{"raw": "Капуста"}, {"raw": "мясо"}]},
+        ]
+        active, peak = 0, 0
+
+        async def fake_chat(model, messages, options):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            first = "Шаг номер 0:" in messages[0]["content"]
+            # первая часть отвечает дольше: порядок частей не должен от этого зависеть
+            await asyncio.sleep(0.01 if first else 0)
+            active -= 1
+            return {"message": {"content": json.dumps(parts[0 if first else 1])}}
+
+        mock_achat.side_effect = fake_chat
+
+        service = LLMService()
+        text = "\n".join(f"Шаг номер {i}: режем овощи очень мелко." for i in range(120))
+        assert len(service.prompts.split(text)) == 2
+
+        dto = service.extract_recipe(text)
+
+        assert dto.title == "Борщ"
+        assert [i.raw for i in dto.ingredients] == ["свёкла", "капуста", "мясо"]
+        assert peak == 2
+        for call in mock_achat.call_args_list:
+            assert call.kwargs["options"]["num_ctx"] <= 2048
+
+    @patch("api.v1.recipe.services.llm.LLMClientPool.achat_stream")
+    def test_long_text_streamed_with_total_progress(self, mock_stream, settings):
+        settings.LLM_MAX_CTX = 2048
+
+        async def stream(model, messages, options):
+            if "Шаг номер 0:" in messages[0]["content"]:
+                pieces = ['{"title": "Борщ", "ingredients": [{"raw": "свёкла"}]}']
+            else:
+                pieces = ['{"ingredients": [{"raw": "мясо"}, ', '{"raw": "лук"}]}']
+            for piece in pieces:
+                await asyncio.sleep(0)
+                yield {"message": {"content": piece}}
+
+        mock_stream.side_effect = stream
+        progress = []
+        service = LLMService(stream=True)
+        text = "\n".join(f"Шаг номер {i}: режем овощи очень мелко." for i in range(120))
+
+        dto = service.extract_recipe(text, on_progress=progress.append)
+
+        assert [i.raw for i in dto.ingredients] == ["свёкла", "мясо", "лук"]
+        assert progress[-1].title == "Борщ"
+        assert progress[-1].ingredients == 3
+
+    @patch("api.v1.recipe.services.llm.LLMClientPool.achat")
+    def test_extract_recipes_keeps_order(self, mock_achat):
+
+        async def fake_chat(model, messages, options):
+            text = messages[0]["content"].strip().splitlines()[-1].strip()
+            await asyncio.sleep(0.01 if text == "first" else 0)
+            return {"message": {"content": json.dumps({"title": text})}}
+
+        mock_achat.side_effect = fake_chat
+
+        dtos = LLMService().extract_recipes(["first", "second"])
+
+        assert [dto.title for dto in dtos] == ["first", "second"]
+
     def test_extract_json_with_backticks(self):
 
         service = LLMService()
@@ -127,6 +381,176 @@ class TestLLMService:
         assert result3 == '{"key": 2}'
 
 
+class TestPromptBuilder:
+
+    def test_compress_strips_filler_and_repeats(self):
+        text = (
+            "Всем привет, с вами канал! Сегодня готовим сырники.\n"
+            "Берём 500 г творога. Берём 500 г творога.\n"
+            "Подписывайтесь на канал! Промокод на скидку 10 процентов в описании.\n"
+            "#сырники #завтрак"
+        )
+
+        assert PromptBuilder(num_predict=700).compress(text) == (
+            "Сегодня готовим сырники.\n"
+            "Берём 500 г творога.\n"
+            "Промокод на скидку 10 процентов в описании."
+        )
+
+    def test_compress_keeps_cooking_sentences_with_filler_words(self):
+        text = (
+            "Mix like and fold the egg whites gently.\n"
+            "Режем перец-колокольчик соломкой.\n"
+            "Don't subscribe to the idea that butter ruins pastry.\n"
+            "Like and subscribe! Спонсор этого видео — сервис доставки.\n"
+            "Субтитры сделал DimaTorzok"
+        )
+
+        assert PromptBuilder(num_predict=700).compress(text) == (
+            "Mix like and fold the egg whites gently.\n"
+            "Режем перец-колокольчик соломкой.\n"
+            "Don't subscribe to the idea that butter ruins pastry."
+        )
+
+    def test_num_ctx_scales_with_prompt(self):
+        builder = PromptBuilder(num_predict=700, max_ctx=8192)
+
+        short = builder.num_ctx(builder.prompt("Омлет из двух яиц."))
+        medium = builder.num_ctx(builder.prompt("Режем лук. " * 100))
+        long = builder.num_ctx(builder.prompt("Режем лук. " * 2000))
+
+        assert short == 1024
+        assert medium == 1536
+        assert long == 8192
+
+    def test_split_fits_budget(self):
+        builder = PromptBuilder(num_predict=700, max_ctx=2048)
+        text = " ".join(["слово"] * 3000)
+
+        chunks = builder.split(text)
+
+        assert len(chunks) > 1
+        assert all(builder.estimate_tokens(chunk) <= builder.text_budget() for chunk in chunks)
+        assert " ".join(chunks).split() == text.split()
+
+    def test_split_long_sentence_fills_budget(self):
+        builder = PromptBuilder(num_predict=700, max_ctx=2048)
+        budget = builder.text_budget()
+        words = ["соль", "salt", "перец", "2", "pepper"] * 2000
+
+        chunks = list(builder._pieces(" ".join(words), budget))
+
+        assert " ".join(chunks).split() == words
+        for chunk, following in zip(chunks, chunks[1:], strict=False):
+            assert builder.estimate_tokens(chunk) <= budget
+            next_word = following.split()[0]
+            assert builder.estimate_tokens(f"{chunk} {next_word}") > budget
+
+
+class TestLLMClientPool:
+
+    @pytest.fixture(autouse=True)
+    def fresh_pool(self, settings):
+        settings.LLM_MAX_PARALLEL = 2
+        LLMClientPool.reset()
+        yield
+        LLMClientPool.reset()
+
+    @patch("api.v1.recipe.services.llm_client.ollama.Client")
+    def test_client_shared(self, mock_client_cls):
+        assert LLMClientPool.client() is LLMClientPool.client()
+        mock_client_cls.assert_called_once()
+
+    @patch("api.v1.recipe.services.llm_client.ollama.Client")
+    def test_chat_concurrency_limited(self, mock_client_cls):
+        active, peak = 0, 0
+        lock = threading.Lock()
+
+        def slow_chat(**kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return {}
+
+        mock_client_cls.return_value.chat.side_effect = slow_chat
+
+        threads = [threading.Thread(target=LLMClientPool.chat) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak == 2
+
+    @patch("api.v1.recipe.services.llm_client.ollama.AsyncClient")
+    def test_achat_concurrency_limited(self, mock_client_cls):
+        active, peak = 0, 0
+
+        async def slow_chat(**kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return {}
+
+        mock_client_cls.return_value.chat.side_effect = slow_chat
+
+        async def run():
+            await asyncio.gather(*(LLMClientPool.achat() for _ in range(6)))
+
+        asyncio.run(run())
+
+        assert peak == 2
+        mock_client_cls.assert_called_once()
+
+    @patch("api.v1.recipe.services.llm_client.ollama.Client")
+    def test_slots_shared_between_processes(self, mock_client_cls):
+        # оба слота сервера заняты другими процессами
+        for key in LLMClientPool._slot_keys():
+            cache.add(key, 1)
+        waits = []
+
+        def sleep(seconds):
+            waits.append(seconds)
+            cache.delete(LLMClientPool._slot_keys()[1])
+
+        mock_client_cls.return_value.chat.return_value = {"message": {}}
+
+        with patch("api.v1.recipe.services.llm_client.time.sleep", side_effect=sleep):
+            LLMClientPool.chat(model="m")
+
+        assert len(waits) == 1
+        mock_client_cls.return_value.chat.assert_called_once_with(model="m")
+        # слот свободен после ответа, чужой слот не тронут
+        assert cache.get(LLMClientPool._slot_keys()[1]) is None
+        assert cache.get(LLMClientPool._slot_keys()[0]) == 1
+
+    @patch("api.v1.recipe.services.llm_client.ollama.AsyncClient")
+    def test_achat_waits_for_shared_slot(self, mock_client_cls, settings):
+        settings.LLM_MAX_PARALLEL = 1
+        LLMClientPool.reset()
+        cache.add(LLMClientPool._slot_keys()[0], 1)
+
+        async def chat(**kwargs):
+            return {"message": {}}
+
+        mock_client_cls.return_value.chat.side_effect = chat
+
+        async def run():
+            task = asyncio.create_task(LLMClientPool.achat())
+            await asyncio.sleep(0.05)
+            assert not task.done()
+            await cache.adelete(LLMClientPool._slot_keys()[0])
+            return await asyncio.wait_for(task, 1)
+
+        assert asyncio.run(run()) == {"message": {}}
+
+
 class TestUrlClassifier:
 
     @pytest.mark.parametrize(
@@ -149,7 +573,7 @@ class TestUrlClassifier:
         assert info.final_url  
         assert info.domain 
 
-    @patch("api.v1.recipe.services.url_classifier.requests.head")
+    @patch("api.v1.recipe.services.url_classifier.HttpClient.head")
     def test_redirect_domains(self, mock_head, classifier):
         # Мок для редиректа TikTok URL
         mock_response = Mock()
@@ -170,7 +594,7 @@ class TestUrlClassifier:
         assert info.final_url == ""
         assert info.domain == ""
 
-    @patch("api.v1.recipe.services.url_classifier.requests.head")
+    @patch("api.v1.recipe.services.url_classifier.HttpClient.head")
     def test_request_exception_returns_original_url(self, mock_head, classifier):
         # Мок выбрасывает RequestException
         from requests.exceptions import RequestException
@@ -200,17 +624,17 @@ class TestUrlClassifier:
 class TestVideoParserService:
 
     @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
-    @patch("api.v1.recipe.services.video_parser.os.path.exists", return_value=True)
-    @patch("api.v1.recipe.services.video_parser.os.remove")
+    @patch("api.v1.recipe.services.video_parser.subprocess.run")
     @patch.object(VideoParserService, "get_model")
-    def test_parse_success(self, mock_model, mock_remove, mock_exists, mock_ydl, video_parser):
+    def test_parse_success(self, mock_model, mock_run, mock_ydl, video_parser):
   
         mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
         mock_ydl_instance.extract_info.return_value = {
             "description": "Video description",
             "thumbnail": "http://example.com/thumb.jpg",
-            "requested_downloads": [{"filepath": "/tmp/audio.mp3"}]
+            "url": "http://cdn.example.com/audio.m4a",
         }
+        mock_run.return_value = MagicMock(stdout=b"\x00\x40" * 16000)
 
         mock_transcription = MagicMock()
         mock_transcription.transcribe.return_value = ([MagicMock(text="Hello world")], None)
@@ -224,38 +648,280 @@ class TestVideoParserService:
         assert "Hello world" in result.description
         assert result.thumbnail == "http://example.com/thumb.jpg"
 
-        mock_remove.assert_called_with("/tmp/audio.mp3")
+        mock_ydl_instance.extract_info.assert_called_once_with(url, download=False)
+        audio = mock_transcription.transcribe.call_args.args[0]
+        assert audio.dtype == np.float32
+        assert len(audio) == 16000
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    @patch("api.v1.recipe.services.video_parser.subprocess.run")
+    def test_parse_decoding_error(self, mock_run, mock_ydl, video_parser):
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {"url": "http://cdn.example.com/a.m4a"}
+        mock_run.side_effect = subprocess.CalledProcessError(1, "ffmpeg", stderr=b"404")
 
-    @patch("api.v1.recipe.services.video_parser.os.path.exists", return_value=False)
-    def test_parse_missing_audio(self, mock_exists, video_parser):
-        with pytest.raises(FileNotFoundError):
+        with pytest.raises(RuntimeError):
             video_parser.parse("http://youtube.com/fakevideo")
 
     @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
-    def test_extract_audio_and_description(self, mock_ydl, video_parser):
+    @patch.object(VideoParserService, "_decode_audio")
+    def test_extract_audio_and_description(self, mock_decode, mock_ydl, video_parser):
 
         mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
         mock_ydl_instance.extract_info.return_value = {
             "description": "desc",
             "thumbnail": "thumb",
-            "requested_downloads": [{"filepath": "/tmp/audio.mp3"}]
+            "url": "http://cdn.example.com/audio.m4a",
         }
+        mock_decode.return_value = np.zeros(10, dtype=np.float32)
 
-        audio_path, desc, thumb = video_parser._extract_audio_and_description("url")
-        assert audio_path == "/tmp/audio.mp3"
+        audio, desc, thumb = video_parser._extract_audio_and_description("url")
+        assert len(audio) == 10
         assert desc == "desc"
         assert thumb == "thumb"
 
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    @patch.object(VideoParserService, "_decode_audio")
+    @patch.object(VideoParserService, "get_model")
+    def test_parse_skips_audio_when_description_has_recipe(
+        self, mock_model, mock_decode, mock_ydl, video_parser
+    ):
+        description = (
+            "Сырники на завтрак\n"
+            "Ингредиенты:\n"
+            "✅ Творог 500 г\n"
+            "✅ 2 яйца\n"
+            "✅ Сахар 3 ст. л.\n"
+            "- соль по вкусу\n"
+            "#сырники"
+        )
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {
+            "description": description,
+            "thumbnail": "thumb",
+            "url": "http://cdn.example.com/audio.m4a",
+        }
+
+        result = video_parser.parse("http://youtube.com/fakevideo")
+
+        assert result.description == description
+        mock_decode.assert_not_called()
+        mock_model.assert_not_called()
+
+    @patch("api.v1.recipe.services.video_parser.subprocess.run")
+    def test_decode_audio_pipes_16k_mono_pcm(self, mock_run, video_parser):
+        mock_run.return_value = MagicMock(stdout=b"\x00\x00" * 4)
+
+        audio = video_parser._decode_audio(
+            {"url": "http://cdn/audio.m4a", "acodec": "mp4a", "http_headers": {"User-Agent": "UA"}}
+        )
+
+        command = mock_run.call_args.args[0]
+        assert command[command.index("-i") + 1] == "http://cdn/audio.m4a"
+        assert command[command.index("-ar") + 1] == "16000"
+        assert command[command.index("-ac") + 1] == "1"
+        assert command[command.index("-headers") + 1] == "User-Agent: UA\r\n"
+        assert command[-1] == "pipe:1"
+        assert len(audio) == 4
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    def test_probe_picks_audio_stream_without_download(self, mock_ydl, video_parser):
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {
+            "description": "desc",
+            "thumbnail": "thumb",
+            "duration": 95,
+            "requested_formats": [
+                {"url": "http://cdn/video.mp4", "acodec": "none"},
+                {"url": "http://cdn/audio.m4a", "acodec": "mp4a"},
+            ],
+        }
+
+        probe = video_parser.probe("url")
+
+        assert probe.duration == 95
+        assert probe.audio_format["url"] == "http://cdn/audio.m4a"
+        mock_ydl_instance.extract_info.assert_called_once_with("url", download=False)
+        assert mock_ydl.call_args.args[0]["format"] == VideoParserService.AUDIO_FORMAT
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    def test_probe_skips_formats_without_url(self, mock_ydl, video_parser):
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {
+            "requested_formats": [
+                {"acodec": "none", "url": "http://cdn/video.mp4"},
+                {"acodec": "opus", "fragments": [{"path": "seg-1"}]},
+            ],
+            "formats": [
+                {"acodec": "opus", "fragments": [{"path": "seg-1"}]},
+                {"acodec": "mp4a", "url": "http://cdn/audio.m3u8"},
+            ],
+        }
+
+        probe = video_parser.probe("url")
+
+        assert probe.audio_format["url"] == "http://cdn/video.mp4"
+
+        mock_ydl_instance.extract_info.return_value["requested_formats"][0]["url"] = None
+        assert video_parser.probe("url").audio_format["url"] == "http://cdn/audio.m3u8"
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    @patch.object(VideoParserService, "_decode_audio")
+    def test_no_readable_audio_format_rejected(self, mock_decode, mock_ydl, video_parser):
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {
+            "description": "Очень вкусно",
+            "duration": 60,
+            "requested_formats": [{"acodec": "opus", "fragments": [{"path": "seg-1"}]}],
+        }
+
+        with pytest.raises(ValidationError, match="аудиодорожку"):
+            video_parser.parse("url")
+
+        mock_decode.assert_not_called()
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    @patch.object(VideoParserService, "_decode_audio")
+    def test_too_long_video_rejected_before_download(
+        self, mock_decode, mock_ydl, video_parser, settings
+    ):
+        settings.VIDEO_MAX_DURATION = 60 * 60
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {"description": "", "duration": 3 * 60 * 60}
+
+        with pytest.raises(ValidationError):
+            video_parser._extract_audio_and_description("url")
+
+        mock_decode.assert_not_called()
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    @patch.object(VideoParserService, "_decode_audio")
+    def test_long_video_deferred_to_long_queue(self, mock_decode, mock_ydl, settings):
+        settings.VIDEO_LONG_DURATION = 20 * 60
+        settings.VIDEO_LONG_QUEUE = "video_long"
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {
+            "description": "",
+            "duration": 30 * 60,
+            "url": "http://cdn/audio.m4a",
+        }
+
+        with pytest.raises(VideoDeferredError) as exc:
+            VideoParserService(queue="video")._extract_audio_and_description("url")
+        assert exc.value.queue == "video_long"
+        mock_decode.assert_not_called()
+
+        mock_decode.return_value = np.zeros(10, dtype=np.float32)
+        audio, _, _ = VideoParserService(
+            queue="video_long"
+        )._extract_audio_and_description("url")
+        assert len(audio) == 10
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    def test_parse_returns_cached_transcript(self, mock_ydl):
+        transcripts = MagicMock()
+        cached = RecipeDTO(
+            title="Без названия", description="desc text", meal_type=None,
+            ingredients=[], steps=[], tips=None,
+        )
+        transcripts.get.return_value = cached
+
+        result = VideoParserService(transcripts=transcripts).parse(
+            "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        )
+
+        assert result is cached
+        transcripts.get.assert_called_once_with("Youtube", "dQw4w9WgXcQ")
+        mock_ydl.assert_not_called()
+
+    @patch("api.v1.recipe.services.video_parser.yt_dlp.YoutubeDL")
+    @patch.object(VideoParserService, "_decode_audio")
+    @patch.object(VideoParserService, "get_model")
+    def test_parse_saves_transcript(self, mock_model, mock_decode, mock_ydl):
+        transcripts = MagicMock()
+        transcripts.get.return_value = None
+
+        mock_ydl_instance = mock_ydl.return_value.__enter__.return_value
+        mock_ydl_instance.extract_info.return_value = {
+            "description": "desc",
+            "thumbnail": "thumb",
+            "url": "http://cdn/audio.m4a",
+        }
+        mock_model.return_value.transcribe.return_value = ([MagicMock(text="text")], None)
+
+        VideoParserService(transcripts=transcripts).parse("https://youtu.be/dQw4w9WgXcQ")
+
+        transcripts.save.assert_called_once_with("Youtube", "dQw4w9WgXcQ", "text", "desc", "thumb")
+
     def test_transcribe_audio_calls_model(self, video_parser):
 
         mock_model = MagicMock()
         mock_model.transcribe.return_value = ([MagicMock(text="text")], None)
 
         with patch.object(VideoParserService, "get_model", return_value=mock_model):
-            text = video_parser._transcribe_audio("/tmp/audio.mp3")
+            text = video_parser._transcribe_audio(np.zeros(16000, dtype=np.float32))
             assert "text" in text
 
 
+    @patch("api.v1.recipe.services.video_parser.get_speech_timestamps")
+    def test_transcribe_long_audio_in_ordered_chunks(self, mock_vad, video_parser, settings):
+        settings.WHISPER_MODELS = {"default": {"num_workers": 3}}
+        video_parser.CHUNKED_MIN_SECONDS = 0
+        video_parser.CHUNK_SECONDS = 0.5
+
+        rate = video_parser.SAMPLE_RATE
+        audio = np.concatenate([np.full(rate, value, dtype=np.float32) for value in (1, 2, 3)])
+        mock_vad.return_value = [
+            {"start": 0, "end": rate - 10},
+            {"start": rate + 10, "end": 2 * rate - 10},
+            {"start": 2 * rate + 10, "end": 3 * rate},
+        ]
+
+        mock_model = MagicMock()
+        mock_model.transcribe.side_effect = lambda chunk, **kwargs: (
+            [MagicMock(text=f"part{int(chunk[0])}")], None
+        )
+
+        with patch.object(VideoParserService, "get_model", return_value=mock_model):
+            text = video_parser._transcribe_audio(audio)
+
+        assert text == "part1 part2 part3"
+        assert mock_model.transcribe.call_count == 3
+
+    @patch("api.v1.recipe.services.video_parser.get_speech_timestamps")
+    def test_chunked_transcript_matches_sequential(self, mock_vad, video_parser, settings):
+        video_parser.CHUNKED_MIN_SECONDS = 2
+        video_parser.CHUNK_SECONDS = 1
+
+        rate = video_parser.SAMPLE_RATE
+        pause = np.zeros(rate // 4, dtype=np.float32)
+        words = [np.full(rate // 2, value, dtype=np.float32) for value in (1, 2, 3, 4, 5)]
+        audio = np.concatenate([part for word in words for part in (word, pause)])
+
+        def speech(chunk, *args, **kwargs):
+            voiced = np.flatnonzero(np.diff(np.concatenate([[0], chunk != 0, [0]])))
+            bounds = zip(voiced[::2], voiced[1::2], strict=True)
+            return [{"start": int(start), "end": int(end)} for start, end in bounds]
+
+        def transcribe(chunk, **kwargs):
+            return [MagicMock(text=f"w{int(chunk[seg['start']])}") for seg in speech(chunk)], None
+
+        mock_vad.side_effect = speech
+        mock_model = MagicMock()
+        mock_model.transcribe.side_effect = transcribe
+
+        with patch.object(VideoParserService, "get_model", return_value=mock_model):
+            settings.WHISPER_MODELS = {"default": {"num_workers": 1}}
+            sequential = video_parser._transcribe_audio(audio)
+            assert mock_model.transcribe.call_count == 1
+
+            settings.WHISPER_MODELS = {"default": {"num_workers": 2}}
+            stitched = video_parser._transcribe_audio(audio)
+
+        assert stitched == sequential == "w1 w2 w3 w4 w5"
+        assert mock_model.transcribe.call_count > 2
+
+
 class TestWebParserService:
 
     @patch("api.v1.recipe.services.web_parser.requests.Session.get")
@@ -278,6 +944,8 @@ class TestWebParserService:
         """
 
         mock_response = MagicMock()
+        mock_response.url = "http://example.com"
+        mock_response.headers = {}
         mock_response.content = html.encode()
         mock_response.raise_for_status = MagicMock()
         mock_get.return_value = mock_response
@@ -320,6 +988,8 @@ class TestWebParserService:
         mock_selectors.STRUCTURED_DATA_SELECTORS = []
 
         mock_response = MagicMock()
+        mock_response.url = "http://example.com"
+        mock_response.headers = {}
         mock_response.content = html.encode()
         mock_response.raise_for_status = MagicMock()
         mock_get.return_value = mock_response
@@ -333,17 +1003,201 @@ class TestWebParserService:
         assert result.thumbnail.endswith("image.jpg")
 
 
-    def test_extract_structured_data_invalid_json(self, web_parser):
+    @patch("api.v1.recipe.services.web_parser.requests.Session.get")
+    def test_validate_then_parse_fetches_once(self, mock_get, web_parser):
         html = """
+        <html>
+            <script type="application/ld+json">
+            {"@type": "Recipe", "name": "Pancakes", "recipeIngredient": ["1 egg"]}
+            </script>
+        </html>
+        """
+
+        mock_response = MagicMock()
+        mock_response.url = "http://example.com/pancakes"
+        mock_response.headers = {"ETag": '"v1"'}
+        mock_response.content = html.encode()
+        mock_get.return_value = mock_response
+
+        page = web_parser.validate_url("http://example.com/pancakes")
+        result = WebParserService().parse("http://example.com/pancakes")
+
+        mock_get.assert_called_once()
+        assert page.etag == '"v1"'
+        assert result.title == "Pancakes"
+
+
+    def test_extract_structured_data_invalid_json(self, web_parser):
+        html = b"""
         <script type="application/ld+json">
             { invalid json }
         </script>
         """
-        soup = BeautifulSoup(html, "html.parser")
-        result = web_parser._extract_structured_data(soup)
+        result = web_parser._extract_structured_data(json_ld_blocks(html))
         assert result == {}
 
 
+    @patch("api.v1.recipe.services.web_parser.parse_html")
+    @patch("api.v1.recipe.services.web_parser.requests.Session.get")
+    def test_complete_json_ld_skips_dom(self, mock_get, mock_parse_html, web_parser):
+        html = """
+        <html><head><script type="application/ld+json">
+        {"@context": "https://schema.org", "@graph": [
+            {"@type": "WebPage", "name": "Page"},
+            {"@type": ["Recipe"], "name": "Блины",
+             "image": {"url": "/img/blini.jpg"},
+             "recipeIngredient": ["Мука 200 г"],
+             "recipeInstructions": [
+                {"@type": "HowToSection", "itemListElement": [
+                    {"text": "Смешать"}, {"text": "Пожарить"}
+                ]}
+             ]}
+        ]}
+        </script></head><body><h1>Другой заголовок</h1></body></html>
+        """
+        mock_response = MagicMock()
+        mock_response.url = "http://example.com/blini"
+        mock_response.headers = {"Content-Type": "text/html; charset=utf-8"}
+        mock_response.content = html.encode()
+        mock_get.return_value = mock_response
+
+        web_parser.validate_url("http://example.com/blini")
+        result = web_parser.parse("http://example.com/blini")
+
+        mock_parse_html.assert_not_called()
+        assert result.title == "Блины"
+        assert [s.step for s in result.steps] == ["Смешать", "Пожарить"]
+        assert result.thumbnail == "http://example.com/img/blini.jpg"
+
+
+    @patch("api.v1.recipe.services.web_parser.requests.Session.get")
+    def test_incomplete_json_ld_falls_back_to_selectors(self, mock_get, web_parser):
+        html = """
+        <html>
+            <script type="application/ld+json">
+            [{"@type": "Recipe", "name": "Soup", "recipeIngredient": ["Water"]}]
+            </script>
+            <ul class="instructions"><li><p>Boil water</p></li></ul>
+            <img class="recipe wp-post-image" src="/soup.jpg"/>
+        </html>
+        """
+        mock_response = MagicMock()
+        mock_response.url = "http://example.com/soup"
+        mock_response.headers = {}
+        mock_response.content = html.encode()
+        mock_get.return_value = mock_response
+
+        result = web_parser.parse("http://example.com/soup")
+
+        assert result.title == "Soup"
+        assert [i.raw for i in result.ingredients] == ["Water"]
+        assert [s.step for s in result.steps] == ["Boil water"]
+        assert result.thumbnail == "http://example.com/soup.jpg"
+
+
+    @patch("api.v1.recipe.services.web_parser.SelectorIndex")
+    @patch("api.v1.recipe.services.web_parser.requests.Session.get")
+    def test_domain_profile_tried_first(self, mock_get, mock_index, web_parser):
+        from api.v1.recipe.utils.html import SelectorIndex
+
+        mock_index.side_effect = SelectorIndex
+        page = """
+        <html>
+            <h1 class="entry-title">{title}</h1>
+            <ul class="ingredients"><li><span>Вода</span></li></ul>
+            <ul class="instructions"><li><p>Сварить</p></li></ul>
+        </html>
+        """
+        mock_response = MagicMock()
+        mock_response.headers = {}
+        mock_get.return_value = mock_response
+
+        mock_response.url = "https://www.example.com/soup"
+        mock_response.content = page.format(title="Суп").encode()
+        web_parser.parse("https://www.example.com/soup")
+
+        store = web_parser.profile_store
+        profile = store.get("example.com")
+        assert profile["title"] == [1]
+        assert store.stats().cold == 3
+
+        mock_response.url = "https://example.com/borscht"
+        mock_response.content = page.format(title="Борщ").encode()
+        result = WebParserService().parse("https://example.com/borscht")
+
+        assert result.title == "Борщ"
+        assert [s.step for s in result.steps] == ["Сварить"]
+        first_groups = mock_index.call_args.args[1]
+        assert ('h1[class*="title"]',) in first_groups
+        assert (".ingredients li",) in first_groups
+        assert store.stats().hits == 3
+
+
+    @patch("api.v1.recipe.services.web_parser.requests.Session.get")
+    def test_json_ld_fields_not_counted_as_profile_hits(self, mock_get, web_parser):
+        mock_response = MagicMock()
+        mock_response.url = "http://example.com/soup"
+        mock_response.headers = {}
+        mock_response.content = b"""
+        <html>
+            <script type="application/ld+json">
+            [{"@type": "Recipe", "name": "Soup", "recipeIngredient": ["Water"]}]
+            </script>
+            <ul class="instructions"><li><p>Boil water</p></li></ul>
+        </html>
+        """
+        mock_get.return_value = mock_response
+
+        web_parser.parse("http://example.com/soup")
+        WebParserService().parse("http://example.com/soup")
+
+        stats = web_parser.profile_store.stats()
+        assert stats.json_ld == 4
+        assert (stats.hits, stats.misses, stats.cold) == (1, 0, 1)
+        assert stats.hit_rate == 0.5
+
+
+    @patch("api.v1.recipe.services.web_parser.requests.Session.get")
+    def test_domain_profile_miss_falls_back(self, mock_get, web_parser):
+        web_parser.profile_store.put("example.com", {"title": [3], "steps": "numbered"})
+        mock_response = MagicMock()
+        mock_response.url = "http://example.com/soup"
+        mock_response.headers = {}
+        mock_response.content = b"""
+        <html>
+            <h1 class="recipe-title">Soup</h1>
+            <ul class="instructions"><li><p>Boil water</p></li></ul>
+        </html>
+        """
+        mock_get.return_value = mock_response
+
+        result = web_parser.parse("http://example.com/soup")
+
+        assert result.title == "Soup"
+        assert [s.step for s in result.steps] == ["Boil water"]
+        profile = web_parser.profile_store.get("example.com")
+        assert profile["title"] == [0]
+        assert isinstance(profile["steps"], list)
+        assert web_parser.profile_store.stats().misses == 2
+
+
+    @pytest.mark.parametrize(
+        "block, message",
+        [
+            (
+                '{"@graph": [{"@type": "Recipe", "name": "A"}, {"@type": "Recipe", "name": "B"}]}',
+                "несколькими рецептами",
+            ),
+            ('{"@type": "ItemList", "itemListElement": []}', "списком рецептов"),
+        ],
+    )
+    def test_validate_structured_data_rejects(self, web_parser, block, message):
+        blocks = json_ld_blocks(f'<script type="application/ld+json">{block}</script>'.encode())
+
+        with pytest.raises(ValidationError, match=message):
+            web_parser._validate_structured_data(blocks)
+
+
     @patch("api.v1.recipe.services.web_parser.requests.Session.get")
     def test_parse_request_exception(self, mock_get, web_parser):
         mock_get.side_effect = RequestException("Network error")
@@ -427,6 +1281,283 @@ class TestWebParserService:
         assert web_parser._clean_text(text) == "Hello world"
 
 
+class TestHttpCache:
+
+    @staticmethod
+    def response(request, status=200, headers=None, body=b""):
+        response = Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers or {})
+        response.url = request.url
+        response.request = request
+        response._content = body
+        response._content_consumed = True
+        return response
+
+    @staticmethod
+    def session(tmp_path, max_bytes=10**6):
+        session = Session()
+        session.mount("http://", CachingAdapter(HttpCache(tmp_path, max_bytes)))
+        return session
+
+    @patch.object(HTTPAdapter, "send")
+    def test_fresh_response_served_without_request(self, mock_send, tmp_path):
+        mock_send.side_effect = lambda request, **kwargs: self.response(
+            request, headers={"Cache-Control": "max-age=600"}, body=b"<html>pancakes</html>"
+        )
+        session = self.session(tmp_path)
+
+        first = session.get("http://example.com/pancakes")
+        second = session.get("http://example.com/pancakes")
+
+        mock_send.assert_called_once()
+        assert first.from_cache is False
+        assert second.from_cache is True
+        assert second.status_code == 200
+        assert second.text == "<html>pancakes</html>"
+
+    @patch.object(HTTPAdapter, "send")
+    def test_stale_response_revalidated(self, mock_send, tmp_path):
+        sent = []
+
+        def send(request, **kwargs):
+            sent.append(dict(request.headers))
+            if len(sent) == 1:
+                return self.response(
+                    request,
+                    headers={
+                        "Cache-Control": "no-cache",
+                        "ETag": '"v1"',
+                        "Last-Modified": "Wed, 01 Oct 2025 10:00:00 GMT",
+                    },
+                    body=b"<html>soup</html>",
+                )
+            return self.response(request, status=304, headers={"ETag": '"v1"'})
+
+        mock_send.side_effect = send
+        session = self.session(tmp_path)
+
+        session.get("http://example.com/soup")
+        result = session.get("http://example.com/soup")
+
+        assert sent[1]["If-None-Match"] == '"v1"'
+        assert sent[1]["If-Modified-Since"] == "Wed, 01 Oct 2025 10:00:00 GMT"
+        assert result.from_cache is True
+        assert result.status_code == 200
+        assert result.content == b"<html>soup</html>"
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"Cache-Control": "no-store", "ETag": '"v1"'},
+            {"Cache-Control": "max-age=600", "Vary": "*"},
+            {},
+        ],
+    )
+    @patch.object(HTTPAdapter, "send")
+    def test_uncacheable_response_not_stored(self, mock_send, headers, tmp_path):
+        mock_send.side_effect = lambda request, **kwargs: self.response(
+            request, headers=headers, body=b"page"
+        )
+        session = self.session(tmp_path)
+
+        session.get("http://example.com/page")
+        session.get("http://example.com/page")
+
+        assert mock_send.call_count == 2
+
+    def test_entry_compressed_on_disk(self, tmp_path):
+        cache = HttpCache(tmp_path, 10**6)
+        body = b"<li><span>Flour 200 g</span></li>" * 1000
+        key = HttpCache.key("http://example.com/big")
+
+        cache.put(key, CachedResponseDTO(
+            url="http://example.com/big", status=200, reason="OK", body=body, stored_at=1.0,
+        ))
+
+        assert (tmp_path / key[:2] / key).stat().st_size < len(body) // 10
+        assert cache.get(key).body == body
+
+    def test_evicts_least_recently_read(self, tmp_path):
+        cache = HttpCache(tmp_path, 10**6)
+        keys = [HttpCache.key(f"http://example.com/{n}") for n in range(3)]
+        for n, key in enumerate(keys):
+            cache.put(key, CachedResponseDTO(
+                url="", status=200, reason="OK", body=bytes(range(256)) * 8, stored_at=0.0,
+            ))
+            os.utime(tmp_path / key[:2] / key, (n, n))
+
+        cache.max_bytes = (tmp_path / keys[0][:2] / keys[0]).stat().st_size * 5 // 2
+        cache.evict()
+
+        assert cache.get(keys[0]) is None
+        assert cache.get(keys[1]) is not None
+        assert cache.get(keys[2]) is not None
+
+
+class TestHttpClient:
+
+    @pytest.fixture
+    def server(self, settings):
+        settings.HTTP_CACHE_ENABLED = False
+        self.requests = 0
+        self.statuses = []
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(handler):
+                self.requests += 1
+                status = self.statuses.pop(0) if self.statuses else 200
+                handler.send_response(status)
+                if status == 429:
+                    handler.send_header("Retry-After", "1")
+                handler.send_header("Cache-Control", "max-age=60")
+                handler.send_header("Content-Length", "2")
+                handler.end_headers()
+                handler.wfile.write(b"ok")
+
+            def log_message(handler, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        HttpClient.reset()
+        HttpMetrics.reset()
+        yield f"http://127.0.0.1:{server.server_port}"
+        HttpClient.reset()
+        server.shutdown()
+        server.server_close()
+
+    def test_connection_reused_and_timed(self, server):
+        for path in ("/a", "/b", "/c"):
+            assert HttpClient.get(server + path, timeout=5).text == "ok"
+
+        HttpMetrics.flush()
+        timings = HttpMetrics.stats()["127.0.0.1"]
+        assert timings["connect"].count == 1
+        assert timings["ttfb"].count == 3
+        assert "tls" not in timings
+
+    def test_metrics_flushed_to_shared_cache_by_interval(self, settings):
+        settings.HTTP_METRICS_FLUSH_INTERVAL = 0
+        HttpMetrics.observe("example.com", "ttfb", 0.25)
+        HttpMetrics.observe("example.com", "ttfb", 0.75)
+
+        timing = HttpMetrics.stats()["example.com"]["ttfb"]
+        assert (timing.count, timing.avg) == (2, pytest.approx(0.5))
+
+    def test_cache_hits_do_not_spend_rate_limit(self, server, settings, tmp_path):
+        settings.HTTP_CACHE_ENABLED = True
+        settings.HTTP_CACHE_DIR = tmp_path
+        settings.HTTP_HOST_RATE_LIMIT = 1
+        settings.HTTP_HOST_RATE_PERIOD = 3600
+        HttpClient.reset()
+
+        with patch(
+            "api.v1.recipe.services.http_client.time.sleep",
+            side_effect=AssertionError("cache hit waited for the rate window"),
+        ):
+            responses = [HttpClient.get(server + "/page", timeout=5) for _ in range(3)]
+
+        window = int(time.time() // 3600)
+        assert [response.from_cache for response in responses] == [False, True, True]
+        assert self.requests == 1
+        assert cache.get(f"http-client:rate:127.0.0.1:{window}") == 1
+
+    def test_rate_limit_waits_for_next_window(self, settings):
+        settings.HTTP_HOST_RATE_LIMIT = 2
+        settings.HTTP_HOST_RATE_PERIOD = 1
+        clock = [1000.25]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with patch("api.v1.recipe.services.http_client.time.time", lambda: clock[0]), \
+                patch("api.v1.recipe.services.http_client.time.sleep", side_effect=sleep):
+            for _ in range(3):
+                HttpClient._wait_turn("example.com")
+            HttpClient._wait_turn("other.example.com")
+
+        assert clock[0] == 1001.0
+
+    def test_retry_takes_new_turn_and_sleeps_without_slot(self, server, settings):
+        settings.HTTP_HOST_RATE_LIMIT = 0
+        settings.HTTP_HOST_MAX_CONCURRENCY = 1
+        HttpClient.reset()
+        self.statuses = [429, 503]
+        events = []
+
+        def sleep(seconds):
+            semaphore = HttpClient._semaphores["127.0.0.1"]
+            events.append(("sleep", seconds, semaphore.acquire(blocking=False)))
+            semaphore.release()
+
+        with patch.object(
+            HttpClient, "_wait_turn", side_effect=lambda host: events.append("turn")
+        ), patch("api.v1.recipe.services.http_client.time.sleep", side_effect=sleep):
+            response = HttpClient.get(server + "/busy", timeout=5)
+
+        assert response.status_code == 200
+        assert self.requests == 3
+        assert events == [
+            "turn", ("sleep", 1, True), "turn", ("sleep", settings.HTTP_RETRY_BACKOFF * 2, True),
+            "turn",
+        ]
+
+    def test_forked_child_drops_parent_metrics(self, settings):
+        settings.HTTP_METRICS_FLUSH_INTERVAL = 3600
+        HttpMetrics.observe("example.com", "ttfb", 0.1)
+
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if not HttpMetrics._pending else 1)
+        _, status = os.waitpid(pid, 0)
+
+        assert os.waitstatus_to_exitcode(status) == 0
+        assert HttpMetrics._pending
+        HttpMetrics.reset()
+
+    def test_retry_backoff_grows_from_first_retry(self, settings):
+        settings.HTTP_RETRY_AFTER_MAX = 5
+        retry = PoliteRetry(total=3, backoff_factor=0.5)
+        failure = RequestHistory("GET", "/", None, 429, None)
+
+        assert retry.get_backoff_time() == 0
+        assert retry.new(history=(failure,)).get_backoff_time() == 0.5
+        assert retry.new(history=(failure, failure)).get_backoff_time() == 1.0
+
+        response = Mock(headers={"Retry-After": "120"})
+        assert retry.get_retry_after(response) == 5
+
+
+class TestExtractionProfileStore:
+
+    def test_stats_accumulate_across_records(self):
+        store = ExtractionProfileStore()
+
+        store.record(Counter(hit=3, cold=1))
+        store.record(Counter(hit=1, miss=1, cold=1))
+        stats = store.stats()
+
+        assert (stats.hits, stats.misses, stats.cold) == (4, 1, 2)
+        assert stats.hit_rate == pytest.approx(4 / 7)
+
+        store.reset_stats()
+        assert store.stats().hit_rate == 0.0
+
+    @pytest.mark.parametrize(
+        "url, domain",
+        [
+            ("https://www.Example.com/recipe/1", "example.com"),
+            ("http://eda.ru:8080/x", "eda.ru"),
+        ],
+    )
+    def test_domain(self, url, domain):
+        assert ExtractionProfileStore.domain(url) == domain
+
+
 class TestRecipeBuilderService:
 
     def test_build_normalizes_ingredients(self, builder):
@@ -440,7 +1571,7 @@ class TestRecipeBuilderService:
             thumbnail=None,
         )
 
-        with patch("api.v1.recipe.services.recipe_builder.UnitConverter.convert",
+        with patch("api.v1.recipe.utils.ingredient_parser.UnitConverter.convert",
                    return_value=(100.0, Unit.GR.value)):
             result = builder.build(dto)
 
@@ -453,6 +1584,11 @@ class TestRecipeBuilderService:
             ("Best breakfast ever", MealType.BREAKFAST.value),
             ("Healthy dinner salad", MealType.DINNER.value),
             ("Quick lunch sandwich", MealType.LUNCH.value),
+            # несколько совпадений — побеждает синоним, стоящий раньше в словаре
+            ("Суп-пюре на ужин", MealType.DINNER.value),
+            ("Side dish of sweet potatoes", MealType.DESSERT.value),
+            # только целые слова
+            ("Супница и обедня", None),
         ],
     )
     def test_parse_meal_type_from_title(self, builder, title, expected):
@@ -497,13 +1633,27 @@ class TestRecipeBuilderService:
     def test_parse_amount(self, builder, text, expected):
         assert builder._parse_amount(text) == expected
 
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            ("Ingredients:\n- 200 g flour\n- 1 cup milk\n- 2 eggs\n1. Mix\n2. Bake", True),
+            ("• Творог 500 г\n• Сахар 3 ст. л.\n• соль по вкусу", True),
+            ("Готовим пасту!\nПодписывайтесь на канал\nМузыка: Artist - Song", False),
+            ("Ingredients:\n- 200 g flour", False),
+            ("", False),
+            (None, False),
+        ]
+    )
+    def test_is_recipe_text(self, builder, text, expected):
+        assert builder.is_recipe_text(text) is expected
+
     def test_parse_amount_invalid(self, builder):
         assert builder._parse_amount("abc") is None
 
     def test_parse_ingredient_simple(self, builder):
         ingredient = IngredientDTO(raw="200 g flour")
 
-        with patch("api.v1.recipe.services.recipe_builder.UnitConverter.convert",
+        with patch("api.v1.recipe.utils.ingredient_parser.UnitConverter.convert",
                    return_value=(200.0, Unit.GR.value)):
             result = builder._parse_ingredient(ingredient)
 
@@ -514,7 +1664,7 @@ class TestRecipeBuilderService:
     def test_parse_ingredient_range(self, builder):
         ingredient = IngredientDTO(raw="100-200 g sugar")
 
-        with patch("api.v1.recipe.services.recipe_builder.UnitConverter.convert",
+        with patch("api.v1.recipe.utils.ingredient_parser.UnitConverter.convert",
                    return_value=(150.0, Unit.GR.value)):
             result = builder._parse_ingredient(ingredient)
 
@@ -540,8 +1690,115 @@ class TestRecipeBuilderService:
     def test_unit_converter_called(self, builder):
         ingredient = IngredientDTO(raw="1 kg rice")
 
-        with patch("api.v1.recipe.services.recipe_builder.UnitConverter.convert",
+        with patch("api.v1.recipe.utils.ingredient_parser.UnitConverter.convert",
                    return_value=(1000.0, Unit.GR.value)) as mock_convert:
             builder._parse_ingredient(ingredient)
 
         mock_convert.assert_called()
+
+
+class TestWhisperModelManager:
+
+    @pytest.fixture(autouse=True)
+    def clean_pool(self):
+        WhisperModelManager._models.clear()
+        WhisperModelManager._stats.clear()
+        yield
+        WhisperModelManager._models.clear()
+        WhisperModelManager._stats.clear()
+
+    def test_worker_waits_for_preload(self):
+        from django.conf import settings
+
+        from app.celery import app as celery_app
+
+        # модель грузится в worker_process_init, до сигнала о готовности процесса
+        timeout = celery_app.conf.worker_proc_alive_timeout
+        assert timeout == settings.CELERY_WORKER_PROC_ALIVE_TIMEOUT
+        assert timeout >= 60
+
+    @patch("api.v1.recipe.services.whisper_models.WhisperModel")
+    def test_model_loaded_once_per_config(self, mock_model_cls, settings):
+        settings.WHISPER_MODELS = {
+            "default": {"model_size": "small"},
+            "video_long": {"model_size": "medium", "cpu_threads": 4},
+        }
+
+        WhisperModelManager.preload(["celery", "video_long"])
+        WhisperModelManager.get("celery")
+        WhisperModelManager.get(None)
+
+        assert mock_model_cls.call_count == 2
+        mock_model_cls.assert_any_call(
+            "medium", device="cpu", compute_type="int8", cpu_threads=4, num_workers=1
+        )
+
+    @patch("api.v1.recipe.services.whisper_models.WhisperModel")
+    def test_stats_report_load_time_and_memory(self, mock_model_cls, settings):
+        settings.WHISPER_MODELS = {"default": {"model_size": "small"}}
+
+        WhisperModelManager.get()
+        stats = WhisperModelManager.stats()
+
+        assert len(stats) == 1
+        assert stats[0]["config"]["model_size"] == "small"
+        assert stats[0]["load_seconds"] >= 0
+        assert stats[0]["rss_after_mb"] > 0
+
+
+@pytest.mark.django_db
+class TestProductMatcher:
+
+    NAMES = ["молоко", "молока", "Мука пшеничная", "мука", "сахар-песок", "сахар", "egg", "eggs"]
+
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        ProductMatcher.reset()
+        connect_product_matcher()
+        yield
+        disconnect_product_matcher()
+        ProductMatcher.reset()
+
+    @pytest.mark.parametrize("left", NAMES)
+    def test_similarity_same_as_pg_trgm(self, left):
+        with connection.cursor() as cursor:
+            for right in self.NAMES:
+                cursor.execute("SELECT similarity(%s, %s)", [left, right])
+                expected = cursor.fetchone()[0]
+                assert similarity(trigrams(left), trigrams(right)) == pytest.approx(expected)
+
+    def test_match_same_as_database(self, owner):
+        for name in ["молоко", "мука пшеничная", "сахар-песок", "яйцо куриное"]:
+            Product.objects.create(name=name, created_by=owner)
+        names = ["молока", "мука", "сахар", "яйца", "кунжут"]
+
+        in_db = RecipeRepository(match_in_memory=False)._resolve_products(names, owner.id)
+        ProductMatcher.reset()
+        in_memory = RecipeRepository(match_in_memory=True)._resolve_products(names, owner.id)
+
+        assert {name: str(pk) for name, pk in in_db.items()} == {
+            name: str(pk) for name, pk in in_memory.items()
+        }
+
+    def test_no_queries_once_loaded(self, owner, django_assert_num_queries):
+        Product.objects.create(name="молоко", created_by=owner)
+        ProductMatcher.match(owner.id, ["молоко"])
+
+        with django_assert_num_queries(0):
+            assert ProductMatcher.match(owner.id, ["молока"]) != {}
+
+    def test_reloaded_after_product_saved(self, owner):
+        assert ProductMatcher.match(owner.id, ["кефир"]) == {}
+
+        product = Product.objects.create(name="кефир", created_by=owner)
+
+        assert ProductMatcher.match(owner.id, ["кефир"]) == {"кефир": str(product.id)}
+
+    def test_evicts_least_recently_used_user(self, owner, other_user, settings):
+        settings.PRODUCT_MATCHER_MAX_USERS = 1
+
+        ProductMatcher.match(owner.id, ["молоко"])
+        ProductMatcher.match(other_user.id, ["молоко"])
+
+        assert list(ProductMatcher._indexes) == [str(other_user.id)]
+
@@ -0,0 +1,185 @@
+from unittest.mock import patch
+
+import pytest
+import requests
+from celery.exceptions import Retry
+from django.core.exceptions import ValidationError
+
+from api.v1.recipe.services.video_parser import VideoDeferredError
+from api.v1.recipe.tasks import (
+    attach_recipe_thumbnail,
+    generate_recipe_image_variants,
+    parse_video_recipe,
+    parse_web_recipe,
+)
+from app.models import StatusChoices
+
+
+@pytest.mark.django_db
+class TestParseWebRecipeTask:
+
+    @patch("api.v1.recipe.tasks.CreateRecipeUseCase")
+    @patch("api.v1.recipe.tasks.NotificationService.send")
+    @patch("api.v1.recipe.tasks.WebParserService.validate_url")
+    def test_invalid_page_marks_source_error(
+        self, mock_validate, mock_send, mock_usecase, user, recipe_source_api
+    ):
+        mock_validate.side_effect = ValidationError("Страница не содержит рецепта.")
+
+        parse_web_recipe(recipe_source_api.id, user.id, recipe_source_api.url)
+
+        recipe_source_api.refresh_from_db()
+        assert recipe_source_api.status == StatusChoices.ERROR
+        assert recipe_source_api.error_message == "Страница не содержит рецепта."
+        mock_usecase.assert_not_called()
+        assert mock_send.call_args.kwargs["message"] == "Страница не содержит рецепта."
+
+    @patch("api.v1.recipe.tasks.CreateRecipeUseCase")
+    @patch("api.v1.recipe.tasks.NotificationService.send")
+    @patch("api.v1.recipe.tasks.WebParserService.validate_url")
+    def test_validation_crash_marks_source_error_and_reraises(
+        self, mock_validate, mock_send, mock_usecase, user, recipe_source_api
+    ):
+        mock_validate.side_effect = requests.ConnectionError("connection reset")
+
+        with pytest.raises(requests.ConnectionError):
+            parse_web_recipe(recipe_source_api.id, user.id, recipe_source_api.url)
+
+        recipe_source_api.refresh_from_db()
+        assert recipe_source_api.status == StatusChoices.ERROR
+        assert recipe_source_api.error_message == "Не удалось загрузить рецепт. Попробуйте ещё раз."
+        mock_usecase.assert_not_called()
+        assert mock_send.call_args.kwargs["title"] == "Ошибка загрузки"
+
+    @patch("api.v1.recipe.tasks.CreateRecipeUseCase")
+    @patch("api.v1.recipe.tasks.NotificationService.send")
+    @patch("api.v1.recipe.tasks.WebParserService.validate_url")
+    def test_valid_page_runs_usecase_with_same_parser(
+        self, mock_validate, mock_send, mock_usecase, user, recipe_source_api
+    ):
+        parse_web_recipe(recipe_source_api.id, user.id, recipe_source_api.url)
+
+        mock_validate.assert_called_once_with(recipe_source_api.url)
+        mock_usecase.return_value.execute.assert_called_once_with(
+            recipe_source_api.id, user, recipe_source_api.url
+        )
+
+
+@pytest.mark.django_db
+class TestParseVideoRecipeTask:
+
+    @patch("api.v1.recipe.tasks.parse_video_recipe.apply_async")
+    @patch("api.v1.recipe.tasks.CreateRecipeUseCase")
+    @patch("api.v1.recipe.tasks.NotificationService.send")
+    def test_long_video_requeued(
+        self, mock_send, mock_usecase, mock_apply, user, recipe_source_api
+    ):
+        mock_usecase.return_value.execute.side_effect = VideoDeferredError("video_long")
+
+        parse_video_recipe(recipe_source_api.id, user.id, recipe_source_api.url)
+
+        mock_apply.assert_called_once_with(
+            (recipe_source_api.id, user.id, recipe_source_api.url), queue="video_long"
+        )
+        recipe_source_api.refresh_from_db()
+        assert recipe_source_api.status != StatusChoices.ERROR
+
+    @patch("api.v1.recipe.tasks.CreateRecipeUseCase")
+    @patch("api.v1.recipe.tasks.NotificationService.send")
+    def test_rejected_video_marks_source_error(
+        self, mock_send, mock_usecase, user, recipe_source_api
+    ):
+        mock_usecase.return_value.execute.side_effect = ValidationError("Видео слишком длинное.")
+
+        parse_video_recipe(recipe_source_api.id, user.id, recipe_source_api.url)
+
+        recipe_source_api.refresh_from_db()
+        assert recipe_source_api.status == StatusChoices.ERROR
+        assert recipe_source_api.error_message == "Видео слишком длинное."
+
+
+@pytest.mark.django_db
+class TestAttachRecipeThumbnailTask:
+
+    @patch("api.v1.recipe.tasks.generate_recipe_image_variants.delay")
+    @patch("api.v1.recipe.tasks.ImageService.store_image", return_value="recipes/ab/abc.jpg")
+    def test_sets_stored_image(self, mock_store, mock_variants, recipe):
+        attach_recipe_thumbnail(str(recipe.id), "http://example.com/1.jpg")
+
+        recipe.refresh_from_db()
+        assert recipe.image.name == "recipes/ab/abc.jpg"
+        assert mock_store.call_args.args[0] == "http://example.com/1.jpg"
+        mock_variants.assert_called_once_with(str(recipe.id))
+
+    @patch("api.v1.recipe.tasks.ImageService.store_image", return_value=None)
+    def test_keeps_recipe_without_image_on_failure(self, mock_store, recipe):
+        attach_recipe_thumbnail(str(recipe.id), "http://example.com/1.jpg")
+
+        recipe.refresh_from_db()
+        assert not recipe.image
+
+    @patch("api.v1.recipe.tasks.attach_recipe_thumbnail.retry", side_effect=Retry)
+    @patch(
+        "api.v1.recipe.tasks.ImageService.store_image",
+        side_effect=requests.ConnectionError("reset"),
+    )
+    def test_retries_network_error_with_backoff(self, mock_store, mock_retry, recipe, settings):
+        settings.IMAGE_RETRY_BACKOFF = 30
+
+        with pytest.raises(Retry):
+            attach_recipe_thumbnail(str(recipe.id), "http://example.com/1.jpg")
+
+        assert mock_store.call_args.kwargs == {"raise_errors": True}
+        assert mock_retry.call_args.kwargs["countdown"] == 30
+
+    @patch("api.v1.recipe.tasks.attach_recipe_thumbnail.retry")
+    @patch("api.v1.recipe.tasks.ImageService.store_image")
+    def test_client_error_not_retried(self, mock_store, mock_retry, recipe):
+        response = requests.Response()
+        response.status_code = 404
+        mock_store.side_effect = requests.HTTPError(response=response)
+
+        attach_recipe_thumbnail(str(recipe.id), "http://example.com/1.jpg")
+
+        mock_retry.assert_not_called()
+        recipe.refresh_from_db()
+        assert not recipe.image
+
+    @patch("api.v1.recipe.tasks.attach_recipe_thumbnail.retry")
+    @patch(
+        "api.v1.recipe.tasks.ImageService.store_image",
+        side_effect=requests.Timeout("slow"),
+    )
+    def test_gives_up_after_max_retries(self, mock_store, mock_retry, recipe):
+        attach_recipe_thumbnail.push_request(retries=attach_recipe_thumbnail.max_retries)
+        try:
+            attach_recipe_thumbnail.run(str(recipe.id), "http://example.com/1.jpg")
+        finally:
+            attach_recipe_thumbnail.pop_request()
+
+        mock_retry.assert_not_called()
+
+
+
+@pytest.mark.django_db
+class TestGenerateRecipeImageVariantsTask:
+
+    @patch(
+        "api.v1.recipe.tasks.ImageService.store_variants",
+        return_value={"160": "recipes/ab/abc_160.webp"},
+    )
+    def test_saves_variants(self, mock_store, recipe):
+        recipe.image = "recipes/ab/abc.jpg"
+        recipe.save()
+
+        generate_recipe_image_variants(str(recipe.id))
+
+        recipe.refresh_from_db()
+        assert recipe.image_variants == {"160": "recipes/ab/abc_160.webp"}
+        assert mock_store.call_args.args[0] == "recipes/ab/abc.jpg"
+
+    @patch("api.v1.recipe.tasks.ImageService.store_variants")
+    def test_skips_recipe_without_image(self, mock_store, recipe):
+        generate_recipe_image_variants(str(recipe.id))
+
+        mock_store.assert_not_called()
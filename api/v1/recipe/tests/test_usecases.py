@@ -1,9 +1,22 @@
-from unittest.mock import MagicMock, Mock, patch
+from unittest.mock import ANY, MagicMock, Mock, patch
 
+import pytest
+from django.core.cache import cache
+
+from api.v1.common.uow.django_uow import DjangoUnitOfWork
+from api.v1.recipe.dto.llm_dto import ExtractionProgressDTO
+from api.v1.recipe.repositories.source_repository import RecipeSourceRepository
 from api.v1.recipe.usecases.create_recipe_usecase import (
     CreateRecipeFromExistingSourceUseCase,
     CreateRecipeUseCase,
 )
+from api.v1.recipe.usecases.renormalize_sources_usecase import (
+    CHECKPOINT_KEY,
+    RenormalizeSourcesUseCase,
+    renormalize_chunk,
+)
+from recipe.choices import Source, Unit
+from recipe.models import RecipeSource
 
 
 class TestCreateRecipeUseCase:
@@ -92,7 +105,7 @@ class TestCreateRecipeUseCase:
 
         result = usecase.execute("source1", user, "url")
 
-        llm.extract_recipe.assert_called_once_with("raw text")
+        llm.extract_recipe.assert_called_once_with("raw text", on_progress=ANY)
         builder.build.assert_called_once_with(dto_from_llm)
         repository.save.assert_called_once()
         mock_send.assert_called_once()
@@ -125,6 +138,63 @@ class TestCreateRecipeUseCase:
         mock_send.assert_called_once()
 
 
+    @patch("api.v1.recipe.usecases.create_recipe_usecase.reverse", return_value="/recipe/1/")
+    @patch("notifications.services.NotificationService.send")
+    @patch("api.v1.recipe.mappers.recipe_mapper.RecipeMapper.dto_to_dict")
+    def test_execute_uses_cached_transcript(self, mock_mapper, mock_send, mock_reverse, user):
+        parser = Mock()
+        repository = Mock()
+        builder = Mock()
+        uow = MagicMock()
+        llm = Mock()
+        transcripts = Mock()
+
+        cached = Mock()
+        cached.description = "cached text"
+
+        repository.exists_for_user.return_value = False
+        transcripts.get_by_url.return_value = cached
+        mock_mapper.return_value = {"title": "test"}
+
+        usecase = CreateRecipeUseCase(parser, repository, builder, uow, llm, transcripts)
+
+        usecase.execute("source1", user, "url")
+
+        transcripts.get_by_url.assert_called_once_with("url")
+        parser.parse.assert_not_called()
+        llm.extract_recipe.assert_called_once_with("cached text", on_progress=ANY)
+
+
+    @patch("notifications.services.NotificationService.send")
+    def test_notify_progress(self, mock_send, user):
+        usecase = CreateRecipeUseCase(Mock(), Mock(), Mock(), MagicMock(), Mock())
+
+        usecase._notify_progress(user, ExtractionProgressDTO())
+        mock_send.assert_not_called()
+
+        usecase._notify_progress(user, ExtractionProgressDTO(title="Суп", ingredients=3))
+        assert mock_send.call_args.kwargs["message"] == "«Суп», ингредиентов: 3"
+        assert mock_send.call_args.kwargs["save"] is False
+
+    @patch("api.v1.recipe.usecases.create_recipe_usecase.time.monotonic")
+    @patch("notifications.services.NotificationService.send")
+    def test_notify_progress_throttled(self, mock_send, mock_monotonic, user):
+        usecase = CreateRecipeUseCase(Mock(), Mock(), Mock(), MagicMock(), Mock())
+        mock_monotonic.return_value = 100.0
+
+        usecase._notify_progress(user, ExtractionProgressDTO(ingredients=1))
+        for count in range(1, 30):
+            usecase._notify_progress(user, ExtractionProgressDTO(title="Суп", ingredients=count))
+        assert mock_send.call_count == 2
+
+        mock_monotonic.return_value = 106.0
+        usecase._notify_progress(user, ExtractionProgressDTO(title="Суп", ingredients=12, steps=4))
+        usecase._notify_progress(user, ExtractionProgressDTO(title="Суп", ingredients=12, steps=5))
+
+        assert mock_send.call_count == 3
+        assert mock_send.call_args.kwargs["message"] == "«Суп», ингредиентов: 12, шагов: 4"
+
+
 class TestCreateRecipeFromExistingSourceUseCase:
 
     @patch("api.v1.recipe.usecases.create_recipe_usecase.reverse", return_value="/recipe/1/")
@@ -150,3 +220,96 @@ class TestCreateRecipeFromExistingSourceUseCase:
         repository.create_from_dto.assert_called_once_with(dto, user.id, "source1")
         mock_send.assert_called_once()
         assert result == recipe
+
+
+def parsed_recipe(raw: str, name: str | None = None, amount=None, unit=None) -> dict:
+    return {
+        "title": "Блины",
+        "description": None,
+        "meal_type": "breakfast",
+        "ingredients": [{"name": name, "amount": amount, "unit": unit, "raw": raw}],
+        "steps": [{"step": "Смешать"}],
+        "tips": None,
+        "thumbnail": None,
+    }
+
+
+@pytest.mark.django_db
+class TestRenormalizeSourcesUseCase:
+
+    @pytest.fixture
+    def sources(self):
+        stale = [
+            RecipeSource.objects.create(
+                url=f"https://example.com/{i}",
+                source=Source.WEBSITE,
+                parsed_recipe=parsed_recipe("Мука 200 г", name="мука 200 г"),
+            )
+            for i in range(3)
+        ]
+        fresh = RecipeSource.objects.create(
+            url="https://example.com/fresh",
+            source=Source.WEBSITE,
+            parsed_recipe=parsed_recipe("Мука 200 г", "мука", 200.0, Unit.GR.value),
+        )
+        RecipeSource.objects.create(url="https://example.com/empty", source=Source.WEBSITE)
+        return sorted(stale + [fresh], key=lambda source: str(source.id))
+
+    def use_case(self, chunk_size=1):
+        return RenormalizeSourcesUseCase(
+            repository=RecipeSourceRepository(),
+            uow=DjangoUnitOfWork(),
+            chunk_size=chunk_size,
+            workers=1,
+        )
+
+    def test_updates_only_changed_sources(self, sources):
+        reports = []
+
+        progress = self.use_case(chunk_size=2).execute(
+            on_progress=lambda p: reports.append(p.processed),
+        )
+
+        assert (progress.total, progress.processed, progress.updated) == (4, 4, 3)
+        assert reports == [2, 4]
+        for source in sources:
+            source.refresh_from_db()
+            assert source.parsed_recipe["ingredients"][0]["name"] == "мука"
+            assert source.parsed_recipe["ingredients"][0]["amount"] == 200.0
+        assert cache.get(CHECKPOINT_KEY) is None
+
+    def test_resumes_after_checkpoint(self, sources):
+        cache.set(CHECKPOINT_KEY, str(sources[1].id))
+
+        progress = self.use_case().execute()
+
+        assert progress.processed == 2
+        first = RecipeSource.objects.get(id=sources[0].id)
+        assert first.parsed_recipe == sources[0].parsed_recipe
+
+    def test_restart_ignores_checkpoint(self, sources):
+        cache.set(CHECKPOINT_KEY, str(sources[-1].id))
+
+        assert self.use_case().execute(restart=True).processed == 4
+
+    @pytest.mark.parametrize("meal_type", ["side_dish", "baby_food", "uncategorized", None])
+    def test_second_pass_changes_nothing(self, meal_type):
+        parsed = parsed_recipe("Мука 200 г", name="мука 200 г")
+        parsed["meal_type"] = meal_type
+        parsed["title"] = "Rice side dish"
+
+        first = renormalize_chunk([("1", parsed)])
+        second = renormalize_chunk(first)
+
+        assert first[0][1]["meal_type"] == (meal_type or "side_dish")
+        assert second == []
+
+    def test_dry_run_does_not_write(self, sources):
+        progress = self.use_case().execute(dry_run=True)
+
+        assert progress.updated == 3
+        for source in sources:
+            before = source.parsed_recipe
+            source.refresh_from_db()
+            assert source.parsed_recipe == before
+
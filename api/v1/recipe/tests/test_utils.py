@@ -1,6 +1,12 @@
 import pytest
+from bs4 import BeautifulSoup
 
-from api.v1.recipe.utils.helpers import UnitConverter, clean_name
+from api.v1.recipe.utils.audio import split_on_silence
+from api.v1.recipe.utils.helpers import UnitConverter, clean_name, video_key
+from api.v1.recipe.utils.html import SelectorIndex, parser_backend, selector_keys
+from api.v1.recipe.utils.ingredient_parser import parse_ingredient_line
+from api.v1.recipe.utils.json_stream import JsonObjectScanner
+from api.v1.recipe.utils.jsonld import json_ld_blocks, json_ld_items, schema_types
 from recipe.choices import Unit
 
 
@@ -44,3 +50,164 @@ def test_unit_converter_convert(amount, raw_unit, expected_amount, expected_unit
         assert result_amount == expected_amount
 
     assert result_unit == expected_unit
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://www.youtube.com/watch?v=dQw4w9WgXcQ", ("Youtube", "dQw4w9WgXcQ")),
+        ("https://youtube.com/shorts/dQw4w9WgXcQ", ("Youtube", "dQw4w9WgXcQ")),
+        ("https://www.instagram.com/reel/ABC123/", ("Instagram", "ABC123")),
+        ("https://example.com/recipe", None),
+    ]
+)
+def test_video_key(url, expected):
+    assert video_key(url) == expected
+
+
+@pytest.mark.parametrize(
+    "speech, target, expected",
+    [
+        # короткое аудио — один кусок
+        ([{"start": 0, "end": 50}], 100, [(0, 200)]),
+        # режем в середине паузы после набранной длины
+        (
+            [{"start": 0, "end": 100}, {"start": 120, "end": 250}, {"start": 270, "end": 300}],
+            100,
+            [(0, 110), (110, 260), (260, 400)],
+        ),
+        # пауз нет совсем
+        ([], 100, [(0, 400)]),
+    ]
+)
+def test_split_on_silence(speech, target, expected):
+    total = expected[-1][1]
+    assert split_on_silence(total, speech, target) == expected
+
+
+def test_json_object_scanner_tracks_progress_and_end():
+    text = (
+        '```json\n{"title": "Сыр\\"ники", "ingredients": [{"raw": "a}"}, {"raw": "b"}], '
+        '"steps": [{"step": "x"}], "tips": ["t"]}\n``` хвост'
+    )
+    scanner = JsonObjectScanner()
+
+    done = False
+    for i in range(0, len(text), 3):
+        done = scanner.feed(text[i:i + 3])
+        if done:
+            break
+
+    assert done
+    assert scanner.title == 'Сыр"ники'
+    assert scanner.counts == {"ingredients": 2, "steps": 1}
+    assert scanner.text.startswith("{") and scanner.text.endswith("}")
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        ("Мука 200 г", ("мука", 200.0, Unit.GR.value)),
+        ("1,5 кг картофеля", ("картофеля", 1.5, Unit.KG.value)),
+        ("Сахар 2-3 ст. л.", ("сахар", 2.5, Unit.TBSP.value)),
+        ("1 1/2 cups flour", ("flour", 1.5, Unit.CUP.value)),
+        ("1/2 tsp baking soda", ("baking soda", 0.5, Unit.TSP.value)),
+        ("Яйца 3 шт.", ("яйца", 3.0, Unit.PC.value)),
+        ("2яйца", ("яйца", 2.0, Unit.PC.value)),
+        ("молоко 200", ("молоко", 200.0, Unit.PC.value)),
+        ("Соль по вкусу", ("соль", None, Unit.TO_TASTE.value)),
+        ("Лук (крупный)", ("лук", None, None)),
+    ]
+)
+def test_parse_ingredient_line(line, expected):
+    assert parse_ingredient_line(line) == expected
+
+
+SELECTOR_PAGE = """
+<html><body>
+  <nav class="menu"><ul><li><a href="/a">A</a></li><li><a href="/b">B</a></li></ul></nav>
+  <script type="Application/LD+JSON">{}</script>
+  <h1 class="entry-title recipe-title-main" id="top">Блины</h1>
+  <ul class="ingredients"><li><span>Мука</span></li><li><span>Молоко</span></li></ul>
+  <div class="recipe-list-grid"><div>1</div><p>2</p></div>
+  <table class="prod"><tr><td>Яйца</td></tr></table>
+  <div itemprop="recipeInstructions"><p>Смешать</p><p>Жарить</p></div>
+  <p class="step">1. Один</p><p class="step">2. Два</p>
+</body></html>
+"""
+
+
+@pytest.mark.parametrize("backend", ["html.parser", "lxml"])
+def test_selector_index_matches_select(backend):
+    if backend == "lxml":
+        pytest.importorskip("lxml")
+    soup = BeautifulSoup(SELECTOR_PAGE, backend)
+    groups = [
+        ['script[type="application/ld+json"]', 'h1[class*="title"]', "#top", "h1"],
+        [".ingredients li", "ul.ingredients li", "table.prod tr", '[class*="recipe-list"] > *'],
+        ['[itemprop="recipeInstructions"]', "p + p", "p.step ~ p", "li:first-child"],
+        ["a[href^='/']", "[class~=step]", "[id|=top]"],
+        ["nav > ul > li", ".missing li", "span", "p:not(.step)"],
+    ]
+
+    index = SelectorIndex(soup, groups[:2])
+
+    for group in groups:
+        assert index.matches(group) == [soup.select(selector) for selector in group]
+
+
+def test_selector_keys():
+    keys = selector_keys('[class*="recipe-list"] > *')
+    assert keys.element is None
+    assert keys.parent_attributes == (("class", "*=", "recipe-list"),)
+
+    keys = selector_keys("ul.ingredients li")
+    assert keys.element == ("tag", "li")
+    assert keys.ancestors == (("class", "ingredients"),)
+
+    assert selector_keys("a:not(.x)").element is None
+
+
+def test_parser_backend(settings):
+    settings.WEB_PARSER_BACKEND = "html.parser"
+    assert parser_backend() == "html.parser"
+
+    settings.WEB_PARSER_BACKEND = "auto"
+    assert parser_backend() in ("lxml", "html.parser")
+
+
+def test_json_ld_blocks_from_raw_bytes():
+    html = (
+        '<script>var a = 1;</script>'
+        '<SCRIPT id="ld" type=\'application/ld+json\'><!--{"@type": "Recipe",'
+        ' "name": "Щи\nпо-русски"}--></SCRIPT>'
+        '<script type="application/ld+json">{broken</script>'
+        '<script type="application/ld+json">[{"@type": "WebSite"},'
+        ' {"@graph": [{"@type": ["Recipe", "NewsArticle"]}, "x"]}]</script>'
+    ).encode("cp1251")
+
+    blocks = json_ld_blocks(html, "windows-1251")
+
+    assert len(blocks) == 2
+    assert blocks[0]["name"] == "Щи\nпо-русски"
+    items = json_ld_items(blocks[1])
+    assert [schema_types(item) for item in items] == [{"WebSite"}, {"Recipe", "NewsArticle"}]
+
+
+@pytest.mark.parametrize(
+    "meta",
+    [
+        '<meta charset="windows-1251">',
+        "<META http-equiv='Content-Type' content='text/html; charset=windows-1251'>",
+    ],
+)
+def test_json_ld_blocks_use_meta_charset(meta):
+    html = (
+        f"<html><head>{meta}<title>Рецепт</title>"
+        '<script type="application/ld+json">{"@type": "Recipe", "name": "Борщ"}</script>'
+        "</head></html>"
+    ).encode("cp1251")
+
+    blocks = json_ld_blocks(html)
+
+    assert blocks[0]["name"] == "Борщ"
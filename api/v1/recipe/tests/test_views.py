@@ -10,14 +10,12 @@ from recipe.models import Recipe, RecipeSource
 
 @pytest.mark.django_db
 class TestParseUrlAPIView:
-    @patch("api.v1.recipe.views.WebParserService.validate_url")
     @patch("api.v1.recipe.views.parse_web_recipe.delay")
     @patch("api.v1.recipe.views.UrlClassifier.classify")
     def test_create_new_source_triggers_task(
         self,
         mock_classify,
         mock_task,
-        mock_validate,
         auth_client,
         user,
     ):
@@ -27,7 +25,8 @@ class TestParseUrlAPIView:
         url = reverse("recipe_api_v1:parse-url")
         response = auth_client.post(url, {"url": "https://test.com"})
 
-        assert response.status_code == 201
+        assert response.status_code == 202
+        assert response.data["id"] == RecipeSource.objects.first().id
 
         source = RecipeSource.objects.first()
         assert source.status == StatusChoices.PROCESSING
@@ -117,3 +116,30 @@ class TestParseUrlAPIView:
         response = auth_client.post(url, {"url": "https://test.com"})
 
         assert response.status_code == 202
+
+    @patch("api.v1.recipe.views.parse_web_recipe.delay")
+    @patch("api.v1.recipe.views.UrlClassifier.classify")
+    def test_retry_after_error_clears_message(
+        self,
+        mock_classify,
+        mock_task,
+        auth_client,
+    ):
+        mock_classify.return_value.final_url = "https://test.com"
+        mock_classify.return_value.source = Source.WEBSITE
+
+        source = RecipeSource.objects.create(
+            url="https://test.com",
+            status=StatusChoices.ERROR,
+            source=Source.WEBSITE,
+            error_message="Страница не содержит рецепта.",
+        )
+
+        url = reverse("recipe_api_v1:parse-url")
+        response = auth_client.post(url, {"url": "https://test.com"})
+
+        assert response.status_code == 202
+        source.refresh_from_db()
+        assert source.status == StatusChoices.PROCESSING
+        assert source.error_message is None
+        mock_task.assert_called_once()
@@ -1,10 +1,15 @@
+import time
+
 from django.urls import reverse
 
 from api.v1.common.interfaces.uow import IUnitOfWork
+from api.v1.recipe.constants import EXTRACTION_PROGRESS_INTERVAL
+from api.v1.recipe.dto.llm_dto import ExtractionProgressDTO
 from api.v1.recipe.interfaces.recipe_parser import (
     IRecipeBuilderService,
     IRecipeParserService,
     IRecipeRepository,
+    ITranscriptRepository,
 )
 from api.v1.recipe.mappers.recipe_mapper import RecipeMapper
 from api.v1.recipe.services.llm import LLMService
@@ -17,6 +22,7 @@ class CreateRecipeUseCase:
     """
     Универсальный usecase для создания рецепта из любого источника.
     Если передан llm — используется для обработки необработанного текста (для видео).
+    Если передан transcripts — сначала ищет готовый транскрипт видео.
     """
 
     def __init__(
@@ -25,13 +31,17 @@ class CreateRecipeUseCase:
             repository: IRecipeRepository,
             builder: IRecipeBuilderService,
             uow: IUnitOfWork,
-            llm: LLMService | None = None
+            llm: LLMService | None = None,
+            transcripts: ITranscriptRepository | None = None,
     ):
         self.parser = parser
         self.repository = repository
         self.builder = builder
         self.uow = uow
         self.llm = llm
+        self.transcripts = transcripts
+        self._progress_sent_at = float("-inf")
+        self._title_sent = False
     
 
     def execute(self, source_id: str, user: User, url: str):
@@ -39,10 +49,17 @@ class CreateRecipeUseCase:
         if self.repository.exists_for_user(source_id, user.id): 
             return self.repository.get_by_user_and_source(source_id, user.id)
         
-        raw_data = self.parser.parse(url)
+        raw_data = self.transcripts.get_by_url(url) if self.transcripts else None
+        if raw_data is None:
+            raw_data = self.parser.parse(url)
         
         if self.llm:
-            dto = self.llm.extract_recipe(raw_data.description)
+            self._progress_sent_at = float("-inf")
+            self._title_sent = False
+            dto = self.llm.extract_recipe(
+                raw_data.description,
+                on_progress=lambda progress: self._notify_progress(user, progress),
+            )
             dto.thumbnail = raw_data.thumbnail
         else:
             dto = raw_data
@@ -65,6 +82,37 @@ class CreateRecipeUseCase:
         
         return recipe
 
+    def _notify_progress(self, user: User, progress: ExtractionProgressDTO):
+        """
+        Промежуточный прогресс LLM: найденное название и число разобранных пунктов.
+        Уходит сразу, как только появилось название, а в остальное время —
+        не чаще раза в EXTRACTION_PROGRESS_INTERVAL секунд
+        """
+        parts = []
+        if progress.title:
+            parts.append(f"«{progress.title}»")
+        if progress.ingredients:
+            parts.append(f"ингредиентов: {progress.ingredients}")
+        if progress.steps:
+            parts.append(f"шагов: {progress.steps}")
+
+        if not parts:
+            return
+
+        now = time.monotonic()
+        new_title = bool(progress.title) and not self._title_sent
+        if not new_title and now - self._progress_sent_at < EXTRACTION_PROGRESS_INTERVAL:
+            return
+        self._progress_sent_at = now
+        self._title_sent = self._title_sent or new_title
+
+        NotificationService.send(
+            user=user,
+            title="Распознаём рецепт",
+            message=", ".join(parts),
+            save=False,
+        )
+
 
 class CreateRecipeFromExistingSourceUseCase:
     """
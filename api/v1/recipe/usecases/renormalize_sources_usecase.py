@@ -0,0 +1,121 @@
+import itertools
+import multiprocessing
+from collections.abc import Callable
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from api.v1.common.interfaces.uow import IUnitOfWork
+from api.v1.recipe.dto.renormalize_dto import RenormalizeProgressDTO
+from api.v1.recipe.interfaces.recipe_parser import IRecipeSourceRepository
+from api.v1.recipe.mappers.recipe_mapper import RecipeMapper
+from api.v1.recipe.services.recipe_builder import RecipeBuilderService
+
+CHECKPOINT_KEY = "recipe:renormalize:last_id"
+
+
+def renormalize_chunk(rows: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """
+    Прогоняет сохранённые рецепты через RecipeBuilderService.
+    Возвращает только строки, у которых результат изменился.
+    Выполняется в процессах пула, поэтому не трогает БД.
+    """
+    builder = RecipeBuilderService()
+    changed = []
+
+    for source_id, parsed in rows:
+        dto = builder.build(RecipeMapper.dict_to_dto(parsed))
+        normalized = RecipeMapper.dto_to_dict(dto)
+        if normalized != parsed:
+            changed.append((source_id, normalized))
+
+    return changed
+
+
+class RenormalizeSourcesUseCase:
+    """
+    Повторная нормализация RecipeSource.parsed_recipe после изменения
+    таблиц единиц и регулярных выражений в constants.py.
+    Источники читаются серверным курсором по chunk_size строк, чанки разбираются
+    в пуле процессов, изменившиеся строки записываются через bulk_update.
+    После каждой записи в кеш сохраняется последний id — прерванный обход продолжается с него.
+    """
+
+    def __init__(
+            self,
+            repository: IRecipeSourceRepository,
+            uow: IUnitOfWork,
+            chunk_size: int | None = None,
+            workers: int | None = None,
+    ):
+        self.repository = repository
+        self.uow = uow
+        self.chunk_size = chunk_size or settings.RENORMALIZE_CHUNK_SIZE
+        self.workers = workers or settings.RENORMALIZE_WORKERS
+
+    def execute(
+            self,
+            restart: bool = False,
+            dry_run: bool = False,
+            on_progress: Callable[[RenormalizeProgressDTO], None] | None = None,
+    ) -> RenormalizeProgressDTO:
+        if restart:
+            cache.delete(CHECKPOINT_KEY)
+
+        after = cache.get(CHECKPOINT_KEY)
+        progress = RenormalizeProgressDTO(
+            total=self.repository.count_parsed(after),
+            last_id=after,
+        )
+
+        pool = self._pool()
+        mapper = pool.map if pool else map
+        try:
+            for window in self._windows(after):
+                changed = list(itertools.chain.from_iterable(mapper(renormalize_chunk, window)))
+
+                if changed and not dry_run:
+                    with self.uow:
+                        self.repository.bulk_update_parsed(changed)
+
+                progress.processed += sum(len(chunk) for chunk in window)
+                progress.updated += len(changed)
+                progress.last_id = window[-1][-1][0]
+
+                if not dry_run:
+                    cache.set(CHECKPOINT_KEY, progress.last_id, timeout=None)
+                if on_progress:
+                    on_progress(progress)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        if not dry_run:
+            cache.delete(CHECKPOINT_KEY)
+
+        return progress
+
+    def _windows(self, after: str | None):
+        """
+        Окно — по чанку на процесс: из курсора читается не больше, чем пул разберёт за раз
+        """
+        rows = self.repository.iter_parsed(after, self.chunk_size)
+        chunks = iter(lambda: list(itertools.islice(rows, self.chunk_size)), [])
+
+        while window := list(itertools.islice(chunks, self.workers)):
+            yield window
+
+    def _pool(self):
+        """
+        Пул процессов; внутри воркера Celery (демонический процесс) дочерние
+        процессы запрещены, и чанки разбираются в текущем процессе
+        """
+        if self.workers <= 1 or multiprocessing.current_process().daemon:
+            return None
+
+        # дочерние процессы не должны унаследовать открытое соединение с БД
+        connections.close_all()
+        return multiprocessing.Pool(self.workers, initializer=django.setup)
@@ -0,0 +1,25 @@
+def split_on_silence(
+    total_samples: int,
+    speech: list[dict],
+    target_samples: int,
+) -> list[tuple[int, int]]:
+    """
+    Делит аудио на куски примерно по target_samples, разрезая только в паузах.
+    speech — отрезки речи от VAD: [{"start": ..., "end": ...}] в сэмплах.
+    Куски идут подряд и покрывают всё аудио, поэтому порядок склейки — порядок кусков.
+    """
+    bounds = []
+    chunk_start = 0
+
+    for current, following in zip(speech, speech[1:], strict=False):
+        if current["end"] - chunk_start < target_samples:
+            continue
+        # режем посередине паузы между отрезками речи
+        cut = (current["end"] + following["start"]) // 2
+        bounds.append((chunk_start, cut))
+        chunk_start = cut
+
+    if chunk_start < total_samples:
+        bounds.append((chunk_start, total_samples))
+
+    return bounds
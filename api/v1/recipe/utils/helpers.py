@@ -1,23 +1,31 @@
 import re
 
-from api.v1.recipe.constants import CONVERSION, UNIT_SYNONYMS
+from yt_dlp.extractor import gen_extractor_classes
+
+from api.v1.recipe.constants import (
+    CONVERSION,
+    NAME_DIGIT_RE,
+    NAME_SYMBOLS_RE,
+    UNIT_SYNONYMS,
+)
 
 
 def clean_name(name: str) -> str:
     # убираем содержимое скобок вместе со скобками: (≈300 г), (по желанию), (у меня черничный)
-    name = re.sub(r"\(.*?\)", " ", name)
-    # убираем смешанные дроби "1 1/2"
-    name = re.sub(r"\d+\s+\d+/\d+", "", name)
-    # убираем простые дроби "1/2"
-    name = re.sub(r"\d+/\d+", "", name)
-    # убираем одиночные числа (целые и десятичные)
-    name = re.sub(r"\b\d+(?:[.,]\d+)?\b", "", name)
-    # убираем всё кроме букв (рус/англ), пробелов и дефиса
-    name = re.sub(r"[^а-яёА-ЯЁa-zA-Z\s\-]", " ", name)
-    # убираем одиночный дефис не окружённый буквами
-    name = re.sub(r"(?<!\w)-(?!\w)", " ", name)
+    if "(" in name:
+        name = re.sub(r"\(.*?\)", " ", name)
+    if NAME_DIGIT_RE.search(name):
+        # убираем смешанные дроби "1 1/2"
+        name = re.sub(r"\d+\s+\d+/\d+", "", name)
+        # убираем простые дроби "1/2"
+        name = re.sub(r"\d+/\d+", "", name)
+        # убираем одиночные числа (целые и десятичные)
+        name = re.sub(r"\b\d+(?:[.,]\d+)?\b", "", name)
+    # убираем всё кроме букв (рус/англ), пробелов и дефиса,
+    # а также одиночный дефис не окружённый буквами
+    name = NAME_SYMBOLS_RE.sub(" ", name)
     # схлопываем пробелы
-    return re.sub(r"\s+", " ", name).strip().lower()
+    return " ".join(name.split()).lower()
 
 
 class UnitConverter:
@@ -40,4 +48,16 @@ class UnitConverter:
         target_unit = UNIT_SYNONYMS.get(key)
         converted_unit = target_unit.value if target_unit else raw_unit
 
-        return round(amount * factor, 2), converted_unit
\ No newline at end of file
+        return round(amount * factor, 2), converted_unit
+
+
+def video_key(url: str) -> tuple[str, str] | None:
+    """
+    Определяет (экстрактор, id видео) по URL без сетевых запросов.
+    Для страниц, которые понимает только общий экстрактор, возвращает None.
+    """
+    for extractor in gen_extractor_classes():
+        if extractor.suitable(url):
+            video_id = extractor.get_temp_id(url)
+            return (extractor.ie_key(), video_id) if video_id else None
+    return None
@@ -0,0 +1,245 @@
+import importlib.util
+import re
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from functools import lru_cache
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+from django.conf import settings
+
+COMBINATOR_RE = re.compile(r"\s*([>+~])\s*|\s+")
+ATTRIBUTE_RE = re.compile(
+    r"""\[\s*([\w-]+)\s*(?:([~|^$*]?=)\s*(?:"([^"]*)"|'([^']*)'|([^\s\]]+))\s*([is])?\s*)?\]"""
+)
+PLACEHOLDER_RE = re.compile(r"\[(\d+)\]")
+ID_RE = re.compile(r"#([\w-]+)")
+CLASS_RE = re.compile(r"\.([\w-]+)")
+TAG_RE = re.compile(r"([a-zA-Z][\w-]*)")
+
+
+def parser_backend() -> str:
+    """
+    Парсер BeautifulSoup из settings.WEB_PARSER_BACKEND.
+    "auto" — lxml, если установлен, иначе встроенный html.parser
+    """
+    backend = settings.WEB_PARSER_BACKEND
+    if backend == "auto":
+        return "lxml" if _has_lxml() else "html.parser"
+    return backend
+
+
+def parse_html(content: bytes | str) -> BeautifulSoup:
+    return BeautifulSoup(content, parser_backend())
+
+
+@lru_cache(maxsize=512)
+def compile_selector(selector: str) -> soupsieve.SoupSieve:
+    return soupsieve.compile(selector)
+
+
+@dataclass(frozen=True)
+class SelectorKeys:
+    """
+    Признаки, без которых элемент точно не подходит под селектор:
+    element — у самого элемента, ancestors — у его предков (комбинаторы " " и ">").
+    Признак — ("id" | "class" | "attr" | "tag", значение); element=None — проверять всё.
+    """
+
+    element: tuple[str, str] | None
+    ancestors: tuple[tuple[str, str], ...] = ()
+    # условия на атрибуты самого элемента и, для комбинатора ">", его родителя:
+    # (атрибут, оператор, значение)
+    attributes: tuple[tuple[str, str, str], ...] = ()
+    parent_attributes: tuple[tuple[str, str, str], ...] = ()
+
+
+@lru_cache(maxsize=512)
+def selector_keys(selector: str) -> SelectorKeys:
+    # атрибуты заменяются номерами: в значениях бывают пробелы и символы комбинаторов
+    attributes = []
+
+    def mask(match: re.Match) -> str:
+        name, operator, *values, _ = match.groups()
+        value = next((v for v in values if v is not None), "")
+        # значения сравниваются без учёта регистра: soupsieve так сравнивает, например, type
+        attributes.append((name.lower(), operator, value.lower()))
+        return f"[{len(attributes) - 1}]"
+
+    masked = ATTRIBUTE_RE.sub(mask, selector.strip())
+    if any(char in PLACEHOLDER_RE.sub("", masked) for char in ",()[\\|\"'"):
+        return SelectorKeys(None)
+
+    parts = COMBINATOR_RE.split(masked)
+    compounds, combinators = parts[::2], parts[1::2]
+
+    def conditions(compound: str) -> tuple:
+        return tuple(attributes[int(i)] for i in PLACEHOLDER_RE.findall(compound))
+
+    def key(compound: str):
+        return _compound_key(compound, conditions(compound))
+
+    ancestors = ()
+    if all(combinator in (None, ">") for combinator in combinators):
+        ancestors = tuple(filter(None, map(key, compounds[:-1])))
+    parent_attributes = ()
+    if combinators and combinators[-1] == ">":
+        parent_attributes = conditions(compounds[-2])
+
+    return SelectorKeys(
+        key(compounds[-1]),
+        ancestors,
+        conditions(compounds[-1]),
+        parent_attributes,
+    )
+
+
+def precompile(groups: Iterable[Sequence[str]]):
+    """
+    Компилирует селекторы заранее, при импорте модуля
+    """
+    for group in groups:
+        for selector in group:
+            compile_selector(selector)
+            selector_keys(selector)
+
+
+class SelectorIndex:
+    """
+    Совпадения нескольких групп CSS-селекторов, собранные за один обход дерева.
+    Элемент проверяется в soupsieve только теми селекторами, признаки которых
+    (selector_keys) есть у него и у его предков, — остальные отбрасываются сразу.
+    matches(group) возвращает по списку элементов на каждый селектор группы
+    в порядке документа — то же, что soup.select(selector) для каждого из них.
+    Группа, которой не было при создании, собирается отдельным обходом при первом запросе.
+    """
+
+    def __init__(self, root: Tag, groups: Iterable[Sequence[str]] = ()):
+        self.root = root
+        self._matches: dict[tuple[str, ...], list[list[Tag]]] = {}
+        self._collect([tuple(group) for group in groups])
+
+    def matches(self, group: Sequence[str]) -> list[list[Tag]]:
+        group = tuple(group)
+        if group not in self._matches:
+            self._collect([group])
+        return self._matches[group]
+
+    def _collect(self, groups: list[tuple[str, ...]]):
+        selectors = list(dict.fromkeys(selector for group in groups for selector in group))
+        found: dict[str, list[Tag]] = {selector: [] for selector in selectors}
+
+        everywhere = []
+        by_key: dict[tuple[str, str], list] = {}
+        for selector in selectors:
+            keys = selector_keys(selector)
+            target = (found[selector], compile_selector(selector), keys)
+            if keys.element is None:
+                everywhere.append(target)
+            else:
+                by_key.setdefault(keys.element, []).append(target)
+
+        if selectors:
+            self._walk(everywhere, by_key)
+
+        for group in groups:
+            self._matches[group] = [found[selector] for selector in group]
+
+    def _walk(self, everywhere: list, by_key: dict):
+        """
+        Обход в порядке документа со счётчиком признаков текущих предков
+        """
+        above = Counter()
+        stack = [(child, None) for child in reversed(self.root.contents)]
+
+        while stack:
+            element, leaving = stack.pop()
+            if leaving is not None:
+                above.subtract(leaving)
+                continue
+            if not isinstance(element, Tag):
+                continue
+
+            keys = _element_keys(element)
+            targets = everywhere + [target for key in keys for target in by_key.get(key, ())]
+            for elements, matcher, selector in targets:
+                if (
+                    all(above[key] > 0 for key in selector.ancestors)
+                    and _attributes_match(element, selector.attributes)
+                    and _attributes_match(element.parent, selector.parent_attributes)
+                    and matcher.match(element)
+                ):
+                    elements.append(element)
+
+            if element.contents:
+                above.update(keys)
+                stack.append((element, keys))
+                stack.extend((child, None) for child in reversed(element.contents))
+
+
+def _compound_key(compound: str, attributes: tuple) -> tuple[str, str] | None:
+    """
+    Самый редкий признак составного селектора: id, класс, атрибут, тег, атрибут class
+    """
+    bare = PLACEHOLDER_RE.sub("", compound)
+
+    if found := ID_RE.search(bare):
+        return "id", found.group(1)
+    if found := CLASS_RE.search(bare):
+        return "class", found.group(1)
+    for name, _, _ in attributes:
+        if name != "class":
+            return "attr", name
+    if found := TAG_RE.match(bare):
+        return "tag", found.group(1).lower()
+    if attributes:
+        return "attr", "class"
+    return None
+
+
+def _attributes_match(element: Tag | None, attributes: tuple) -> bool:
+    """
+    Быстрая проверка условий [атрибут оператор значение] без soupsieve
+    """
+    for name, operator, expected in attributes:
+        if element is None or name not in element.attrs:
+            return False
+        if operator is None:
+            continue
+
+        value = element.attrs[name]
+        value = (value if isinstance(value, str) else " ".join(value)).lower()
+
+        if operator == "=":
+            matched = value == expected
+        elif operator == "*=":
+            matched = expected in value
+        elif operator == "^=":
+            matched = value.startswith(expected)
+        elif operator == "$=":
+            matched = value.endswith(expected)
+        elif operator == "~=":
+            matched = expected in value.split()
+        else:
+            matched = value == expected or value.startswith(f"{expected}-")
+        if not matched:
+            return False
+    return True
+
+
+def _element_keys(element: Tag) -> set[tuple[str, str]]:
+    keys = {("tag", element.name)}
+    for name, value in element.attrs.items():
+        keys.add(("attr", name))
+        if name == "id":
+            keys.add(("id", value))
+        elif name == "class":
+            classes = value.split() if isinstance(value, str) else value
+            keys.update(("class", cls) for cls in classes)
+    return keys
+
+
+@lru_cache(maxsize=1)
+def _has_lxml() -> bool:
+    return importlib.util.find_spec("lxml") is not None
@@ -0,0 +1,309 @@
+import re
+from collections.abc import Callable
+
+from api.v1.recipe.constants import UNIT_SYNONYMS
+from api.v1.recipe.utils.helpers import UnitConverter, clean_name
+from recipe.choices import Unit
+
+DIGITS_RE = re.compile(r"\d+")
+NAME_LETTERS = frozenset("abcdefghijklmnopqrstuvwxyzабвгдеёжзийклмнопрстуфхцчшщъыьэюя")
+
+TO_TASTE_KEYS = [key for key, unit in UNIT_SYNONYMS.items() if unit == Unit.TO_TASTE]
+TO_TASTE_RES = {key: re.compile(re.escape(key), re.IGNORECASE) for key in TO_TASTE_KEYS}
+
+
+def _build_unit_trie() -> dict:
+    """
+    Посимвольное дерево единиц измерения: "" в узле — ключ, который здесь заканчивается
+    """
+    trie: dict = {}
+    for key in UNIT_SYNONYMS:
+        node = trie
+        for char in key:
+            node = node.setdefault(char, {})
+        node[""] = key
+    return trie
+
+
+UNIT_TRIE = _build_unit_trie()
+
+
+def parse_ingredient_line(text: str) -> tuple[str, float | None, str | None]:
+    """
+    Разбирает строку ингредиента на (название, количество, единицу).
+    Строка проходится один раз: находятся группы цифр, единица ищется
+    по дереву UNIT_TRIE сразу за числом. Порядок правил тот же, что и раньше:
+    "по вкусу" → диапазон → число с единицей → "1банан" → "молоко 200".
+    """
+    lower = text.lower()
+
+    # --- "по вкусу" / "щепотка" и аналоги ---
+    for key in TO_TASTE_KEYS:
+        if key in lower:
+            name = TO_TASTE_RES[key].sub("", text)
+            return clean_name(name), None, Unit.TO_TASTE.value
+
+    amount: float | None = None
+    unit: str | None = None
+    working = lower
+
+    # --- диапазон: "40–50 г" или "1–2 ст. л."; единица ищется в остатке строки ---
+    found = _find_range(working)
+    if found:
+        start, end, amount = found
+        working = working[:start] + " " + working[end:]
+
+        unit_match = _find_unit_anywhere(working)
+        if unit_match:
+            unit_start, unit_end, raw_unit = unit_match
+            amount, unit = UnitConverter.convert(amount, UNIT_SYNONYMS[raw_unit].value)
+            working = working[:unit_start] + " " + working[unit_end:]
+
+    # --- число + единица (в любом месте строки) ---
+    if unit is None:
+        found = _find_amount_unit(working)
+        if found:
+            start, end, number, to_value, raw_unit = found
+            if amount is None:
+                amount = to_value(number)
+            amount, unit = UnitConverter.convert(amount, UNIT_SYNONYMS[raw_unit].value)
+            working = working[:start] + " " + working[end:]
+
+        else:
+            prefix = _match_prefix(working.strip())
+            if prefix:
+                # --- "1банан" — число слитно с названием ---
+                number, to_value, working = prefix
+                if amount is None:
+                    amount = to_value(number)
+                unit = Unit.PC.value
+
+            else:
+                # --- "молоко 200" — число в конце без единицы ---
+                suffix = _find_suffix(working)
+                if suffix:
+                    start, number = suffix
+                    if amount is None:
+                        amount = _to_float(number)
+                    working = working[:start]
+                    unit = Unit.PC.value
+
+    # если amount нашли, но unit так и не определился → штуки
+    if amount is not None and unit is None:
+        unit = Unit.PC.value
+
+    return clean_name(working), amount, unit
+
+
+# ----------------------------------------------------------------------
+# Числа
+# ----------------------------------------------------------------------
+
+def _decimal_end(text: str, end: int) -> int:
+    """
+    Конец числа "12" / "1,5" / "1.5", начинающегося группой цифр, которая кончается в end
+    """
+    if end + 1 < len(text) and text[end] in ".," and text[end + 1].isdecimal():
+        end += 1
+        while end < len(text) and text[end].isdecimal():
+            end += 1
+    return end
+
+
+def _digits_end(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos].isdecimal():
+        pos += 1
+    return pos
+
+
+def _fraction_end(text: str, end: int) -> int | None:
+    """
+    "1/2": после группы цифр, кончающейся в end, идёт "/" и цифры
+    """
+    if end + 1 < len(text) and text[end] == "/" and text[end + 1].isdecimal():
+        return _digits_end(text, end + 1)
+    return None
+
+
+def _mixed_end(text: str, end: int) -> int | None:
+    """
+    "1 1/2": после группы цифр — пробелы и дробь
+    """
+    pos = _skip_spaces(text, end)
+    if pos == end or pos >= len(text) or not text[pos].isdecimal():
+        return None
+    return _fraction_end(text, _digits_end(text, pos))
+
+
+def _to_float(number: str) -> float:
+    return float(number.replace(",", "."))
+
+
+def _fraction_value(fraction: str) -> float:
+    num, den = fraction.split("/")
+    return round(float(num) / float(den), 2)
+
+
+def _mixed_value(mixed: str) -> float:
+    whole, fraction = mixed.split(None, 1)
+    return float(whole) + _fraction_value(fraction.strip())
+
+
+def _skip_spaces(text: str, pos: int) -> int:
+    while pos < len(text) and text[pos].isspace():
+        pos += 1
+    return pos
+
+
+# ----------------------------------------------------------------------
+# Поиск по строке
+# ----------------------------------------------------------------------
+
+def _find_range(text: str) -> tuple[int, int, float] | None:
+    """
+    Первый диапазон "a-b" / "a – b"; количество — среднее
+    """
+    for digits in DIGITS_RE.finditer(text):
+        first_end = _decimal_end(text, digits.end())
+        pos = _skip_spaces(text, first_end)
+        if pos >= len(text) or text[pos] not in "-–":
+            continue
+
+        pos = _skip_spaces(text, pos + 1)
+        if pos >= len(text) or not text[pos].isdecimal():
+            continue
+
+        second_end = _decimal_end(text, _digits_end(text, pos))
+        first = _to_float(text[digits.start():first_end])
+        second = _to_float(text[pos:second_end])
+        return digits.start(), second_end, round((first + second) / 2, 2)
+
+    return None
+
+
+def _find_amount_unit(text: str) -> tuple[int, int, str, Callable, str] | None:
+    """
+    Первое число, за которым (через пробелы и необязательное тире) идёт единица
+    """
+    for digits in DIGITS_RE.finditer(text):
+        start = digits.start()
+        candidates = [(_decimal_end(text, digits.end()), _to_float)]
+
+        mixed_end = _mixed_end(text, digits.end())
+        if mixed_end:
+            candidates.append((mixed_end, _mixed_value))
+
+        fraction_end = _fraction_end(text, digits.end())
+        if fraction_end:
+            candidates.append((fraction_end, _fraction_value))
+
+        for number_end, to_value in candidates:
+            pos = _skip_spaces(text, number_end)
+            if pos < len(text) and text[pos] in "-–":
+                pos = _skip_spaces(text, pos + 1)
+
+            unit_match = _match_unit(text, pos)
+            if unit_match:
+                unit_end, raw_unit = unit_match
+                return start, unit_end, text[start:number_end], to_value, raw_unit
+
+    return None
+
+
+def _find_unit_anywhere(text: str) -> tuple[int, int, str] | None:
+    """
+    Первая единица измерения без числа (после вырезания диапазона)
+    """
+    for pos, char in enumerate(text):
+        if char in UNIT_TRIE:
+            unit_match = _match_unit(text, pos)
+            if unit_match:
+                return pos, *unit_match
+    return None
+
+
+def _match_unit(text: str, pos: int) -> tuple[int, str] | None:
+    """
+    Самая длинная единица, начинающаяся в pos и заканчивающаяся на границе слова;
+    точка сразу за единицей ("шт.") забирается вместе с ней
+    """
+    node = UNIT_TRIE
+    matches = []
+    end = pos
+    while end < len(text) and text[end] in node:
+        node = node[text[end]]
+        end += 1
+        if "" in node:
+            matches.append((end, node[""]))
+
+    for unit_end, key in reversed(matches):
+        if _is_boundary(text, unit_end):
+            if unit_end < len(text) and text[unit_end] == ".":
+                unit_end += 1
+            return unit_end, key
+
+    return None
+
+
+def _is_boundary(text: str, pos: int) -> bool:
+    before = pos > 0 and _is_word(text[pos - 1])
+    after = pos < len(text) and _is_word(text[pos])
+    return before != after
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char == "_"
+
+
+def _match_prefix(text: str) -> tuple[str, Callable, str] | None:
+    """
+    "1банан", "2 яйца": строка начинается с числа, сразу за которым название
+    """
+    if not text or not text[0].isdecimal():
+        return None
+
+    digits_end = _digits_end(text, 0)
+    candidates = []
+
+    number_end = _decimal_end(text, digits_end)
+    fraction_end = _fraction_end(text, number_end)
+    if fraction_end:
+        candidates.append((fraction_end, _fraction_or_decimal_value))
+    candidates.append((number_end, _to_float))
+
+    mixed_end = _mixed_end(text, digits_end)
+    if mixed_end:
+        candidates.append((mixed_end, _mixed_value))
+
+    for end, to_value in candidates:
+        pos = _skip_spaces(text, end)
+        if pos < len(text) and text[pos] in NAME_LETTERS:
+            name_end = pos + 1
+            while name_end < len(text) and (
+                text[name_end] in NAME_LETTERS or text[name_end].isspace() or text[name_end] == "-"
+            ):
+                name_end += 1
+            return text[:end], to_value, text[pos:name_end]
+
+    return None
+
+
+def _fraction_or_decimal_value(number: str) -> float:
+    """
+    "1/2" — дробь; "1,5/2" разбирается как прежде: по числу до "/"
+    """
+    head = number.split("/")[0]
+    if "," in head or "." in head:
+        return _to_float(head)
+    return _fraction_value(number)
+
+
+def _find_suffix(text: str) -> tuple[int, str] | None:
+    """
+    Число в конце строки (после него только пробелы)
+    """
+    for digits in DIGITS_RE.finditer(text):
+        end = _decimal_end(text, digits.end())
+        if _skip_spaces(text, end) == len(text):
+            return digits.start(), text[digits.start():end]
+    return None
@@ -0,0 +1,92 @@
+class JsonObjectScanner:
+    """
+    Инкрементальный разбор JSON-объекта, приходящего по кусочкам (стрим LLM).
+    Не строит объект, а следит за вложенностью: понимает, когда закрылся
+    объект верхнего уровня, и считает прогресс по ключам рецепта.
+    Текст до первой "{" (```json и т.п.) пропускается.
+    """
+
+    def __init__(self):
+        self.buffer: list[str] = []
+        self.done = False
+        self.title: str | None = None
+        self.counts: dict[str, int] = {}
+
+        # стек контейнеров: [тип ("{" или "["), текущий ключ объекта]
+        self._stack: list[list] = []
+        self._in_string = False
+        self._escape = False
+        self._string: list[str] = []
+        self._last_key: str | None = None
+        self._expect_value = False
+
+    @property
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Принимает очередной кусок ответа; True — объект верхнего уровня закрыт
+        """
+        for char in chunk:
+            if self.done:
+                break
+            if not self._stack and char != "{":
+                continue
+
+            self.buffer.append(char)
+
+            if self._in_string:
+                self._feed_string(char)
+            else:
+                self._feed_structure(char)
+
+        return self.done
+
+    def _feed_string(self, char: str):
+        if self._escape:
+            self._escape = False
+            self._string.append(char)
+        elif char == "\\":
+            self._escape = True
+        elif char == '"':
+            self._in_string = False
+            self._on_string("".join(self._string))
+        else:
+            self._string.append(char)
+
+    def _feed_structure(self, char: str):
+        if char == '"':
+            self._in_string = True
+            self._string = []
+        elif char == ":":
+            self._stack[-1][1] = self._last_key
+            self._expect_value = True
+        elif char == ",":
+            self._expect_value = False
+        elif char in "{[":
+            self._stack.append([char, None])
+            self._expect_value = False
+        elif char in "}]":
+            container, _ = self._stack.pop()
+            self._expect_value = False
+            if not self._stack:
+                self.done = True
+            elif container == "{":
+                self._on_item_closed()
+
+    def _on_string(self, value: str):
+        if not self._expect_value:
+            self._last_key = value
+            return
+
+        if len(self._stack) == 1 and self._stack[0][1] == "title" and self.title is None:
+            self.title = value
+
+    def _on_item_closed(self):
+        """
+        Закрылся объект внутри массива верхнего уровня (ингредиент, шаг)
+        """
+        if len(self._stack) == 2 and self._stack[-1][0] == "[":
+            key = self._stack[0][1]
+            self.counts[key] = self.counts.get(key, 0) + 1
@@ -0,0 +1,69 @@
+import json
+
+from bs4.dammit import UnicodeDammit
+
+from api.v1.recipe.constants import (
+    JSON_LD_SCRIPT_RE,
+    JSON_LD_WRAPPER_RE,
+    META_CHARSET_RE,
+    META_CHARSET_SNIFF_BYTES,
+)
+
+
+def json_ld_blocks(content: bytes, encoding: str | None = None) -> list:
+    """
+    Содержимое всех <script type="application/ld+json"> страницы, разобранное как JSON.
+    Блоки ищутся регулярным выражением в сырых байтах — DOM не строится.
+    Невалидные блоки пропускаются. Без кодировки из заголовка берётся
+    объявленная в <meta> страницы.
+    """
+    encoding = encoding or _declared_charset(content)
+    blocks = []
+    for match in JSON_LD_SCRIPT_RE.finditer(content):
+        text = JSON_LD_WRAPPER_RE.sub("", _decode(match.group(1), encoding))
+        try:
+            # strict=False: переводы строк внутри строк встречаются в JSON-LD сплошь и рядом
+            blocks.append(json.loads(text, strict=False))
+        except ValueError:
+            continue
+    return blocks
+
+
+def json_ld_items(block) -> list[dict]:
+    """
+    Сущности одного блока: массив верхнего уровня и @graph разворачиваются
+    """
+    items = []
+    for item in block if isinstance(block, list) else [block]:
+        if not isinstance(item, dict):
+            continue
+        graph = item.get("@graph")
+        if isinstance(graph, list):
+            items.extend(node for node in graph if isinstance(node, dict))
+        else:
+            items.append(item)
+    return items
+
+
+def schema_types(item: dict) -> set[str]:
+    """
+    @type сущности: строка или список строк
+    """
+    types = item.get("@type")
+    if isinstance(types, str):
+        return {types}
+    if isinstance(types, list):
+        return {t for t in types if isinstance(t, str)}
+    return set()
+
+
+def _declared_charset(content: bytes) -> str | None:
+    found = META_CHARSET_RE.search(content[:META_CHARSET_SNIFF_BYTES])
+    return found.group(1).decode("ascii") if found else None
+
+
+def _decode(raw: bytes, encoding: str | None) -> str:
+    try:
+        return raw.decode(encoding or "utf-8")
+    except (UnicodeDecodeError, LookupError):
+        return UnicodeDammit(raw, [encoding] if encoding else []).unicode_markup or ""
@@ -0,0 +1,32 @@
+def trigrams(text: str) -> frozenset[str]:
+    """
+    Триграммы строки так же, как их строит pg_trgm: нижний регистр, слова из букв
+    и цифр, каждое дополняется двумя пробелами слева и одним справа
+    """
+    grams = set()
+    for word in _words(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(left: frozenset[str], right: frozenset[str]) -> float:
+    """
+    similarity() из pg_trgm: доля общих триграмм от объединения
+    """
+    if not left or not right:
+        return 0.0
+    common = len(left & right)
+    return common / (len(left) + len(right) - common)
+
+
+def _words(text: str):
+    word = []
+    for char in text:
+        if char.isalnum():
+            word.append(char)
+        elif word:
+            yield "".join(word)
+            word = []
+    if word:
+        yield "".join(word)
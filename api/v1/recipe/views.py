@@ -6,7 +6,6 @@ from rest_framework.response import Response
 from api.v1.recipe.repositories.recipe_repository import RecipeRepository
 from api.v1.recipe.serializers import ParseUrlSerializer, RecipeSourceSerializer
 from api.v1.recipe.services.url_classifier import UrlClassifier
-from api.v1.recipe.services.web_parser import WebParserService
 from api.v1.recipe.tasks import parse_video_recipe, parse_web_recipe
 from api.v1.recipe.usecases.create_recipe_usecase import CreateRecipeFromExistingSourceUseCase
 from app.models import StatusChoices
@@ -84,31 +83,28 @@ class ParseUrlAPIView(generics.CreateAPIView):
 
         if created or recipe_source.status in [ StatusChoices.ERROR, StatusChoices.PENDING ]: 
             recipe_source.status = StatusChoices.PROCESSING
-            recipe_source.save(update_fields=["status"])
+            recipe_source.error_message = None
+            recipe_source.save(update_fields=["status", "error_message"])
             
+            # Проверка страницы — первый шаг задачи, запрос не ждёт сторонний сайт
             if url_info.source == Source.WEBSITE:
-                try:
-                    WebParserService().validate_url(url_info.final_url)
-                except ValidationError as e:
-                    if created:
-                        recipe_source.delete()
-                    return Response(
-                        {"url": [str(e.message)]},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-                
-                recipe_source.status = StatusChoices.PROCESSING     
-                recipe_source.save(update_fields=["status"])
                 parse_web_recipe.delay(recipe_source.id, request.user.id, url_info.final_url)
             else:  
                 parse_video_recipe.delay(recipe_source.id, request.user.id, url_info.final_url)
+
+            return Response({
+                "id": recipe_source.id,
+                "status": recipe_source.get_status_display(),
+                "url": recipe_source.url,
+                "created": created,
+            }, status=status.HTTP_202_ACCEPTED)
             
         return Response({
             "id": recipe_source.id,
             "status": recipe_source.get_status_display(),
             "url": recipe_source.url,
             "created": created,
-        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+        }, status=status.HTTP_200_OK)
     
 
 class ParseUrlSatusAPIView(generics.RetrieveAPIView):
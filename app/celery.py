@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
@@ -13,6 +14,24 @@ app.autodiscover_tasks([
 ])
 
 
+@worker_process_init.connect
+def preload_whisper_models(**kwargs):
+    """
+    Загружает модели Whisper для очередей воркера при старте процесса.
+    Процесс считается запущенным только после возврата из обработчика, поэтому
+    settings.CELERY_WORKER_PROC_ALIVE_TIMEOUT должен покрывать время загрузки
+    """
+    from django.conf import settings
+
+    from api.v1.recipe.services.whisper_models import WhisperModelManager
+
+    if not settings.WHISPER_PRELOAD:
+        return
+
+    consume_from = app.amqp.queues.consume_from
+    WhisperModelManager.preload(list(consume_from) if consume_from else None)
+
+
 @app.task(bind=True)
 def debug_task(self):
     print(f'✅ Celery работает! Request: {self.request!r}')
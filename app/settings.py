@@ -262,6 +262,14 @@ ACCOUNT_FORMS = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_URL", "redis://redis:6379/1"),
+    }
+}
+
+
 CELERY_BROKER_URL = 'redis://redis:6379/0'  
 CELERY_RESULT_BACKEND = 'redis://redis:6379/0'
 
@@ -279,4 +287,104 @@ CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
 
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
-CELERY_RESULT_EXPIRES = 3600
\ No newline at end of file
+CELERY_RESULT_EXPIRES = 3600
+
+
+# Модели Whisper по очередям Celery ("default" — для остальных очередей)
+WHISPER_MODELS = {
+    "default": {
+        "model_size": os.getenv("WHISPER_MODEL", "small"),
+        "device": os.getenv("WHISPER_DEVICE", "cpu"),
+        "compute_type": os.getenv("WHISPER_COMPUTE_TYPE", "int8"),
+        "cpu_threads": int(os.getenv("WHISPER_CPU_THREADS", "0")),
+        # Веса модели общие для всех воркеров; при num_workers > 1 аудио длиннее
+        # 10 минут режется по паузам и распознаётся параллельно. Каждый кусок
+        # распознаётся без текста предыдущего, поэтому на границах возможны
+        # расхождения с последовательной транскрипцией; WHISPER_NUM_WORKERS=1 их исключает
+        "num_workers": int(os.getenv("WHISPER_NUM_WORKERS", "2")),
+    },
+}
+
+# Загружать модели при старте процесса воркера, а не в первой задаче
+WHISPER_PRELOAD = os.getenv("WHISPER_PRELOAD", "True") == "True"
+# Сколько ждать, пока дочерний процесс prefork сообщит о готовности (сек): предзагрузка
+# модели идёт в worker_process_init и с первой загрузкой "small" занимает десятки секунд,
+# а при стандартных 4 сек Celery убивает процесс и запускает его заново по кругу
+CELERY_WORKER_PROC_ALIVE_TIMEOUT = float(os.getenv("CELERY_WORKER_PROC_ALIVE_TIMEOUT", "300"))
+
+# Видео длиннее VIDEO_MAX_DURATION (сек) не распознаются. Видео длиннее
+# VIDEO_LONG_DURATION переносятся в очередь VIDEO_LONG_QUEUE, если она задана
+VIDEO_MAX_DURATION = int(os.getenv("VIDEO_MAX_DURATION", str(60 * 60)))
+VIDEO_LONG_DURATION = int(os.getenv("VIDEO_LONG_DURATION", str(20 * 60)))
+VIDEO_LONG_QUEUE = os.getenv("VIDEO_LONG_QUEUE")
+
+# Кеш ответов LLM: время жизни (сек) и максимальное число записей
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000"))
+
+# Ollama: адрес, таймаут запроса (сек) и число одновременных запросов к серверу
+# от всех процессов — должно совпадать с OLLAMA_NUM_PARALLEL сервера. Слоты лежат
+# в общем кеше; слот упавшего процесса освобождается через LLM_SLOT_TTL сек
+LLM_HOST = os.getenv("HOST")
+LLM_TIMEOUT = int(os.getenv("LLM_TIMEOUT", "300"))
+LLM_MAX_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+LLM_SLOT_TTL = int(os.getenv("LLM_SLOT_TTL", str(15 * 60)))
+# Максимальный num_ctx: более длинные транскрипты обрабатываются частями
+LLM_MAX_CTX = int(os.getenv("LLM_MAX_CTX", "4096"))
+
+# Повторная нормализация RecipeSource.parsed_recipe (manage.py renormalize_sources):
+# строк в чанке и число процессов пула
+RENORMALIZE_CHUNK_SIZE = int(os.getenv("RENORMALIZE_CHUNK_SIZE", "500"))
+RENORMALIZE_WORKERS = int(os.getenv("RENORMALIZE_WORKERS", str(os.cpu_count() or 1)))
+
+# Сопоставление ингредиентов с продуктами в памяти процесса (ProductMatcher) вместо
+# запроса к БД; индексы хранятся для PRODUCT_MATCHER_MAX_USERS последних пользователей
+PRODUCT_MATCHER_ENABLED = os.getenv("PRODUCT_MATCHER_ENABLED", "False") == "True"
+PRODUCT_MATCHER_MAX_USERS = int(os.getenv("PRODUCT_MATCHER_MAX_USERS", "128"))
+# Порог схожести для поиска продуктов по триграммам (pg_trgm и ProductMatcher)
+PRODUCT_SIMILARITY_THRESHOLD = float(os.getenv("PRODUCT_SIMILARITY_THRESHOLD", "0.5"))
+
+# Обложки рецептов: максимальный размер файла и сколько помнить, в какой файл
+# хранилища уже загружен URL картинки (сек)
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+IMAGE_URL_CACHE_TTL = int(os.getenv("IMAGE_URL_CACHE_TTL", str(7 * 24 * 60 * 60)))
+# Повтор скачивания обложки при сетевой ошибке или 5xx: пауза IMAGE_RETRY_BACKOFF * 2^n сек
+IMAGE_RETRY_BACKOFF = int(os.getenv("IMAGE_RETRY_BACKOFF", "30"))
+
+# Уменьшенные копии обложек (WebP): ширины в пикселях и качество сжатия
+IMAGE_VARIANT_WIDTHS = tuple(
+    int(width) for width in os.getenv("IMAGE_VARIANT_WIDTHS", "160,480,1024").split(",")
+)
+IMAGE_WEBP_QUALITY = int(os.getenv("IMAGE_WEBP_QUALITY", "80"))
+
+# Парсер HTML для WebParserService: auto (lxml, если установлен), lxml или html.parser.
+# lxml не входит в зависимости проекта и ставится отдельно: pip install "lxml>=6,<7"
+WEB_PARSER_BACKEND = os.getenv("WEB_PARSER_BACKEND", "auto")
+
+# Дисковый HTTP-кеш страниц рецептов (WebParserService): каталог общий для веба
+# и воркеров Celery, при превышении размера удаляются давно не читанные ответы
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "True") == "True"
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.expanduser("~/.cache/http"))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+# Исходящие HTTP-запросы (HttpClient): пулы keep-alive соединений для HTTP_POOL_HOSTS
+# хостов, не больше HTTP_HOST_MAX_CONCURRENCY одновременных запросов к хосту в процессе
+# и HTTP_HOST_RATE_LIMIT запросов к хосту за HTTP_HOST_RATE_PERIOD сек во всех процессах
+# (0 — без ограничения); повторы на 429/503 с паузой HTTP_RETRY_BACKOFF * 2^n сек,
+# Retry-After сервера соблюдается, но не дольше HTTP_RETRY_AFTER_MAX сек
+HTTP_USER_AGENT = os.getenv(
+    "HTTP_USER_AGENT",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/91.0.4472.124 Safari/537.36",
+)
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+HTTP_HOST_MAX_CONCURRENCY = int(os.getenv("HTTP_HOST_MAX_CONCURRENCY", "4"))
+HTTP_HOST_RATE_LIMIT = int(os.getenv("HTTP_HOST_RATE_LIMIT", "5"))
+HTTP_HOST_RATE_PERIOD = float(os.getenv("HTTP_HOST_RATE_PERIOD", "1"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+HTTP_RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "1"))
+HTTP_RETRY_AFTER_MAX = float(os.getenv("HTTP_RETRY_AFTER_MAX", "30"))
+
+# Замеры времени исходящих запросов (HttpMetrics) сбрасываются из процесса в общий кеш
+# не реже раза в HTTP_METRICS_FLUSH_INTERVAL сек; смотреть — manage.py http_metrics
+HTTP_METRICS_FLUSH_INTERVAL = float(os.getenv("HTTP_METRICS_FLUSH_INTERVAL", "10"))
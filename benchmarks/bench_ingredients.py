@@ -0,0 +1,195 @@
+"""
+Бенчмарк разбора строк ингредиентов: прежний каскад регулярных выражений
+против однопроходного parse_ingredient_line. Заодно сверяет результаты.
+
+Строки — поле raw ингредиентов корпуса рецептов (benchmarks.corpus): образец,
+JSONL или RecipeSource.parsed_recipe. --lines берёт строки из текстового файла,
+например синтетические краевые случаи benchmarks/data/ingredients_synthetic.txt:
+
+    python -m benchmarks.bench_ingredients --from-db --repeat 10
+    python -m benchmarks.bench_ingredients --lines benchmarks/data/ingredients_synthetic.txt
+"""
+
+import argparse
+import os
+import re
+import time
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from api.v1.recipe.constants import UNIT_SYNONYMS  # noqa: E402
+from api.v1.recipe.utils.helpers import UnitConverter  # noqa: E402
+from api.v1.recipe.utils.ingredient_parser import parse_ingredient_line  # noqa: E402
+from benchmarks import corpus  # noqa: E402
+from recipe.choices import Unit  # noqa: E402
+
+# ----------------------------------------------------------------------
+# Прежняя реализация (RecipeBuilderService._parse_ingredient + clean_name)
+# ----------------------------------------------------------------------
+
+UNIT_KEYS = sorted(UNIT_SYNONYMS.keys(), key=len, reverse=True)
+
+AMOUNT_UNIT_RE = re.compile(
+    rf"""
+    (?P<amount>\d+(?:[.,]\d+)?|\d+\s+\d+/\d+|\d+/\d+)
+    \s*[-–]?\s*
+    (?P<unit>{'|'.join(map(re.escape, UNIT_KEYS))})
+    \b
+    \.?
+    """,
+    re.IGNORECASE | re.VERBOSE
+)
+AMOUNT_PREFIX_RE = re.compile(
+    r"^(\d+(?:[.,]\d+)?(?:/\d+)?|\d+\s+\d+/\d+)\s*([а-яёa-z][а-яёa-z\s\-]*)",
+    re.IGNORECASE,
+)
+AMOUNT_SUFFIX_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*$")
+RANGE_RE = re.compile(r"(\d+(?:[.,]\d+)?)\s*[-–]\s*(\d+(?:[.,]\d+)?)")
+UNIT_ONLY_RE = re.compile(
+    rf"(?P<unit>{'|'.join(map(re.escape, UNIT_KEYS))})\b\.?",
+    re.IGNORECASE
+)
+
+
+def legacy_clean_name(name: str) -> str:
+    name = re.sub(r"\(.*?\)", " ", name)
+    name = re.sub(r"\d+\s+\d+/\d+", "", name)
+    name = re.sub(r"\d+/\d+", "", name)
+    name = re.sub(r"\b\d+(?:[.,]\d+)?\b", "", name)
+    name = re.sub(r"[^а-яёА-ЯЁa-zA-Z\s\-]", " ", name)
+    name = re.sub(r"(?<!\w)-(?!\w)", " ", name)
+    return re.sub(r"\s+", " ", name).strip().lower()
+
+
+def legacy_parse_amount(text: str) -> float | None:
+    text = text.strip()
+
+    mixed_match = re.match(r"(\d+)\s+(\d+)/(\d+)", text)
+    if mixed_match:
+        whole, num, den = mixed_match.groups()
+        return float(whole) + round(float(num) / float(den), 2)
+
+    fraction_match = re.match(r"(\d+)/(\d+)", text)
+    if fraction_match:
+        num, den = fraction_match.groups()
+        return round(float(num) / float(den), 2)
+
+    number_match = re.match(r"\d+(?:[.,]\d+)?", text)
+    if number_match:
+        return float(number_match.group(0).replace(",", "."))
+
+    return None
+
+
+def legacy_parse_ingredient_line(text: str) -> tuple[str, float | None, str | None]:
+    lower = text.lower()
+
+    for key, unit in UNIT_SYNONYMS.items():
+        if unit == Unit.TO_TASTE and key in lower:
+            pattern = re.compile(re.escape(key), re.IGNORECASE)
+            return legacy_clean_name(pattern.sub("", text)), None, Unit.TO_TASTE.value
+
+    amount = None
+    unit = None
+    working = lower
+
+    range_match = RANGE_RE.search(working)
+    if range_match:
+        a, b = range_match.groups()
+        amount = round((float(a.replace(",", ".")) + float(b.replace(",", "."))) / 2, 2)
+        working = working[: range_match.start()] + " " + working[range_match.end():]
+
+        unit_only_match = UNIT_ONLY_RE.search(working)
+        if unit_only_match:
+            unit_enum = UNIT_SYNONYMS.get(unit_only_match.group("unit").lower())
+            unit = unit_enum.value if unit_enum else None
+            amount, unit = UnitConverter.convert(amount, unit)
+            working = working[: unit_only_match.start()] + " " + working[unit_only_match.end():]
+
+    if unit is None:
+        unit_match = AMOUNT_UNIT_RE.search(working)
+        if unit_match:
+            if amount is None:
+                amount = legacy_parse_amount(unit_match.group("amount"))
+            unit_enum = UNIT_SYNONYMS.get(unit_match.group("unit").lower())
+            unit = unit_enum.value if unit_enum else None
+            amount, unit = UnitConverter.convert(amount, unit)
+            working = working[: unit_match.start()] + " " + working[unit_match.end():]
+        else:
+            prefix_match = AMOUNT_PREFIX_RE.match(working.strip())
+            if prefix_match:
+                if amount is None:
+                    amount = legacy_parse_amount(prefix_match.group(1))
+                working = prefix_match.group(2)
+                unit = Unit.PC.value
+            else:
+                suffix_match = AMOUNT_SUFFIX_RE.search(working)
+                if suffix_match:
+                    if amount is None:
+                        amount = legacy_parse_amount(suffix_match.group(1))
+                    working = working[: suffix_match.start()]
+                    unit = Unit.PC.value
+
+    if amount is not None and unit is None:
+        unit = Unit.PC.value
+
+    return legacy_clean_name(working), amount, unit
+
+
+# ----------------------------------------------------------------------
+
+def measure(func, lines: list[str], repeat: int) -> tuple[float, list]:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        results = [func(line) for line in lines]
+    return time.perf_counter() - started, results
+
+
+def read_lines(args) -> list[str]:
+    if args.lines:
+        with open(args.lines, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+    return [
+        ingredient.raw.strip()
+        for recipe in corpus.load(args)
+        for ingredient in recipe.ingredients
+        if ingredient.raw and ingredient.raw.strip()
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    corpus.add_arguments(parser)
+    parser.add_argument("--lines", type=Path, help="текстовый файл, строка — ингредиент")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = read_lines(args)
+    if not lines:
+        raise SystemExit("Нет строк ингредиентов")
+
+    legacy_time, legacy = measure(legacy_parse_ingredient_line, lines, args.repeat)
+    new_time, new = measure(parse_ingredient_line, lines, args.repeat)
+
+    total = len(lines) * args.repeat
+    print(f"lines: {len(lines)} x {args.repeat}")
+    print(f"{'parser':>12} {'seconds':>8} {'lines/s':>9}")
+    for name, elapsed in (("regex", legacy_time), ("tokenizer", new_time)):
+        print(f"{name:>12} {elapsed:>8.3f} {total / elapsed:>9.0f}")
+    print(f"speedup: {legacy_time / new_time:.1f}x")
+
+    mismatches = list({
+        line: (line, a, b) for line, a, b in zip(lines, legacy, new, strict=True) if a != b
+    }.values())
+    print(f"mismatches: {len(mismatches)}")
+    for line, old, current in mismatches[:20]:
+        print(f"  {line!r}: {old} != {current}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Бенчмарк пропускной способности извлечения рецептов через LLM (извлечений в минуту).
+
+Вместо Ollama поднимается локальная заглушка /api/chat с фиксированной задержкой
+и своим лимитом параллельности (как OLLAMA_NUM_PARALLEL):
+
+    python -m benchmarks.bench_llm --requests 40 --latency 0.5 --parallel 4
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+import ollama  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+from api.v1.recipe.services.llm import LLMService  # noqa: E402
+from api.v1.recipe.services.llm_client import LLMClientPool  # noqa: E402
+
+RECIPE = json.dumps({
+    "title": "Сырники",
+    "meal_type": "breakfast",
+    "ingredients": [{"raw": "творог 500 г"}, {"raw": "2 яйца"}],
+    "steps": [{"step": "Смешать"}, {"step": "Обжарить"}],
+})
+
+
+def stub_server(latency: float, parallel: int) -> ThreadingHTTPServer:
+    slots = threading.BoundedSemaphore(parallel)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with slots:
+                time.sleep(latency)
+            payload = json.dumps({
+                "model": body["model"],
+                "created_at": "2026-01-01T00:00:00Z",
+                "message": {"role": "assistant", "content": RECIPE},
+                "done": True,
+            }).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def fresh_client_sequential(service: LLMService, texts: list[str]):
+    """
+    Прежнее поведение: новый ollama.Client на каждую задачу, запросы по одному
+    """
+    for text in texts:
+        client = ollama.Client(host=settings.LLM_HOST)
+        service._parse_response(
+            client.chat(model=service.model, messages=service._messages(text))
+        )
+
+
+def pooled_sequential(service: LLMService, texts: list[str]):
+    for text in texts:
+        service.extract_recipe(text)
+
+
+def pooled_async(service: LLMService, texts: list[str]):
+    service.extract_recipes(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.5, help="время ответа заглушки, с")
+    parser.add_argument("--parallel", type=int, default=4, help="OLLAMA_NUM_PARALLEL")
+    args = parser.parse_args()
+
+    server = stub_server(args.latency, args.parallel)
+    settings.LLM_HOST = f"http://127.0.0.1:{server.server_port}"
+    settings.LLM_MAX_PARALLEL = args.parallel
+    LLMClientPool.reset()
+
+    service = LLMService()
+    service.model = "stub"
+    texts = [f"рецепт {i}" for i in range(args.requests)]
+
+    print(f"{'mode':>24} {'seconds':>8} {'per minute':>11}")
+    for name, run in (
+        ("fresh client, serial", fresh_client_sequential),
+        ("pooled client, serial", pooled_sequential),
+        (f"pooled async, x{args.parallel}", pooled_async),
+    ):
+        started = time.perf_counter()
+        run(service, texts)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>24} {elapsed:>8.2f} {args.requests / elapsed * 60:>11.0f}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
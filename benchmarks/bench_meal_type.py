@@ -0,0 +1,70 @@
+"""
+Бенчмарк определения типа блюда: regex на каждый синоним против одного
+предкомпилированного выражения в RecipeBuilderService._parse_meal_type.
+
+    python -m benchmarks.bench_meal_type --size 20000
+    python -m benchmarks.bench_meal_type --from-db
+"""
+
+import argparse
+import os
+import re
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from api.v1.recipe.constants import MEAL_TYPE_SYNONYMS  # noqa: E402
+from api.v1.recipe.services.recipe_builder import RecipeBuilderService  # noqa: E402
+from benchmarks import corpus  # noqa: E402
+
+
+def legacy_parse_meal_type(dto):
+    """
+    Прежняя реализация: новый regex на каждый синоним и каждый рецепт
+    """
+    context = dto.meal_type
+
+    if not context:
+        context = " ".join(filter(None, [
+            dto.title,
+            dto.description,
+            " ".join(step.step for step in dto.steps),
+        ]))
+
+    for key, meal_type in MEAL_TYPE_SYNONYMS.items():
+        pattern = rf"\b{re.escape(key.lower())}\b"
+        if re.search(pattern, context.lower()):
+            return meal_type.value
+
+    return None
+
+
+def measure(func, recipes) -> tuple[float, list]:
+    started = time.perf_counter()
+    results = [func(dto) for dto in recipes]
+    return time.perf_counter() - started, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    corpus.add_arguments(parser)
+    args = parser.parse_args()
+
+    recipes = corpus.load(args)
+    builder = RecipeBuilderService()
+
+    legacy_time, legacy = measure(legacy_parse_meal_type, recipes)
+    compiled_time, compiled = measure(builder._parse_meal_type, recipes)
+
+    print(f"recipes: {len(recipes)}")
+    print(f"{'implementation':>16} {'seconds':>8} {'recipes/s':>10}")
+    for name, elapsed in (("per-key regex", legacy_time), ("precompiled", compiled_time)):
+        print(f"{name:>16} {elapsed:>8.3f} {len(recipes) / elapsed:>10.0f}")
+    print(f"speedup: {legacy_time / compiled_time:.1f}x, same results: {legacy == compiled}")
+
+
+if __name__ == "__main__":
+    main()
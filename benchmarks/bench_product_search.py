@@ -0,0 +1,164 @@
+"""
+Бенчмарк поиска продуктов по названию на 1k / 100k / 1M продуктов одного пользователя.
+
+Сравниваются:
+  similarity >= 0.5  — прежний запрос сопоставления (полный перебор продуктов пользователя);
+  name % q           — тот же поиск через оператор % и GIN-индекс product_name_trgm;
+  batch (LATERAL)    — все названия рецепта одним запросом (RecipeRepository);
+  icontains seq/gin  — поиск продуктов в интерфейсе без индекса и с индексом по UPPER(name).
+
+Нужна база с применёнными миграциями. Продукты вставляются внутри транзакции,
+которая откатывается в конце каждого прогона:
+
+    python -m benchmarks.bench_product_search --sizes 1000 100000 1000000
+"""
+
+import argparse
+import os
+import statistics
+import time
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.postgres.search import TrigramSimilarity  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from api.v1.recipe.repositories.recipe_repository import PRODUCT_MATCH_SQL  # noqa: E402
+from api.v1.recipe.utils.ingredient_parser import parse_ingredient_line  # noqa: E402
+from product.models import Product  # noqa: E402
+from users.models import User  # noqa: E402
+
+INGREDIENTS = Path(__file__).parent / "data" / "ingredients_synthetic.txt"
+
+FILL_SQL = """
+    INSERT INTO {table} (id, created, name, category, created_by_id)
+    SELECT
+        gen_random_uuid(),
+        now(),
+        (%(words)s::text[])[1 + i %% %(count)s]
+            || ' ' || (%(words)s::text[])[1 + (i / %(count)s) %% %(count)s]
+            || ' ' || i,
+        'other',
+        %(user_id)s
+    FROM generate_series(1, %(size)s) AS i
+"""
+
+
+class Rollback(Exception):
+    pass
+
+
+def ingredient_names() -> list[str]:
+    with open(INGREDIENTS, encoding="utf-8") as f:
+        names = (
+            parse_ingredient_line(line.strip())[0]
+            for line in f
+            if line.strip() and not line.startswith("#")
+        )
+        return list(dict.fromkeys(name for name in names if name))
+
+
+def timed(func, repeat: int) -> float:
+    """
+    Медианное время одного вызова, мс
+    """
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def run(size: int, names: list[str], queries: int, repeat: int) -> dict[str, float]:
+    words = sorted({word for name in names for word in name.split() if len(word) > 2})
+    sample = names[::max(len(names) // queries, 1)][:queries]
+    prefixes = [name[:4] for name in sample]
+    results = {}
+
+    try:
+        with transaction.atomic():
+            user = User.objects.create_user(email=f"bench-{size}@example.com", password=None)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    FILL_SQL.format(table=Product._meta.db_table),
+                    {"words": words, "count": len(words), "user_id": user.id, "size": size},
+                )
+                # вставленные строки лежат в pending list GIN, пока их не разберёт autovacuum
+                for index in Product._meta.indexes:
+                    cursor.execute("SELECT gin_clean_pending_list(%s::regclass)", [index.name])
+                cursor.execute(f"ANALYZE {Product._meta.db_table}")
+
+            products = Product.objects.filter(created_by=user)
+
+            def legacy():
+                for name in sample:
+                    (
+                        products.annotate(similarity=TrigramSimilarity("name", name))
+                        .filter(similarity__gte=settings.PRODUCT_SIMILARITY_THRESHOLD)
+                        .order_by("-similarity")
+                        .first()
+                    )
+
+            def indexed():
+                for name in sample:
+                    (
+                        products.filter(name__trigram_similar=name)
+                        .annotate(similarity=TrigramSimilarity("name", name))
+                        .order_by("-similarity")
+                        .first()
+                    )
+
+            def batch():
+                list(Product.objects.raw(
+                    PRODUCT_MATCH_SQL.format(table=Product._meta.db_table), [sample, user.id],
+                ))
+
+            def icontains():
+                for prefix in prefixes:
+                    list(products.filter(name__icontains=prefix)[:10])
+
+            def icontains_seq():
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_bitmapscan = off")
+                icontains()
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_bitmapscan = on")
+
+            results["similarity >= 0.5"] = timed(legacy, repeat) / len(sample)
+            results["name % q"] = timed(indexed, repeat) / len(sample)
+            results["batch (LATERAL)"] = timed(batch, repeat)
+            results["icontains seq"] = timed(icontains_seq, repeat) / len(prefixes)
+            results["icontains gin"] = timed(icontains, repeat) / len(prefixes)
+
+            raise Rollback
+    except Rollback:
+        pass
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=15, help="названий на рецепт")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    names = ingredient_names()
+    table = {size: run(size, names, args.queries, args.repeat) for size in args.sizes}
+
+    columns = list(next(iter(table.values())))
+    print(f"{'products':>10} " + " ".join(f"{column:>18}" for column in columns))
+    for size, results in table.items():
+        print(f"{size:>10} " + " ".join(f"{results[c]:>16.2f}ms" for c in columns))
+    print(f"(batch — на {args.queries} названий одним запросом, остальное — на один запрос)")
+
+
+if __name__ == "__main__":
+    main()
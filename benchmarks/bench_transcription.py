@@ -0,0 +1,78 @@
+"""
+Бенчмарк распознавания видео: весь файл одним вызовом против кусков в потоках.
+
+Запись с речью зацикливается до 1, 5 и 20 минут:
+
+    python -m benchmarks.bench_transcription --audio sample.mp3 --workers 4
+"""
+
+import argparse
+import os
+import time
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+import numpy as np  # noqa: E402
+from django.conf import settings  # noqa: E402
+from faster_whisper import decode_audio  # noqa: E402
+
+from api.v1.recipe.services.video_parser import VideoParserService  # noqa: E402
+
+DURATIONS_MIN = (1, 5, 20)
+
+
+def tile(audio: np.ndarray, seconds: int) -> np.ndarray:
+    samples = seconds * VideoParserService.SAMPLE_RATE
+    repeats = samples // len(audio) + 1
+    return np.tile(audio, repeats)[:samples]
+
+
+def measure(parser: VideoParserService, audio: np.ndarray) -> tuple[float, str]:
+    started = time.perf_counter()
+    text = parser._transcribe_audio(audio)
+    return time.perf_counter() - started, text
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--audio", required=True, help="файл с речью (любой формат ffmpeg)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--model", default="small")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    settings.WHISPER_MODELS = {
+        "bench_sequential": {"model_size": args.model, "cpu_threads": cores},
+        "bench_chunked": {
+            "model_size": args.model,
+            "cpu_threads": max(1, cores // args.workers),
+            "num_workers": args.workers,
+        },
+    }
+
+    sequential = VideoParserService(queue="bench_sequential")
+    chunked = VideoParserService(queue="bench_chunked")
+    chunked.CHUNKED_MIN_SECONDS = 0
+
+    source = decode_audio(args.audio, sampling_rate=VideoParserService.SAMPLE_RATE)
+
+    # прогрев: загрузка моделей не должна попадать в замеры
+    sequential.get_model()
+    chunked.get_model()
+
+    print(f"{'minutes':>8} {'sequential, s':>14} {'chunked, s':>11} {'speedup':>8} same_text")
+    for minutes in DURATIONS_MIN:
+        audio = tile(source, minutes * 60)
+        seq_time, seq_text = measure(sequential, audio)
+        par_time, par_text = measure(chunked, audio)
+        print(
+            f"{minutes:>8} {seq_time:>14.1f} {par_time:>11.1f} "
+            f"{seq_time / par_time:>7.2f}x {seq_text == par_text}"
+        )
+
+
+if __name__ == "__main__":
+    main()
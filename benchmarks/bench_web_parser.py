@@ -0,0 +1,392 @@
+"""
+Бенчмарк разбора страниц рецептов в WebParserService: мс на страницу
+(построение дерева + проверка страницы + извлечение полей).
+
+Сравниваются:
+  legacy html.parser  — прежняя реализация: дерево строится всегда, JSON-LD ищется в нём,
+                        soup.select на каждый селектор каждой группы;
+  current html.parser — JSON-LD из сырых байтов, дерево — только если его не хватило;
+                        все группы селекторов за один обход (SelectorIndex);
+  current lxml        — то же с парсером lxml (если установлен);
+  … без профилей      — без профилей извлечения доменов: каждое поле ищется по всем
+                        селекторам группы (в остальных строках профили прогреваются
+                        на первом прогоне и страницы домена сначала пробуют их).
+
+Корпус — сохранённые страницы (*.html) из --pages. Сохранить страницы по списку URL:
+
+    python -m benchmarks.bench_web_parser --pages /tmp/pages --fetch urls.txt
+    python -m benchmarks.bench_web_parser --pages /tmp/pages
+
+Без --pages страницы собираются из benchmarks/data/recipes.jsonl в разметке
+популярных движков (JSON-LD, WPRM, microdata, Tasty, таблицы) с типичным
+окружением: меню, карточки соседних рецептов, комментарии; у каждой разметки свой домен.
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import statistics
+import time
+from html import escape
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+django.setup()
+
+from bs4 import BeautifulSoup  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.core.exceptions import ValidationError  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+import api.v1.recipe.constants as selectors  # noqa: E402
+from api.v1.recipe.dto.page_dto import FetchedPageDTO  # noqa: E402
+from api.v1.recipe.services.extraction_profiles import ExtractionProfileStore  # noqa: E402
+from api.v1.recipe.services.web_parser import WebParserService  # noqa: E402
+from benchmarks.corpus import SAMPLE, read_jsonl  # noqa: E402
+
+
+class LegacyWebParser(WebParserService):
+    """
+    Прежняя реализация: дерево html.parser строится для каждой страницы,
+    JSON-LD ищется в нём, на каждый селектор — отдельный обход дерева
+    """
+
+    def _get_soup(self, page):
+        key = self._page_key(page)
+        if self._soup_key != key:
+            self._soup = BeautifulSoup(page.content, "html.parser")
+            self._soup_key = key
+        return self._soup
+
+    def _validate_page(self, page):
+        soup = self._get_soup(page)
+        for script in soup.select('script[type="application/ld+json"]'):
+            try:
+                data = json.loads(script.string)
+                if isinstance(data, list):
+                    data = data[0]
+                if data.get("@type", "") in selectors.LISTING_JSONLD_TYPES:
+                    raise ValidationError("listing")
+                if data.get("@type", "") in ("Recipe", "HowTo"):
+                    has_name = bool(data.get("name") or data.get("headline"))
+                    if has_name and (
+                        data.get("recipeIngredient") or data.get("recipeInstructions")
+                    ):
+                        return
+                if "@graph" in data:
+                    recipes = [
+                        item for item in data["@graph"]
+                        if isinstance(item, dict) and item.get("@type") in ("Recipe", "HowTo")
+                    ]
+                    if len(recipes) > 1:
+                        raise ValidationError("multiple")
+                    if len(recipes) == 1:
+                        item = recipes[0]
+                        has_name = bool(item.get("name") or item.get("headline"))
+                        if has_name and (
+                            item.get("recipeIngredient") or item.get("recipeInstructions")
+                        ):
+                            return
+            except (json.JSONDecodeError, AttributeError, IndexError):
+                continue
+        self._validate_recipe_page(soup)
+
+    def _parse_page(self, page, url):
+        soup = self._get_soup(page)
+        structured_data = {}
+        for script in soup.select('script[type="application/ld+json"]'):
+            try:
+                data = json.loads(script.string)
+                if isinstance(data, list):
+                    data = data[0]
+                if data.get("@type") in ["Recipe", "HowTo"]:
+                    structured_data = self._parse_structured_recipe(data)
+                    break
+            except (json.JSONDecodeError, AttributeError, IndexError):
+                continue
+        return self._parse_recipe_data(soup, url, structured_data)
+
+    def _matches(self, soup, group):
+        return [soup.select(selector) for selector in group]
+
+    def _find_by_selectors(self, soup, selectors, field=None):
+        for selector in selectors:
+            element = soup.select_one(selector)
+            if element and element.get_text().strip():
+                return self._clean_text(element.get_text())
+        return None
+
+    def _find_list_by_selectors(self, soup, selectors, field=None):
+        for selector in selectors:
+            elements = soup.select(selector)
+            if elements:
+                texts = []
+                for element in elements:
+                    for span in element.select("span"):
+                        text = self._clean_text(span.get_text())
+                        if text:
+                            texts.append(text)
+                return texts
+        return []
+
+    def _find_steps(self, soup, selectors, field=None):
+        steps = []
+        for selector in selectors:
+            for element in soup.select(selector):
+                for p in element.select("p"):
+                    text = self._clean_text(p.get_text())
+                    if text:
+                        steps.append(text)
+        return steps
+
+    def _find_image(self, soup, field=None):
+        for selector in selectors.IMAGE_SELECTORS:
+            img = soup.select_one(selector)
+            if img and img.get("src"):
+                return img["src"]
+        return None
+
+
+class NoProfileStore(ExtractionProfileStore):
+    """
+    Профили не читаются и не запоминаются
+    """
+
+    def get(self, domain):
+        return {}
+
+    def put(self, domain, profile):
+        pass
+
+
+class UnprofiledWebParser(WebParserService):
+    def __init__(self):
+        super().__init__(profile_store=NoProfileStore())
+
+
+def boilerplate(seed: int) -> tuple[str, str]:
+    """
+    Шапка и подвал страницы: меню, соседние рецепты, комментарии
+    """
+    menu = "".join(
+        f'<li class="menu-item"><a href="/category/{i}/">Раздел {i}</a></li>' for i in range(60)
+    )
+    related = "".join(
+        f'<article class="post-card"><a href="/recipe/{seed + i}/">'
+        f'<img src="/img/{seed + i}.jpg" alt=""><h3>Рецепт {seed + i}</h3></a>'
+        f'<div class="meta"><span>{i} мин</span><span>{i * 7} отзывов</span></div></article>'
+        for i in range(12)
+    )
+    comments = "".join(
+        f'<li class="comment"><div class="comment-author"><span>Гость {i}</span></div>'
+        f"<div class=\"comment-body\"><p>{'Очень вкусно получилось, спасибо! ' * 4}</p></div></li>"
+        for i in range(40)
+    )
+    head = (
+        "<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\">"
+        + "".join(f'<link rel="preload" href="/static/{i}.css">' for i in range(20))
+        + "</head><body><header><nav><ul class=\"menu\">" + menu + "</ul></nav></header>"
+        + "<main><div class=\"content\">"
+    )
+    foot = (
+        "</div><aside class=\"sidebar\">" + related + "</aside>"
+        + "<section class=\"comments\"><ol>" + comments + "</ol></section></main>"
+        + "<footer>" + "<p>© Сайт рецептов</p>" * 10 + "</footer></body></html>"
+    )
+    return head, foot
+
+
+def json_ld(dto) -> str:
+    data = {
+        "@context": "https://schema.org",
+        "@type": "Recipe",
+        "name": dto.title,
+        "description": dto.description,
+        "image": ["https://example.com/cover.jpg"],
+        "recipeIngredient": [i.raw for i in dto.ingredients],
+        "recipeInstructions": [{"@type": "HowToStep", "text": s.step} for s in dto.steps],
+    }
+    return f'<script type="application/ld+json">{json.dumps(data, ensure_ascii=False)}</script>'
+
+
+def render(dto, markup: str) -> str:
+    title = escape(dto.title or "")
+    ingredients = [escape(i.raw) for i in dto.ingredients]
+    steps = [escape(s.step) for s in dto.steps]
+
+    if markup == "json-ld":
+        return json_ld(dto) + f"<h1 class=\"entry-title\">{title}</h1>"
+    if markup == "wprm":
+        return (
+            f'<h2 class="wprm-recipe-name">{title}</h2>'
+            '<div class="wprm-recipe-image"><img src="/img/cover.jpg"></div><ul>'
+            + "".join(
+                f'<li class="wprm-recipe-ingredient"><span>{i}</span></li>' for i in ingredients
+            )
+            + "</ul><ul>"
+            + "".join(
+                f'<li class="wprm-recipe-instruction"><p>{s}</p></li>' for s in steps
+            )
+            + "</ul>"
+        )
+    if markup == "microdata":
+        return (
+            f'<div itemscope><h1 itemprop="name">{title}</h1><img itemprop="image" src="/c.jpg">'
+            + "".join(
+                f'<div itemprop="recipeIngredient"><span>{i}</span></div>' for i in ingredients
+            )
+            + "".join(
+                f'<div itemprop="recipeInstructions"><p>{s}</p></div>' for s in steps
+            )
+            + "</div>"
+        )
+    if markup == "tasty":
+        return (
+            f'<h2 class="tasty-recipes-title">{title}</h2>'
+            '<div class="tasty-recipes-ingredients"><ul>'
+            + "".join(f"<li><span>{i}</span></li>" for i in ingredients)
+            + '</ul></div><div class="tasty-recipes-instructions"><ol>'
+            + "".join(f"<li><p>{s}</p></li>" for s in steps)
+            + "</ol></div>"
+        )
+    # таблица ингредиентов и нумерованные абзацы, как на старых русскоязычных сайтах
+    return (
+        f"<h1>{title}</h1><table class=\"prod\">"
+        + "".join(f"<tr><td><span>{i}</span></td></tr>" for i in ingredients)
+        + "</table>"
+        + "".join(f"<p>{n}. {s}</p>" for n, s in enumerate(steps, 1))
+    )
+
+
+MARKUPS = ["json-ld", "wprm", "microdata", "tasty", "table"]
+
+LOCAL_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def sample_pages(size: int, markups: list[str]) -> list[tuple[str, bytes]]:
+    """
+    Страницы образца: (URL, содержимое)
+    """
+    recipes = read_jsonl(SAMPLE)
+    pages = []
+    for n in range(size):
+        head, foot = boilerplate(n)
+        markup = markups[n % len(markups)]
+        body = render(recipes[n % len(recipes)], markup)
+        pages.append((f"https://{markup}.example.com/{n}/", (head + body + foot).encode()))
+    return pages
+
+
+def saved_pages(directory: Path) -> list[tuple[str, bytes]]:
+    """
+    Сохранённые страницы: имя файла — <домен>_<хеш URL>.html
+    """
+    return [
+        (f"https://{path.stem.rpartition('_')[0] or path.stem}/{path.stem}/", path.read_bytes())
+        for path in sorted(directory.glob("*.html"))
+    ]
+
+
+def fetch_pages(directory: Path, urls_file: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    parser = WebParserService()
+    for url in urls_file.read_text(encoding="utf-8").split():
+        content = parser.fetch(url).content
+        digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+        name = f"{ExtractionProfileStore.domain(url)}_{digest}"
+        (directory / f"{name}.html").write_bytes(content)
+        print(f"{len(content):>9} {url}")
+
+
+# поля, которые WebParserService.parse переносит в RecipeDTO
+COMPARED_FIELDS = ("title", "ingredients", "steps", "thumbnail")
+
+
+def parse_page(parser: WebParserService, url: str, content: bytes) -> tuple[dict, bool]:
+    """
+    Проверка и разбор страницы, как в validate_url + parse.
+    Возвращает поля рецепта и признак, строилось ли дерево страницы.
+    """
+    page = FetchedPageDTO(url=url, final_url=url, content=content)
+    try:
+        parser._validate_page(page)
+    except ValidationError:
+        pass
+    data = parser._parse_page(page, url)
+    return {field: data.get(field) for field in COMPARED_FIELDS}, parser._soup_key is not None
+
+
+def measure(parser_factory, pages: list[tuple[str, bytes]], repeat: int) -> tuple[float, list, int]:
+    """
+    Медианное время на страницу, мс, результаты последнего прогона
+    и число страниц, для которых строилось дерево
+    """
+    samples = []
+    for _ in range(repeat):
+        results, trees = [], 0
+        started = time.perf_counter()
+        for url, content in pages:
+            # новый экземпляр на страницу: кеш дерева не переживает страницу
+            data, built = parse_page(parser_factory(), url, content)
+            results.append(data)
+            trees += built
+        samples.append((time.perf_counter() - started) * 1000 / len(pages))
+    return statistics.median(samples), results, trees
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=Path, help="каталог с сохранёнными страницами *.html")
+    parser.add_argument("--fetch", type=Path, help="файл со списком URL: скачать в --pages")
+    parser.add_argument("--size", type=int, default=100, help="страниц в образце без --pages")
+    parser.add_argument("--markups", nargs="+", choices=MARKUPS, default=MARKUPS,
+                        help="разметка страниц образца")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.fetch:
+        if not args.pages:
+            raise SystemExit("--fetch требует --pages")
+        fetch_pages(args.pages, args.fetch)
+
+    if args.pages:
+        pages = saved_pages(args.pages)
+    else:
+        pages = sample_pages(args.size, args.markups)
+    if not pages:
+        raise SystemExit("Корпус пуст")
+
+    size_kb = statistics.mean(len(content) for _, content in pages) / 1024
+    print(f"{len(pages)} страниц, в среднем {size_kb:.0f} КБ")
+
+    backends = ["html.parser"]
+    if importlib.util.find_spec("lxml"):
+        backends.append("lxml")
+
+    legacy_ms, legacy, _ = measure(LegacyWebParser, pages, args.repeat)
+    print(f"{'legacy html.parser':<30} {legacy_ms:>8.2f} ms/page")
+
+    runs = [(backend, WebParserService) for backend in backends]
+    runs.append(("html.parser без профилей", UnprofiledWebParser))
+    for name, parser_factory in runs:
+        backend = name.split()[0]
+        store = ExtractionProfileStore()
+        # профили и счётчики — в локальном кеше процесса, с нуля для каждой строки
+        with override_settings(WEB_PARSER_BACKEND=backend, CACHES=LOCAL_CACHE):
+            cache.clear()
+            ms, results, trees = measure(parser_factory, pages, args.repeat)
+            stats = store.stats()
+        mismatches = sum(old != new for old, new in zip(legacy, results, strict=True))
+        hit_rate = f"  попаданий профиля: {stats.hit_rate:.0%}" if stats.lookups else ""
+        print(
+            f"{'current ' + name:<30} {ms:>8.2f} ms/page  x{legacy_ms / ms:.1f}  "
+            f"дерево строилось: {trees}/{len(pages)}  расхождений: {mismatches}{hit_rate}"
+        )
+
+
+if __name__ == "__main__":
+    main()
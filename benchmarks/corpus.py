@@ -0,0 +1,48 @@
+"""
+Корпус рецептов для бенчмарков.
+
+Источник по приоритету: JSONL-файл с RecipeDTO (--corpus), распарсенные рецепты
+из RecipeSource.parsed_recipe (--from-db) или образец benchmarks/data/recipes.jsonl.
+Корпус размножается до нужного числа рецептов.
+"""
+
+import itertools
+import json
+from pathlib import Path
+
+from api.v1.recipe.dto.recipe_dto import RecipeDTO
+from api.v1.recipe.mappers.recipe_mapper import RecipeMapper
+
+SAMPLE = Path(__file__).parent / "data" / "recipes.jsonl"
+
+
+def add_arguments(parser):
+    parser.add_argument("--corpus", type=Path, help="JSONL с рецептами (RecipeDTO)")
+    parser.add_argument("--from-db", action="store_true", help="рецепты из RecipeSource")
+    parser.add_argument("--size", type=int, default=5000, help="число рецептов в прогоне")
+
+
+def load(args) -> list[RecipeDTO]:
+    if args.corpus:
+        recipes = read_jsonl(args.corpus)
+    elif args.from_db:
+        recipes = from_db()
+    else:
+        recipes = read_jsonl(SAMPLE)
+
+    if not recipes:
+        raise SystemExit("Корпус пуст")
+
+    return list(itertools.islice(itertools.cycle(recipes), args.size))
+
+
+def read_jsonl(path: Path) -> list[RecipeDTO]:
+    with open(path, encoding="utf-8") as f:
+        return [RecipeMapper.dict_to_dto(json.loads(line)) for line in f if line.strip()]
+
+
+def from_db() -> list[RecipeDTO]:
+    from recipe.models import RecipeSource
+
+    parsed = RecipeSource.objects.exclude(parsed_recipe={}).values_list("parsed_recipe", flat=True)
+    return [RecipeMapper.dict_to_dto(data) for data in parsed.iterator()]
@@ -1,5 +1,6 @@
 # ruff: noqa: F403
 from tests.conftest.api_fixtures import *
+from tests.conftest.cache_fixtures import *
 from tests.conftest.product_fixtures import *
 from tests.conftest.recipe_fixtures import *
 from tests.conftest.user_fixtures import *
@@ -47,7 +47,7 @@ class MenuPlan(TimestampedModel):
             name = entry.recipe.image.name
             if name and name not in seen:
                 seen.add(name)
-                images.append(entry.recipe.image.url)
+                images.append(entry.recipe.image_medium_url)
             if len(images) >= 4:
                 break
         return images
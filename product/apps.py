@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class ProductConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'product'
+
+    def ready(self):
+        from product.signals import connect_product_matcher, set_similarity_threshold
+
+        connection_created.connect(set_similarity_threshold)
+        if settings.PRODUCT_MATCHER_ENABLED:
+            connect_product_matcher()
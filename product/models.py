@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils.translation import gettext_lazy as _
 
 from app import settings
@@ -27,6 +29,12 @@ class Product(TimestampedModel):
 
     class Meta:
         unique_together = ("name", "created_by")
+        indexes = [
+            # similarity / оператор % при сопоставлении ингредиентов с продуктами
+            GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name="product_name_trgm"),
+            # name__icontains (UPPER(name) LIKE UPPER(...)) в поиске продуктов
+            GinIndex(OpClass(Upper("name"), name="gin_trgm_ops"), name="product_name_upper_trgm"),
+        ]
         verbose_name = _("Продукт")
         verbose_name_plural = _("Продукты")
     
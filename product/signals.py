@@ -0,0 +1,45 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+
+
+def set_similarity_threshold(sender, connection, **kwargs):
+    """
+    Порог оператора % (pg_trgm) на всю сессию: сопоставление ингредиентов
+    с продуктами фильтрует через name % ..., что использует индекс product_name_trgm
+    """
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT set_config('pg_trgm.similarity_threshold', %s, false)",
+            [str(settings.PRODUCT_SIMILARITY_THRESHOLD)],
+        )
+
+
+def invalidate_product_matcher(sender, instance, **kwargs):
+    """
+    Продукты пользователя изменились — индекс ProductMatcher перестраивается
+    """
+    from api.v1.recipe.services.product_matcher import ProductMatcher
+
+    if instance.created_by_id:
+        ProductMatcher.invalidate(instance.created_by_id)
+
+
+def connect_product_matcher():
+    """
+    Подписывает ProductMatcher на изменения продуктов; нужно, только когда
+    включено сопоставление в памяти (PRODUCT_MATCHER_ENABLED)
+    """
+    from product.models import Product
+
+    for signal in (post_save, post_delete):
+        signal.connect(invalidate_product_matcher, sender=Product)
+
+
+def disconnect_product_matcher():
+    from product.models import Product
+
+    for signal in (post_save, post_delete):
+        signal.disconnect(invalidate_product_matcher, sender=Product)
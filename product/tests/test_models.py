@@ -1,8 +1,14 @@
+from unittest.mock import patch
+
 import pytest
+from django.apps import apps
+from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import connection
 
 from product.choices import Category
 from product.models import Product
+from product.signals import disconnect_product_matcher
 
 
 @pytest.mark.django_db
@@ -43,3 +49,47 @@ class TestProductModel:
 
         with pytest.raises(ValidationError):
             duplicate.full_clean()
+
+
+@pytest.mark.django_db
+class TestProductTrigramSearch:
+
+    def test_session_similarity_threshold(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW pg_trgm.similarity_threshold")
+            assert float(cursor.fetchone()[0]) == settings.PRODUCT_SIMILARITY_THRESHOLD
+
+    def test_trigram_similar_matches_word_forms(self, owner):
+        Product.objects.create(name="молоко", created_by=owner)
+        Product.objects.create(name="мука", created_by=owner)
+
+        matches = Product.objects.filter(name__trigram_similar="молока")
+
+        assert [product.name for product in matches] == ["молоко"]
+
+
+@pytest.mark.django_db
+class TestProductMatcherSignals:
+
+    @pytest.fixture(autouse=True)
+    def disconnect(self):
+        yield
+        disconnect_product_matcher()
+
+    def test_not_connected_when_matcher_disabled(self, owner, settings):
+        settings.PRODUCT_MATCHER_ENABLED = False
+        apps.get_app_config("product").ready()
+
+        with patch("api.v1.recipe.services.product_matcher.ProductMatcher._bump") as mock_bump:
+            Product.objects.create(name="кефир", created_by=owner).delete()
+
+        mock_bump.assert_not_called()
+
+    def test_invalidated_when_matcher_enabled(self, owner, settings):
+        settings.PRODUCT_MATCHER_ENABLED = True
+        apps.get_app_config("product").ready()
+
+        with patch("api.v1.recipe.services.product_matcher.ProductMatcher._bump") as mock_bump:
+            Product.objects.create(name="кефир", created_by=owner).delete()
+
+        assert mock_bump.call_count == 2
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from recipe.models import Recipe, RecipeIngredient, RecipeSource
+from recipe.models import LLMResponse, Recipe, RecipeIngredient, RecipeSource, VideoTranscript
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -17,4 +17,14 @@ class RecipeAdmin(admin.ModelAdmin):
 @admin.register(RecipeSource)
 class RecipeSourceAdmin(admin.ModelAdmin):
     list_display = ["url", "source", "title", "status", "parsed_recipe", "error_message", ]
-    search_fields = ("title",)
\ No newline at end of file
+    search_fields = ("title",)
+
+@admin.register(VideoTranscript)
+class VideoTranscriptAdmin(admin.ModelAdmin):
+    list_display = ["extractor", "video_id", "thumbnail", "created", ]
+    search_fields = ("video_id",)
+
+@admin.register(LLMResponse)
+class LLMResponseAdmin(admin.ModelAdmin):
+    list_display = ["key", "model", "prompt_version", "last_used", "created", ]
+    search_fields = ("key",)
@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+
+from api.v1.recipe.services.extraction_profiles import ExtractionProfileStore
+
+
+class Command(BaseCommand):
+    help = (
+        "Статистика профилей извлечения WebParserService: как часто поля рецепта "
+        "находятся селекторами, запомненными для домена. С --domain — профиль домена."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--domain", help="показать профиль домена")
+        parser.add_argument("--forget", action="store_true", help="удалить профиль домена")
+        parser.add_argument("--reset-stats", action="store_true", help="обнулить счётчики")
+
+    def handle(self, *args, **options):
+        store = ExtractionProfileStore()
+
+        if options["domain"]:
+            domain = ExtractionProfileStore.domain(f"//{options['domain']}")
+            if options["forget"]:
+                store.delete(domain)
+                self.stdout.write(f"Профиль {domain} удалён")
+                return
+            profile = store.get(domain)
+            if not profile:
+                self.stdout.write(f"Профиля для {domain} нет")
+            for field, source in profile.items():
+                self.stdout.write(f"{field}: {source}")
+            return
+
+        stats = store.stats()
+        self.stdout.write(
+            f"Попаданий {stats.hits}, промахов {stats.misses}, без профиля {stats.cold}; "
+            f"доля попаданий {stats.hit_rate:.1%}; из JSON-LD {stats.json_ld}"
+        )
+        if options["reset_stats"]:
+            store.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Счётчики обнулены"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from api.v1.recipe.services.http_client import HttpMetrics
+
+
+class Command(BaseCommand):
+    help = (
+        "Время исходящих HTTP-запросов по хостам, сумма по вебу и воркерам Celery: "
+        "TCP-соединение, TLS-рукопожатие и время до первого байта ответа."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="обнулить счётчики")
+
+    def handle(self, *args, **options):
+        stats = HttpMetrics.stats()
+        if not stats:
+            self.stdout.write("Замеров пока нет")
+        for host, timings in stats.items():
+            parts = [
+                f"{name} {timing.count} × {timing.avg * 1000:.1f} мс"
+                for name, timing in timings.items()
+            ]
+            self.stdout.write(f"{host}: {', '.join(parts)}")
+
+        if options["reset"]:
+            HttpMetrics.reset()
+            self.stdout.write(self.style.SUCCESS("Счётчики обнулены"))
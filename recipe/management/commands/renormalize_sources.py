@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+
+from api.v1.common.uow.django_uow import DjangoUnitOfWork
+from api.v1.recipe.dto.renormalize_dto import RenormalizeProgressDTO
+from api.v1.recipe.repositories.source_repository import RecipeSourceRepository
+from api.v1.recipe.tasks import renormalize_sources
+from api.v1.recipe.usecases.renormalize_sources_usecase import RenormalizeSourcesUseCase
+
+
+class Command(BaseCommand):
+    help = (
+        "Заново прогоняет RecipeSource.parsed_recipe через RecipeBuilderService. "
+        "Прерванный запуск продолжается с места остановки (--restart — начать сначала)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, help="строк в чанке")
+        parser.add_argument("--workers", type=int, help="число процессов")
+        parser.add_argument("--restart", action="store_true", help="начать с первого источника")
+        parser.add_argument("--dry-run", action="store_true", help="только посчитать изменения")
+        parser.add_argument("--celery", action="store_true", help="поставить задачу в Celery")
+
+    def handle(self, *args, **options):
+        if options["celery"]:
+            result = renormalize_sources.delay(
+                chunk_size=options["chunk_size"],
+                restart=options["restart"],
+            )
+            self.stdout.write(f"Задача поставлена: {result.id}")
+            return
+
+        use_case = RenormalizeSourcesUseCase(
+            repository=RecipeSourceRepository(),
+            uow=DjangoUnitOfWork(),
+            chunk_size=options["chunk_size"],
+            workers=options["workers"],
+        )
+
+        progress = use_case.execute(
+            restart=options["restart"],
+            dry_run=options["dry_run"],
+            on_progress=self._report,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Готово: обработано {progress.processed}, изменено {progress.updated}"
+        ))
+
+    def _report(self, progress: RenormalizeProgressDTO):
+        self.stdout.write(
+            f"{progress.processed}/{progress.total}, изменено {progress.updated}, "
+            f"последний id {progress.last_id}"
+        )
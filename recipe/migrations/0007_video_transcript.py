@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:52
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0006_set_default_uncategorized'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VideoTranscript',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('modified', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('extractor', models.CharField(max_length=64, verbose_name='Экстрактор')),
+                ('video_id', models.CharField(max_length=255, verbose_name='ID видео')),
+                ('transcript', models.TextField(blank=True, default='', verbose_name='Транскрипт')),
+                ('description', models.TextField(blank=True, default='', verbose_name='Описание')),
+                ('thumbnail', models.URLField(blank=True, max_length=2048, null=True, verbose_name='Превью')),
+            ],
+            options={
+                'verbose_name': 'Транскрипт видео',
+                'verbose_name_plural': 'Транскрипты видео',
+                'unique_together': {('extractor', 'video_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0007_video_transcript'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMResponse',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('modified', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=64, unique=True, verbose_name='Ключ')),
+                ('model', models.CharField(max_length=255, verbose_name='Модель')),
+                ('prompt_version', models.CharField(max_length=32, verbose_name='Версия промпта')),
+                ('response', models.JSONField(default=dict, verbose_name='Ответ')),
+                ('last_used', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Последнее использование')),
+            ],
+            options={
+                'verbose_name': 'Ответ LLM',
+                'verbose_name_plural': 'Ответы LLM',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0008_llm_response'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_variants',
+            field=models.JSONField(blank=True, default=dict, help_text='Ширина в пикселях → файл WebP в хранилище', verbose_name='Уменьшенные копии изображения'),
+        ),
+    ]
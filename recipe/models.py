@@ -78,6 +78,12 @@ class Recipe(TimestampedModel, StatusModel):
         null=True,
         verbose_name=_("Изображение"),
     )
+    image_variants = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name=_("Уменьшенные копии изображения"),
+        help_text=_("Ширина в пикселях → файл WebP в хранилище"),
+    )
     meal_type = models.CharField(
         max_length=50,
         choices=MealType.choices,
@@ -103,6 +109,37 @@ class Recipe(TimestampedModel, StatusModel):
     
     def __str__(self):
         return self.name
+
+    def image_url(self, width: int | None = None) -> str | None:
+        """
+        URL самой узкой копии не уже width; без копий — оригинал
+        """
+        if not self.image:
+            return None
+        if width:
+            for size in sorted(map(int, self.image_variants)):
+                if size >= width:
+                    return self.image.storage.url(self.image_variants[str(size)])
+        return self.image.url
+
+    @property
+    def image_small_url(self) -> str | None:
+        return self.image_url(160)
+
+    @property
+    def image_medium_url(self) -> str | None:
+        return self.image_url(480)
+
+    @property
+    def image_large_url(self) -> str | None:
+        return self.image_url(1024)
+
+    @property
+    def image_srcset(self) -> str:
+        return ", ".join(
+            f"{self.image.storage.url(name)} {width}w"
+            for width, name in sorted(self.image_variants.items(), key=lambda item: int(item[0]))
+        )
     
 
 class RecipeIngredient(TimestampedModel):
@@ -140,3 +177,79 @@ class RecipeIngredient(TimestampedModel):
     
     def __str__(self):
         return f"{self.quantity} {self.unit} {self.product}"
+
+
+class VideoTranscript(TimestampedModel):
+    """
+    Результат распознавания видео, адресуемый по экстрактору yt_dlp и id видео.
+    Повторный импорт того же видео не скачивает и не транскрибирует его заново.
+    """
+    extractor = models.CharField(
+        max_length=64,
+        verbose_name=_("Экстрактор"),
+    )
+    video_id = models.CharField(
+        max_length=255,
+        verbose_name=_("ID видео"),
+    )
+    transcript = models.TextField(
+        blank=True,
+        default="",
+        verbose_name=_("Транскрипт"),
+    )
+    description = models.TextField(
+        blank=True,
+        default="",
+        verbose_name=_("Описание"),
+    )
+    thumbnail = models.URLField(
+        max_length=2048,
+        blank=True,
+        null=True,
+        verbose_name=_("Превью"),
+    )
+
+    class Meta:
+        unique_together = ("extractor", "video_id")
+        verbose_name = _("Транскрипт видео")
+        verbose_name_plural = _("Транскрипты видео")
+
+    def __str__(self):
+        return f"{self.extractor}:{self.video_id}"
+
+
+class LLMResponse(TimestampedModel):
+    """
+    Рецепт, извлечённый LLM из текста видео.
+    Ключ — хеш модели, версии промпта и нормализованного текста:
+    репосты и повторы одного видео не отправляются в LLM заново.
+    """
+    key = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name=_("Ключ"),
+    )
+    model = models.CharField(
+        max_length=255,
+        verbose_name=_("Модель"),
+    )
+    prompt_version = models.CharField(
+        max_length=32,
+        verbose_name=_("Версия промпта"),
+    )
+    response = models.JSONField(
+        default=dict,
+        verbose_name=_("Ответ"),
+    )
+    last_used = models.DateTimeField(
+        auto_now_add=True,
+        db_index=True,
+        verbose_name=_("Последнее использование"),
+    )
+
+    class Meta:
+        verbose_name = _("Ответ LLM")
+        verbose_name_plural = _("Ответы LLM")
+
+    def __str__(self):
+        return f"{self.model}:{self.prompt_version}:{self.key}"
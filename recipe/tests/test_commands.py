@@ -0,0 +1,82 @@
+from collections import Counter
+from io import StringIO
+from unittest.mock import patch
+
+import pytest
+from django.core.management import call_command
+
+from api.v1.recipe.services.extraction_profiles import ExtractionProfileStore
+from api.v1.recipe.services.http_client import HttpMetrics
+
+
+@pytest.mark.django_db
+class TestRenormalizeSourcesCommand:
+
+    def test_runs_use_case_in_process(self, recipe_source):
+        recipe_source.parsed_recipe = {
+            "title": "Омлет",
+            "description": None,
+            "meal_type": None,
+            "ingredients": [{"name": None, "amount": None, "unit": None, "raw": "2 яйца"}],
+            "steps": [],
+            "tips": None,
+            "thumbnail": None,
+        }
+        recipe_source.save()
+        out = StringIO()
+
+        call_command("renormalize_sources", "--workers", "1", stdout=out)
+
+        recipe_source.refresh_from_db()
+        assert recipe_source.parsed_recipe["ingredients"][0]["name"] == "яйца"
+        assert "обработано 1, изменено 1" in out.getvalue()
+
+    @patch("recipe.management.commands.renormalize_sources.renormalize_sources.delay")
+    def test_enqueues_celery_task(self, mock_delay):
+        out = StringIO()
+
+        call_command("renormalize_sources", "--celery", "--restart", stdout=out)
+
+        mock_delay.assert_called_once_with(chunk_size=None, restart=True)
+
+
+class TestExtractionProfilesCommand:
+
+    def test_prints_stats_and_domain_profile(self):
+        store = ExtractionProfileStore()
+        store.put("example.com", {"title": [1], "ingredients": "json_ld"})
+        store.record(Counter(hit=3, cold=1, json_ld=5))
+        out = StringIO()
+
+        call_command("extraction_profiles", stdout=out)
+        call_command("extraction_profiles", "--domain", "www.example.com", stdout=out)
+
+        assert (
+            "Попаданий 3, промахов 0, без профиля 1; доля попаданий 75.0%; из JSON-LD 5"
+        ) in out.getvalue()
+        assert "title: [1]" in out.getvalue()
+
+    def test_forgets_domain(self):
+        store = ExtractionProfileStore()
+        store.put("example.com", {"title": [1]})
+
+        call_command(
+            "extraction_profiles", "--domain", "example.com", "--forget", stdout=StringIO()
+        )
+
+        assert store.get("example.com") == {}
+
+
+class TestHttpMetricsCommand:
+
+    def test_prints_timings_flushed_by_processes(self):
+        HttpMetrics.observe("example.com", "connect", 0.010)
+        HttpMetrics.observe("example.com", "ttfb", 0.100)
+        HttpMetrics.observe("example.com", "ttfb", 0.300)
+        HttpMetrics.flush()
+        out = StringIO()
+
+        call_command("http_metrics", "--reset", stdout=out)
+
+        assert "example.com: connect 1 × 10.0 мс, ttfb 2 × 200.0 мс" in out.getvalue()
+        assert HttpMetrics.stats() == {}
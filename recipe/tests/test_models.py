@@ -38,6 +38,28 @@ class TestRecipeModel:
             recipe.full_clean(exclude=["source", "created_by"])
             assert recipe.meal_type == mt.value
 
+    @pytest.mark.usefixtures("memory_storage")
+    def test_image_url_prefers_narrowest_sufficient_variant(self, recipe):
+        recipe.image = "recipes/ab/abc.jpg"
+        recipe.image_variants = {
+            "1024": "recipes/ab/abc_1024.webp",
+            "160": "recipes/ab/abc_160.webp",
+            "480": "recipes/ab/abc_480.webp",
+        }
+
+        assert recipe.image_small_url.endswith("abc_160.webp")
+        assert recipe.image_medium_url.endswith("abc_480.webp")
+        assert recipe.image_url(2000).endswith("abc.jpg")
+        assert recipe.image_srcset.split(", ")[0].endswith("abc_160.webp 160w")
+
+    @pytest.mark.usefixtures("memory_storage")
+    def test_image_url_falls_back_to_original(self, recipe):
+        assert recipe.image_small_url is None
+
+        recipe.image = "recipes/ab/abc.jpg"
+        assert recipe.image_small_url == recipe.image.url
+        assert recipe.image_srcset == ""
+
 
 @pytest.mark.django_db
 class TestRecipeIngredientModel:
@@ -1,5 +1,10 @@
+from io import BytesIO
+from unittest.mock import patch
+
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from PIL import Image
 
 from recipe.choices import MealType, Unit
 from recipe.models import Recipe
@@ -77,6 +82,38 @@ class TestRecipeUpdateView:
         assert response.status_code == 302
         assert recipe.name == "Обновленный рецепт"
     
+    @patch("recipe.views.generate_recipe_image_variants.delay")
+    @pytest.mark.usefixtures("memory_storage")
+    def test_new_image_schedules_variants(
+        self, mock_variants, client, owner, recipe, django_capture_on_commit_callbacks
+    ):
+        recipe.created_by = owner
+        recipe.image_variants = {"160": "recipes/old_160.webp"}
+        recipe.save()
+        client.force_login(owner)
+
+        buffer = BytesIO()
+        Image.new("RGB", (10, 10)).save(buffer, "PNG")
+        data = {
+            "name": recipe.name,
+            "meal_type": recipe.meal_type,
+            "servings": recipe.servings or 1,
+            "description": recipe.description,
+            "image": SimpleUploadedFile("new.png", buffer.getvalue(), "image/png"),
+            "ingredient-TOTAL_FORMS": "0",
+            "ingredient-INITIAL_FORMS": "0",
+            "ingredient-MIN_NUM_FORMS": "0",
+            "ingredient-MAX_NUM_FORMS": "1000",
+        }
+
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse("recipe:edit", kwargs={"pk": recipe.pk}), data)
+
+        recipe.refresh_from_db()
+        assert response.status_code == 302
+        assert recipe.image_variants == {}
+        mock_variants.assert_called_once_with(str(recipe.id))
+
     def test_other_user_cannot_update(self, client, other_user, recipe):
         client.force_login(other_user)
 
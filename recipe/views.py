@@ -1,5 +1,7 @@
 import uuid
+from functools import partial
 
+from django.db import transaction
 from django.db.models import Count, Q
 from django.shortcuts import redirect
 from django.urls import reverse_lazy
@@ -11,6 +13,7 @@ from django.views.generic import (
     UpdateView,
 )
 
+from api.v1.recipe.tasks import generate_recipe_image_variants
 from app.views import AuthRequiredView
 from product.mixins import OwnerOrSuperuserMixin
 from product.models import Product
@@ -19,6 +22,20 @@ from recipe.forms import RecipeForm, RecipeIngredientFormSet
 from recipe.models import Recipe
 
 
+def schedule_image_variants(form, recipe: Recipe):
+    """
+    Новая обложка из формы: старые копии сбрасываются, новые строятся после коммита
+    """
+    if "image" not in form.changed_data:
+        return
+
+    if recipe.image_variants:
+        Recipe.objects.filter(id=recipe.id).update(image_variants={})
+        recipe.image_variants = {}
+    if recipe.image:
+        transaction.on_commit(partial(generate_recipe_image_variants.delay, str(recipe.id)))
+
+
 class RecipeCreateView(AuthRequiredView, CreateView):
     model = Recipe
     form_class = RecipeForm
@@ -43,6 +60,7 @@ class RecipeCreateView(AuthRequiredView, CreateView):
             self.object = form.save(commit=False)
             self.object.created_by = self.request.user
             self.object.save()
+            schedule_image_variants(form, self.object)
             
             ingredients = formset.save(commit=False)
             for ingredient in ingredients:
@@ -76,6 +94,7 @@ class RecipeUpdateView(AuthRequiredView, OwnerOrSuperuserMixin, UpdateView):
 
         if form.is_valid() and formset.is_valid(): 
             self.object = form.save()
+            schedule_image_variants(form, self.object)
             formset.instance = self.object
             formset.save()
             return redirect(self.success_url)
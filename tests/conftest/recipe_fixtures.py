@@ -76,3 +76,12 @@ def recipe_factory(db, owner, recipe_source):
         return recipe
 
     return create_recipe
+
+
+@pytest.fixture
+def memory_storage(settings):
+    """Файлы моделей пишутся в память вместо S3"""
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+    }